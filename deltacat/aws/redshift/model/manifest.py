@@ -244,6 +244,84 @@ class ManifestMeta(dict):
             return EntryType(self["entry_type"])
         return val
 
+    @property
+    def hash_bucket_index(self) -> Optional[int]:
+        """
+        The index of the primary key hash bucket that all records of a pre-bucketed
+        manifest entry belong to, if any.
+        """
+        return self.get("hash_bucket_index")
+
+    @hash_bucket_index.setter
+    def hash_bucket_index(self, index: int) -> None:
+        self["hash_bucket_index"] = index
+
+    @property
+    def hash_bucket_count(self) -> Optional[int]:
+        """
+        The total number of hash buckets used to pre-bucket this manifest entry.
+        """
+        return self.get("hash_bucket_count")
+
+    @hash_bucket_count.setter
+    def hash_bucket_count(self, count: int) -> None:
+        self["hash_bucket_count"] = count
+
+    @property
+    def primary_keys(self) -> Optional[List[str]]:
+        """
+        The sorted primary keys used to pre-bucket this manifest entry.
+        """
+        return self.get("primary_keys")
+
+    @primary_keys.setter
+    def primary_keys(self, keys: List[str]) -> None:
+        self["primary_keys"] = keys
+
+    @property
+    def pk_hasher_id(self) -> Optional[str]:
+        """
+        The id of the primary key hasher used to pre-bucket this manifest entry.
+        """
+        return self.get("pk_hasher_id")
+
+    @pk_hasher_id.setter
+    def pk_hasher_id(self, pk_hasher_id: str) -> None:
+        self["pk_hasher_id"] = pk_hasher_id
+
+    @property
+    def pk_hasher_version(self) -> Optional[int]:
+        return self.get("pk_hasher_version")
+
+    @pk_hasher_version.setter
+    def pk_hasher_version(self, version: int) -> None:
+        self["pk_hasher_version"] = version
+
+    @property
+    def pk_bloom_filter_file(self) -> Optional[Dict[str, Any]]:
+        """
+        A reference to the file holding a bloom filter of the primary keys of
+        the records in a compacted manifest entry, if any.
+        """
+        return self.get("pk_bloom_filter_file")
+
+    @pk_bloom_filter_file.setter
+    def pk_bloom_filter_file(self, pk_bloom_filter_file: Dict[str, Any]) -> None:
+        self["pk_bloom_filter_file"] = pk_bloom_filter_file
+
+    @property
+    def deletion_vector(self) -> Optional[Dict[str, Any]]:
+        """
+        The positions of the deleted records of a compacted manifest entry,
+        or a reference to the file holding them, if any. Readers must drop
+        these records when reading the entry.
+        """
+        return self.get("deletion_vector")
+
+    @deletion_vector.setter
+    def deletion_vector(self, deletion_vector: Dict[str, Any]) -> None:
+        self["deletion_vector"] = deletion_vector
+
 
 class ManifestAuthor(dict):
     @staticmethod
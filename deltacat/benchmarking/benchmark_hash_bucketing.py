@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    pk_digest_array_to_hash_bucket_indices,
+    pk_digest_to_hash_bucket_index,
+)
+
+# Number of rows in the pk hash column to assign to hash buckets
+NUM_ROWS_BENCHMARKS = [100_000, 1_000_000]
+
+# Number of hash buckets to assign the rows to
+NUM_HASH_BUCKETS = 8192
+
+
+def row_wise_hash_bucket_indices(digests: pa.ChunkedArray, num_buckets: int):
+    result = np.empty([len(digests)], dtype="int32")
+    for index, digest in enumerate(digests.to_numpy()):
+        result[index] = pk_digest_to_hash_bucket_index(digest, num_buckets)
+    return result
+
+
+def vectorized_hash_bucket_indices(digests: pa.ChunkedArray, num_buckets: int):
+    return pk_digest_array_to_hash_bucket_indices(digests, num_buckets)
+
+
+@pytest.fixture(scope="module", params=NUM_ROWS_BENCHMARKS, ids=str)
+def sha1_digests(request) -> pa.ChunkedArray:
+    return pa.chunked_array(
+        [
+            pa.array(
+                [
+                    hashlib.sha1(str(i).encode("utf-8")).hexdigest()
+                    for i in range(request.param)
+                ],
+                pa.string(),
+            )
+        ]
+    )
+
+
+@pytest.mark.benchmark(group="hash_bucket_assignment")
+@pytest.mark.parametrize(
+    "assign_fn",
+    [row_wise_hash_bucket_indices, vectorized_hash_bucket_indices],
+    ids=["row_wise", "vectorized"],
+)
+def test_hash_bucket_assignment(sha1_digests, assign_fn, benchmark):
+    result = benchmark(assign_fn, sha1_digests, NUM_HASH_BUCKETS)
+    assert len(result) == len(sha1_digests)
+    if benchmark.stats:
+        benchmark.extra_info["rows_per_second"] = (
+            len(sha1_digests) / benchmark.stats.stats.mean
+        )
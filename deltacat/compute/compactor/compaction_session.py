@@ -319,6 +319,12 @@ def _execute_compaction_round(
                 f"Both rebase partition and round completion file not found. Performing an entire backfill on source."
             )
         logger.info(f"Round completion file: {round_completion_info}")
+        if round_completion_info and round_completion_info.deletion_vectors_present:
+            raise NotImplementedError(
+                "The compacted delta has deletion vectors, which are only "
+                "supported by compactor v2. Kindly run compactor v2 or rebase "
+                "compaction instead."
+            )
 
     enable_manifest_entry_copy_by_reference = (
         False if rebase_source_partition_locator else True
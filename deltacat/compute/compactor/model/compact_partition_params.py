@@ -21,6 +21,10 @@ from deltacat.compute.compactor_v2.constants import (
     TASK_MAX_PARALLELISM,
     DROP_DUPLICATES,
     TOTAL_MEMORY_BUFFER_PERCENTAGE,
+    PK_HASHER_ID,
+    HASH_BUCKET_THREAD_COUNT,
+    MERGE_THREAD_COUNT,
+    COMPACTED_FILE_ROW_GROUP_TARGET_SIZE_BYTES,
 )
 from deltacat.constants import PYARROW_INFLATION_MULTIPLIER
 from deltacat.compute.compactor.utils.sort_key import validate_sort_keys
@@ -93,6 +97,45 @@ class CompactPartitionParams(dict):
             "hash_group_count", result.hash_bucket_count
         )
         result.drop_duplicates = params.get("drop_duplicates", DROP_DUPLICATES)
+        result.pk_hasher_id = params.get("pk_hasher_id", PK_HASHER_ID)
+        result.hash_bucket_thread_count = params.get(
+            "hash_bucket_thread_count", HASH_BUCKET_THREAD_COUNT
+        )
+        result.streaming_hash_bucket_enabled = params.get(
+            "streaming_hash_bucket_enabled", False
+        )
+        result.append_only_compaction_enabled = params.get(
+            "append_only_compaction_enabled", False
+        )
+        result.sort_merge_enabled = params.get("sort_merge_enabled", False)
+        result.pk_bloom_filter_enabled = params.get("pk_bloom_filter_enabled", False)
+        result.two_phase_merge_enabled = params.get("two_phase_merge_enabled", False)
+        result.merge_prefetch_memory_budget_bytes = params.get(
+            "merge_prefetch_memory_budget_bytes"
+        )
+        result.merge_thread_count = params.get("merge_thread_count", MERGE_THREAD_COUNT)
+        result.merge_spill_enabled = params.get("merge_spill_enabled", False)
+        result.streaming_materialize_enabled = params.get(
+            "streaming_materialize_enabled", False
+        )
+        result.compacted_file_target_size_bytes = params.get(
+            "compacted_file_target_size_bytes"
+        )
+        result.compacted_file_row_group_target_size_bytes = params.get(
+            "compacted_file_row_group_target_size_bytes",
+            COMPACTED_FILE_ROW_GROUP_TARGET_SIZE_BYTES,
+        )
+        result.delete_routing_enabled = params.get("delete_routing_enabled", False)
+        result.deletion_vectors_enabled = params.get("deletion_vectors_enabled", False)
+        result.deletion_vector_aware_reads_enabled = params.get(
+            "deletion_vector_aware_reads_enabled", False
+        )
+        result.compiled_delete_key_sets_enabled = params.get(
+            "compiled_delete_key_sets_enabled", False
+        )
+        result.size_aware_hash_groups_enabled = params.get(
+            "size_aware_hash_groups_enabled", False
+        )
         result.ray_custom_resources = params.get("ray_custom_resources")
 
         result.memory_logs_enabled = params.get("memory_logs_enabled", False)
@@ -115,6 +158,19 @@ class CompactPartitionParams(dict):
             result.records_per_compacted_file and result.records_per_compacted_file >= 1
         ), "Max records per output file must be a positive value"
 
+        assert (
+            result.hash_bucket_thread_count and result.hash_bucket_thread_count >= 1
+        ), "Hash bucket thread count must be a positive value"
+
+        assert (
+            result.merge_thread_count and result.merge_thread_count >= 1
+        ), "Merge thread count must be a positive value"
+
+        assert (
+            result.compacted_file_target_size_bytes is None
+            or result.compacted_file_target_size_bytes >= 1
+        ), "Compacted file target size must be a positive value"
+
         return result
 
     @property
@@ -286,6 +342,155 @@ class CompactPartitionParams(dict):
     def drop_duplicates(self, value: bool):
         self["drop_duplicates"] = value
 
+    @property
+    def pk_hasher_id(self) -> str:
+        return self["pk_hasher_id"]
+
+    @pk_hasher_id.setter
+    def pk_hasher_id(self, pk_hasher_id: str) -> None:
+        self["pk_hasher_id"] = pk_hasher_id
+
+    @property
+    def hash_bucket_thread_count(self) -> int:
+        return self["hash_bucket_thread_count"]
+
+    @hash_bucket_thread_count.setter
+    def hash_bucket_thread_count(self, count: int) -> None:
+        self["hash_bucket_thread_count"] = count
+
+    @property
+    def streaming_hash_bucket_enabled(self) -> bool:
+        return self["streaming_hash_bucket_enabled"]
+
+    @streaming_hash_bucket_enabled.setter
+    def streaming_hash_bucket_enabled(self, value: bool) -> None:
+        self["streaming_hash_bucket_enabled"] = value
+
+    @property
+    def append_only_compaction_enabled(self) -> bool:
+        return self["append_only_compaction_enabled"]
+
+    @append_only_compaction_enabled.setter
+    def append_only_compaction_enabled(self, value: bool) -> None:
+        self["append_only_compaction_enabled"] = value
+
+    @property
+    def sort_merge_enabled(self) -> bool:
+        return self["sort_merge_enabled"]
+
+    @sort_merge_enabled.setter
+    def sort_merge_enabled(self, value: bool) -> None:
+        self["sort_merge_enabled"] = value
+
+    @property
+    def pk_bloom_filter_enabled(self) -> bool:
+        return self["pk_bloom_filter_enabled"]
+
+    @pk_bloom_filter_enabled.setter
+    def pk_bloom_filter_enabled(self, value: bool) -> None:
+        self["pk_bloom_filter_enabled"] = value
+
+    @property
+    def two_phase_merge_enabled(self) -> bool:
+        return self["two_phase_merge_enabled"]
+
+    @two_phase_merge_enabled.setter
+    def two_phase_merge_enabled(self, value: bool) -> None:
+        self["two_phase_merge_enabled"] = value
+
+    @property
+    def merge_prefetch_memory_budget_bytes(self) -> Optional[int]:
+        return self.get("merge_prefetch_memory_budget_bytes")
+
+    @merge_prefetch_memory_budget_bytes.setter
+    def merge_prefetch_memory_budget_bytes(self, budget_bytes: Optional[int]) -> None:
+        self["merge_prefetch_memory_budget_bytes"] = budget_bytes
+
+    @property
+    def merge_thread_count(self) -> int:
+        return self["merge_thread_count"]
+
+    @merge_thread_count.setter
+    def merge_thread_count(self, count: int) -> None:
+        self["merge_thread_count"] = count
+
+    @property
+    def merge_spill_enabled(self) -> bool:
+        return self["merge_spill_enabled"]
+
+    @merge_spill_enabled.setter
+    def merge_spill_enabled(self, value: bool) -> None:
+        self["merge_spill_enabled"] = value
+
+    @property
+    def streaming_materialize_enabled(self) -> bool:
+        return self["streaming_materialize_enabled"]
+
+    @streaming_materialize_enabled.setter
+    def streaming_materialize_enabled(self, value: bool) -> None:
+        self["streaming_materialize_enabled"] = value
+
+    @property
+    def compacted_file_target_size_bytes(self) -> Optional[int]:
+        return self.get("compacted_file_target_size_bytes")
+
+    @compacted_file_target_size_bytes.setter
+    def compacted_file_target_size_bytes(self, size_bytes: Optional[int]) -> None:
+        self["compacted_file_target_size_bytes"] = size_bytes
+
+    @property
+    def compacted_file_row_group_target_size_bytes(self) -> int:
+        return self["compacted_file_row_group_target_size_bytes"]
+
+    @compacted_file_row_group_target_size_bytes.setter
+    def compacted_file_row_group_target_size_bytes(self, size_bytes: int) -> None:
+        self["compacted_file_row_group_target_size_bytes"] = size_bytes
+
+    @property
+    def delete_routing_enabled(self) -> bool:
+        return self["delete_routing_enabled"]
+
+    @delete_routing_enabled.setter
+    def delete_routing_enabled(self, value: bool) -> None:
+        self["delete_routing_enabled"] = value
+
+    @property
+    def deletion_vectors_enabled(self) -> bool:
+        return self["deletion_vectors_enabled"]
+
+    @deletion_vectors_enabled.setter
+    def deletion_vectors_enabled(self, value: bool) -> None:
+        self["deletion_vectors_enabled"] = value
+
+    @property
+    def deletion_vector_aware_reads_enabled(self) -> bool:
+        """
+        Whether every reader of the destination partition drops records deleted
+        by the deletion vectors of its manifest entries. Compacted deltas with
+        deletion vectors are only committed if enabled.
+        """
+        return self["deletion_vector_aware_reads_enabled"]
+
+    @deletion_vector_aware_reads_enabled.setter
+    def deletion_vector_aware_reads_enabled(self, value: bool) -> None:
+        self["deletion_vector_aware_reads_enabled"] = value
+
+    @property
+    def compiled_delete_key_sets_enabled(self) -> bool:
+        return self["compiled_delete_key_sets_enabled"]
+
+    @compiled_delete_key_sets_enabled.setter
+    def compiled_delete_key_sets_enabled(self, value: bool) -> None:
+        self["compiled_delete_key_sets_enabled"] = value
+
+    @property
+    def size_aware_hash_groups_enabled(self) -> bool:
+        return self["size_aware_hash_groups_enabled"]
+
+    @size_aware_hash_groups_enabled.setter
+    def size_aware_hash_groups_enabled(self, value: bool) -> None:
+        self["size_aware_hash_groups_enabled"] = value
+
     @property
     def bit_width_of_sort_keys(self) -> int:
         return self["bit_width_of_sort_keys"]
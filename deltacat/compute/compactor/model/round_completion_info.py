@@ -4,7 +4,7 @@ from __future__ import annotations
 from typing import Tuple
 from deltacat.storage import DeltaLocator, PartitionLocator
 from deltacat.compute.compactor.model.pyarrow_write_result import PyArrowWriteResult
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 
 class HighWatermark(dict):
@@ -46,6 +46,12 @@ class RoundCompletionInfo(dict):
         compactor_version: Optional[str] = None,
         input_inflation: Optional[float] = None,
         input_average_record_size_bytes: Optional[float] = None,
+        pk_hasher_id: Optional[str] = None,
+        pk_hasher_version: Optional[int] = None,
+        hb_index_to_hash_group_index: Optional[List[int]] = None,
+        hb_index_to_input_size_bytes: Optional[List[int]] = None,
+        hb_index_to_input_num_rows: Optional[List[int]] = None,
+        deletion_vectors_present: Optional[bool] = None,
     ) -> RoundCompletionInfo:
 
         rci = RoundCompletionInfo()
@@ -63,6 +69,12 @@ class RoundCompletionInfo(dict):
         rci["compactorVersion"] = compactor_version
         rci["inputInflation"] = input_inflation
         rci["inputAverageRecordSizeBytes"] = input_average_record_size_bytes
+        rci["pkHasherId"] = pk_hasher_id
+        rci["pkHasherVersion"] = pk_hasher_version
+        rci["hbIndexToHashGroupIndex"] = hb_index_to_hash_group_index
+        rci["hbIndexToInputSizeBytes"] = hb_index_to_input_size_bytes
+        rci["hbIndexToInputNumRows"] = hb_index_to_input_num_rows
+        rci["deletionVectorsPresent"] = deletion_vectors_present
         return rci
 
     @property
@@ -128,3 +140,48 @@ class RoundCompletionInfo(dict):
     @property
     def input_average_record_size_bytes(self) -> Optional[float]:
         return self.get("inputAverageRecordSizeBytes")
+
+    @property
+    def pk_hasher_id(self) -> Optional[str]:
+        """
+        The id of the hash function used to digest primary keys into hash
+        buckets. Not set by rounds that predate pluggable primary key hashers.
+        """
+        return self.get("pkHasherId")
+
+    @property
+    def pk_hasher_version(self) -> Optional[int]:
+        return self.get("pkHasherVersion")
+
+    @property
+    def hb_index_to_hash_group_index(self) -> Optional[List[int]]:
+        """
+        The hash group of every hash bucket, if hash buckets were assigned to
+        hash groups by size instead of round-robin.
+        """
+        return self.get("hbIndexToHashGroupIndex")
+
+    @property
+    def hb_index_to_input_size_bytes(self) -> Optional[List[int]]:
+        """
+        The in-memory size in bytes of the incremental records of every hash
+        bucket, as measured by the hash bucket step.
+        """
+        return self.get("hbIndexToInputSizeBytes")
+
+    @property
+    def hb_index_to_input_num_rows(self) -> Optional[List[int]]:
+        """
+        The number of incremental records of every hash bucket, as measured by
+        the hash bucket step.
+        """
+        return self.get("hbIndexToInputNumRows")
+
+    @property
+    def deletion_vectors_present(self) -> bool:
+        """
+        Whether any file of the compacted delta has a deletion vector. Records
+        deleted by deletion vectors must be dropped by readers of the compacted
+        delta, so only compactor v2 may compact the partition again.
+        """
+        return bool(self.get("deletionVectorsPresent"))
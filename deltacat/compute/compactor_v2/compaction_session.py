@@ -8,11 +8,17 @@ import time
 import json
 
 from deltacat.compute.compactor_v2.model.merge_file_group import (
+    PreBucketedMergeFileGroupsProvider,
     RemoteMergeFileGroupsProvider,
 )
 from deltacat.compute.compactor_v2.model.hash_bucket_input import HashBucketInput
 
 from deltacat.compute.compactor_v2.model.merge_input import MergeInput
+from deltacat.compute.compactor_v2.model.deletion_vector import (
+    get_deleted_record_count,
+    has_deletion_vectors,
+)
+from deltacat.compute.compactor_v2.model.coalesce_input import CoalesceInput
 
 from deltacat.aws import s3u as s3_utils
 import deltacat
@@ -26,6 +32,8 @@ from deltacat.compute.compactor_v2.model.merge_result import MergeResult
 from deltacat.compute.compactor_v2.model.hash_bucket_result import HashBucketResult
 from deltacat.compute.compactor.model.materialize_result import MaterializeResult
 from deltacat.compute.compactor_v2.utils.merge import (
+    assign_coalesced_files_to_hash_buckets,
+    estimate_compacted_file_inflation,
     generate_local_merge_input,
 )
 from deltacat.compute.compactor import DeltaAnnotated
@@ -36,7 +44,10 @@ from deltacat.compute.compactor_v2.deletes.delete_strategy import (
 from deltacat.compute.compactor_v2.deletes.delete_file_envelope import (
     DeleteFileEnvelope,
 )
-from deltacat.compute.compactor_v2.deletes.utils import prepare_deletes
+from deltacat.compute.compactor_v2.deletes.utils import (
+    prepare_deletes,
+    route_delete_file_envelopes,
+)
 
 from deltacat.storage import (
     Delta,
@@ -53,7 +64,20 @@ from deltacat.utils.ray_utils.concurrency import (
 )
 from deltacat.compute.compactor_v2.steps import merge as mg
 from deltacat.compute.compactor_v2.steps import hash_bucket as hb
+from deltacat.compute.compactor_v2.steps import coalesce as cl
 from deltacat.compute.compactor_v2.utils import io
+from deltacat.compute.compactor_v2.utils.hash_group import (
+    assign_hash_buckets_to_hash_groups,
+    estimate_hash_bucket_sizes,
+)
+from deltacat.compute.compactor_v2.utils.pk_hasher import Sha1PkHasher, get_pk_hasher
+from deltacat.compute.compactor_v2.utils.pre_bucketed import (
+    group_pre_bucketed_entries_by_hash_group,
+    is_pre_bucketed,
+)
+from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    hash_bucket_index_to_hash_group_index,
+)
 from deltacat.compute.compactor.utils import round_completion_file as rcf
 from deltacat.utils.metrics import metrics
 
@@ -66,6 +90,7 @@ from deltacat.utils.resources import (
     get_current_process_peak_memory_usage_in_bytes,
 )
 from deltacat.compute.compactor_v2.utils.task_options import (
+    coalesce_resource_options_provider,
     hash_bucket_resource_options_provider,
     merge_resource_options_provider,
     local_merge_resource_options_provider,
@@ -85,6 +110,13 @@ def compact_partition(params: CompactPartitionParams, **kwargs) -> Optional[str]
     assert (
         params.hash_bucket_count is not None and params.hash_bucket_count >= 1
     ), "hash_bucket_count is a required arg for compactor v2"
+    assert (
+        not params.deletion_vectors_enabled
+        or params.deletion_vector_aware_reads_enabled
+    ), (
+        "deletion_vectors_enabled requires deletion_vector_aware_reads_enabled, "
+        "since readers of the compacted delta must drop deleted records"
+    )
 
     with memray.Tracker(
         f"compaction_partition.bin"
@@ -125,6 +157,8 @@ def _execute_compaction(
     params: CompactPartitionParams, **kwargs
 ) -> Tuple[Optional[Partition], Optional[RoundCompletionInfo], Optional[str]]:
 
+    pk_hasher = get_pk_hasher(params.pk_hasher_id)
+
     rcf_source_partition_locator = (
         params.rebase_source_partition_locator or params.source_partition_locator
     )
@@ -189,6 +223,19 @@ def _execute_compaction(
                 f"not equal to Hash bucket count in args={params.hash_bucket_count}."
             )
 
+            # rounds that predate pluggable pk hashers always used SHA-1
+            rcf_pk_hasher_id = round_completion_info.pk_hasher_id or Sha1PkHasher.ID
+            rcf_pk_hasher_version = round_completion_info.pk_hasher_version or 1
+            assert (rcf_pk_hasher_id, rcf_pk_hasher_version) == (
+                pk_hasher.id,
+                pk_hasher.version,
+            ), (
+                "The primary key hasher has changed. "
+                "Kindly run rebase compaction and trigger incremental again. "
+                f"PK hasher in RCF={rcf_pk_hasher_id} v{rcf_pk_hasher_version} "
+                f"not equal to PK hasher in args={pk_hasher.id} v{pk_hasher.version}."
+            )
+
         logger.info(f"Round completion file: {round_completion_info}")
 
     delta_discovery_start = time.monotonic()
@@ -275,17 +322,72 @@ def _execute_compaction(
     total_input_records_count = np.int64(0)
     total_hb_record_count = np.int64(0)
     telemetry_time_hb = 0
-    if params.hash_bucket_count == 1:
-        logger.info("Hash bucket count set to 1. Running local merge")
+    append_only = _can_run_append_only_compaction(
+        params, round_completion_info, delete_strategy, compacted_partition
+    )
+    compacted_file_inflation = estimate_compacted_file_inflation(
+        round_completion_info, params.previous_inflation
+    )
+    deletion_vectors_present = has_deletion_vectors(previous_compacted_delta_manifest)
+    hb_index_to_hash_group_index: Optional[List[int]] = None
+    hb_index_to_input_size_bytes: Optional[np.ndarray] = None
+    hb_index_to_input_num_rows: Optional[np.ndarray] = None
+    if append_only:
+        logger.info("Running append-only compaction. Skipping hash bucket and merge")
         merge_start = time.monotonic()
-        local_merge_input = generate_local_merge_input(
-            params,
-            uniform_deltas,
-            compacted_partition,
-            round_completion_info,
-            delete_strategy,
-            delete_file_envelopes,
+
+        def coalesce_input_provider(index, item):
+            return {
+                "input": CoalesceInput.of(
+                    item,
+                    write_to_partition=compacted_partition,
+                    compacted_file_content_type=params.compacted_file_content_type,
+                    coalesce_task_index=index,
+                    max_records_per_output_file=params.records_per_compacted_file,
+                    enable_profiler=params.enable_profiler,
+                    metrics_config=params.metrics_config,
+                    s3_table_writer_kwargs=params.s3_table_writer_kwargs,
+                    read_kwargs_provider=params.read_kwargs_provider,
+                    deltacat_storage=params.deltacat_storage,
+                    deltacat_storage_kwargs=params.deltacat_storage_kwargs,
+                    memory_logs_enabled=params.memory_logs_enabled,
+                    compacted_file_target_size_bytes=params.compacted_file_target_size_bytes,
+                    compacted_file_row_group_target_size_bytes=params.compacted_file_row_group_target_size_bytes,
+                    compacted_file_inflation=compacted_file_inflation,
+                )
+            }
+
+        coalesce_options_provider = functools.partial(
+            task_resource_options_provider,
+            pg_config=params.pg_config,
+            resource_amount_provider=coalesce_resource_options_provider,
+            previous_inflation=params.previous_inflation,
+            average_record_size_bytes=params.average_record_size_bytes,
+            total_memory_buffer_percentage=params.total_memory_buffer_percentage,
+            records_per_compacted_file=params.records_per_compacted_file,
+            ray_custom_resources=params.ray_custom_resources,
+            memory_logs_enabled=params.memory_logs_enabled,
+        )
+
+        coalesce_tasks_pending = invoke_parallel(
+            items=io.group_uniform_deltas_by_size(
+                uniform_deltas,
+                params.min_delta_bytes_in_batch,
+                params.previous_inflation,
+            ),
+            ray_task=cl.coalesce,
+            max_parallelism=task_max_parallelism,
+            options_provider=coalesce_options_provider,
+            kwargs_provider=coalesce_input_provider,
         )
+        merge_invoke_end = time.monotonic()
+        logger.info(f"Getting {len(coalesce_tasks_pending)} coalesce results...")
+        merge_results: List[MergeResult] = ray.get(coalesce_tasks_pending)
+        for coalesce_result in merge_results:
+            total_input_records_count += coalesce_result.input_record_count
+    elif params.hash_bucket_count == 1:
+        logger.info("Hash bucket count set to 1. Running local merge")
+        merge_start = time.monotonic()
         estimated_da_bytes = (
             compaction_audit.estimated_in_memory_size_bytes_during_discovery
         )
@@ -306,6 +408,16 @@ def _execute_compaction(
             primary_keys=params.primary_keys,
             memory_logs_enabled=params.memory_logs_enabled,
         )
+        local_merge_input = generate_local_merge_input(
+            params,
+            uniform_deltas,
+            compacted_partition,
+            round_completion_info,
+            delete_strategy,
+            delete_file_envelopes,
+            merge_task_memory_bytes=local_merge_options.get("memory"),
+            deletion_vectors_present=deletion_vectors_present,
+        )
         local_merge_result = ray.get(
             mg.merge.options(**local_merge_options).remote(local_merge_input)
         )
@@ -313,103 +425,197 @@ def _execute_compaction(
         merge_results = [local_merge_result]
         merge_invoke_end = time.monotonic()
     else:
-        hb_start = time.monotonic()
+        if params.size_aware_hash_groups_enabled:
+            # pack hash buckets into hash groups by their expected size so that
+            # no single merge task holds most of the data of a skewed partition
+            hb_index_to_hash_group_index = assign_hash_buckets_to_hash_groups(
+                *estimate_hash_bucket_sizes(
+                    params.hash_bucket_count,
+                    round_completion_info,
+                    previous_compacted_delta_manifest,
+                    params.previous_inflation,
+                ),
+                params.hash_group_count,
+                round_completion_info.hb_index_to_hash_group_index
+                if round_completion_info
+                else None,
+            )
 
-        def hash_bucket_input_provider(index, item):
-            return {
-                "input": HashBucketInput.of(
-                    item,
-                    primary_keys=params.primary_keys,
-                    hb_task_index=index,
-                    num_hash_buckets=params.hash_bucket_count,
+        if is_pre_bucketed(
+            input_deltas, params.primary_keys, params.hash_bucket_count, pk_hasher
+        ):
+            logger.info(
+                "All input deltas are pre-bucketed. Skipping the hash bucket step."
+            )
+            (
+                all_hash_group_idx_to_entries,
+                all_hash_group_idx_to_size_bytes,
+                all_hash_group_idx_to_num_rows,
+            ) = group_pre_bucketed_entries_by_hash_group(
+                input_deltas,
+                params.hash_group_count,
+                params.previous_inflation,
+                hb_index_to_hash_group_index,
+            )
+            total_input_records_count += sum(all_hash_group_idx_to_num_rows.values())
+            merge_items = all_hash_group_idx_to_entries.items()
+
+            def merge_file_groups_provider(item):
+                return PreBucketedMergeFileGroupsProvider(
+                    hash_group_index=item[0],
+                    pre_bucketed_entries=item[1],
+                    hash_bucket_count=params.hash_bucket_count,
                     num_hash_groups=params.hash_group_count,
-                    enable_profiler=params.enable_profiler,
-                    metrics_config=params.metrics_config,
                     read_kwargs_provider=params.read_kwargs_provider,
-                    object_store=params.object_store,
                     deltacat_storage=params.deltacat_storage,
                     deltacat_storage_kwargs=params.deltacat_storage_kwargs,
-                    memory_logs_enabled=params.memory_logs_enabled,
+                    hb_index_to_hash_group_index=hb_index_to_hash_group_index,
                 )
-            }
 
-        all_hash_group_idx_to_obj_id = defaultdict(list)
-        all_hash_group_idx_to_size_bytes = defaultdict(int)
-        all_hash_group_idx_to_num_rows = defaultdict(int)
-        hb_tasks_pending = invoke_parallel(
-            items=uniform_deltas,
-            ray_task=hb.hash_bucket,
-            max_parallelism=task_max_parallelism,
-            options_provider=hb_options_provider,
-            kwargs_provider=hash_bucket_input_provider,
-        )
+        else:
+            hb_start = time.monotonic()
+
+            def hash_bucket_input_provider(index, item):
+                return {
+                    "input": HashBucketInput.of(
+                        item,
+                        primary_keys=params.primary_keys,
+                        hb_task_index=index,
+                        num_hash_buckets=params.hash_bucket_count,
+                        num_hash_groups=params.hash_group_count,
+                        enable_profiler=params.enable_profiler,
+                        metrics_config=params.metrics_config,
+                        read_kwargs_provider=params.read_kwargs_provider,
+                        object_store=params.object_store,
+                        deltacat_storage=params.deltacat_storage,
+                        deltacat_storage_kwargs=params.deltacat_storage_kwargs,
+                        memory_logs_enabled=params.memory_logs_enabled,
+                        pk_hasher_id=pk_hasher.id,
+                        hash_bucket_thread_count=params.hash_bucket_thread_count,
+                        streaming_hash_bucket_enabled=params.streaming_hash_bucket_enabled,
+                        hb_index_to_hash_group_index=hb_index_to_hash_group_index,
+                    )
+                }
+
+            all_hash_group_idx_to_obj_id = defaultdict(list)
+            all_hash_group_idx_to_size_bytes = defaultdict(int)
+            all_hash_group_idx_to_num_rows = defaultdict(int)
+            hb_tasks_pending = invoke_parallel(
+                items=uniform_deltas,
+                ray_task=hb.hash_bucket,
+                max_parallelism=task_max_parallelism,
+                options_provider=hb_options_provider,
+                kwargs_provider=hash_bucket_input_provider,
+            )
 
-        hb_invoke_end = time.monotonic()
+            hb_invoke_end = time.monotonic()
 
-        logger.info(f"Getting {len(hb_tasks_pending)} hash bucket results...")
-        hb_results: List[HashBucketResult] = ray.get(hb_tasks_pending)
-        logger.info(f"Got {len(hb_results)} hash bucket results.")
-        hb_end = time.monotonic()
+            logger.info(f"Getting {len(hb_tasks_pending)} hash bucket results...")
+            hb_results: List[HashBucketResult] = ray.get(hb_tasks_pending)
+            logger.info(f"Got {len(hb_results)} hash bucket results.")
+            hb_end = time.monotonic()
 
-        # we use time.time() here because time.monotonic() has no reference point
-        # whereas time.time() measures epoch seconds. Hence, it will be reasonable
-        # to compare time.time()s captured in different nodes.
-        hb_results_retrieved_at = time.time()
+            # we use time.time() here because time.monotonic() has no reference point
+            # whereas time.time() measures epoch seconds. Hence, it will be reasonable
+            # to compare time.time()s captured in different nodes.
+            hb_results_retrieved_at = time.time()
 
-        telemetry_time_hb = compaction_audit.save_step_stats(
-            CompactionSessionAuditInfo.HASH_BUCKET_STEP_NAME,
-            hb_results,
-            hb_results_retrieved_at,
-            hb_invoke_end - hb_start,
-            hb_end - hb_start,
-        )
+            telemetry_time_hb = compaction_audit.save_step_stats(
+                CompactionSessionAuditInfo.HASH_BUCKET_STEP_NAME,
+                hb_results,
+                hb_results_retrieved_at,
+                hb_invoke_end - hb_start,
+                hb_end - hb_start,
+            )
 
-        s3_utils.upload(
-            compaction_audit.audit_url,
-            str(json.dumps(compaction_audit)),
-            **params.s3_client_kwargs,
-        )
+            s3_utils.upload(
+                compaction_audit.audit_url,
+                str(json.dumps(compaction_audit)),
+                **params.s3_client_kwargs,
+            )
 
-        hb_data_processed_size_bytes = np.int64(0)
+            hb_data_processed_size_bytes = np.int64(0)
 
-        # initialize all hash groups
-        for hb_group in range(params.hash_group_count):
-            all_hash_group_idx_to_num_rows[hb_group] = 0
-            all_hash_group_idx_to_obj_id[hb_group] = []
-            all_hash_group_idx_to_size_bytes[hb_group] = 0
+            # initialize all hash groups
+            for hb_group in range(params.hash_group_count):
+                all_hash_group_idx_to_num_rows[hb_group] = 0
+                all_hash_group_idx_to_obj_id[hb_group] = []
+                all_hash_group_idx_to_size_bytes[hb_group] = 0
 
-        for hb_result in hb_results:
-            hb_data_processed_size_bytes += hb_result.hb_size_bytes
-            total_input_records_count += hb_result.hb_record_count
+            if params.size_aware_hash_groups_enabled:
+                hb_index_to_input_size_bytes = np.zeros(
+                    [params.hash_bucket_count], dtype="int64"
+                )
+                hb_index_to_input_num_rows = np.zeros(
+                    [params.hash_bucket_count], dtype="int64"
+                )
 
-            for hash_group_index, object_id_size_tuple in enumerate(
-                hb_result.hash_bucket_group_to_obj_id_tuple
-            ):
-                if object_id_size_tuple:
-                    all_hash_group_idx_to_obj_id[hash_group_index].append(
-                        object_id_size_tuple[0],
-                    )
-                    all_hash_group_idx_to_size_bytes[
-                        hash_group_index
-                    ] += object_id_size_tuple[1].item()
-                    all_hash_group_idx_to_num_rows[
-                        hash_group_index
-                    ] += object_id_size_tuple[2].item()
+            for hb_result in hb_results:
+                hb_data_processed_size_bytes += hb_result.hb_size_bytes
+                total_input_records_count += hb_result.hb_record_count
+                if (
+                    hb_index_to_input_size_bytes is not None
+                    and hb_result.hash_bucket_size_bytes is not None
+                ):
+                    hb_index_to_input_size_bytes += hb_result.hash_bucket_size_bytes
+                    hb_index_to_input_num_rows += hb_result.hash_bucket_num_rows
+
+                for hash_group_index, object_id_size_tuple in enumerate(
+                    hb_result.hash_bucket_group_to_obj_id_tuple
+                ):
+                    if object_id_size_tuple:
+                        all_hash_group_idx_to_obj_id[hash_group_index].append(
+                            object_id_size_tuple[0],
+                        )
+                        all_hash_group_idx_to_size_bytes[
+                            hash_group_index
+                        ] += object_id_size_tuple[1].item()
+                        all_hash_group_idx_to_num_rows[
+                            hash_group_index
+                        ] += object_id_size_tuple[2].item()
 
-        logger.info(
-            f"Got {total_input_records_count} hash bucket records from hash bucketing step..."
-        )
+            logger.info(
+                f"Got {total_input_records_count} hash bucket records from hash bucketing step..."
+            )
 
-        total_hb_record_count = total_input_records_count
-        compaction_audit.set_hash_bucket_processed_size_bytes(
-            hb_data_processed_size_bytes.item()
-        )
+            total_hb_record_count = total_input_records_count
+            compaction_audit.set_hash_bucket_processed_size_bytes(
+                hb_data_processed_size_bytes.item()
+            )
+
+            merge_items = all_hash_group_idx_to_obj_id.items()
+
+            def merge_file_groups_provider(item):
+                return RemoteMergeFileGroupsProvider(
+                    hash_group_index=item[0],
+                    dfe_groups_refs=item[1],
+                    hash_bucket_count=params.hash_bucket_count,
+                    num_hash_groups=params.hash_group_count,
+                    object_store=params.object_store,
+                    hb_index_to_hash_group_index=hb_index_to_hash_group_index,
+                )
+
+        hash_group_idx_to_delete_file_envelopes = None
+        if params.delete_routing_enabled and delete_file_envelopes:
+            # deletes keyed by primary keys only reach the merge tasks of
+            # their hash buckets instead of being probed against every bucket
+            hash_group_idx_to_delete_file_envelopes = route_delete_file_envelopes(
+                delete_file_envelopes,
+                params.primary_keys,
+                params.hash_bucket_count,
+                functools.partial(
+                    hash_bucket_index_to_hash_group_index,
+                    num_groups=params.hash_group_count,
+                    hb_index_to_hash_group_index=hb_index_to_hash_group_index,
+                ),
+                pk_hasher.id,
+            )
 
         # BSP Step 2: Merge
         # NOTE: DELETE-type deltas are stored in Plasma object store
         # in prepare_deletes and therefore don't need to included
         # in merge task resource estimation
-        merge_options_provider = functools.partial(
+        estimate_merge_options = functools.partial(
             task_resource_options_provider,
             pg_config=params.pg_config,
             resource_amount_provider=merge_resource_options_provider,
@@ -424,18 +630,21 @@ def _execute_compaction(
             deltacat_storage_kwargs=params.deltacat_storage_kwargs,
             ray_custom_resources=params.ray_custom_resources,
             memory_logs_enabled=params.memory_logs_enabled,
+            hb_index_to_hash_group_index=hb_index_to_hash_group_index,
         )
+        merge_task_index_to_options = {}
+
+        def merge_options_provider(index, item):
+            # the memory of a merge task is also passed to the task itself, so
+            # its options are estimated once and shared with its input
+            if index not in merge_task_index_to_options:
+                merge_task_index_to_options[index] = estimate_merge_options(index, item)
+            return merge_task_index_to_options[index]
 
         def merge_input_provider(index, item):
             return {
                 "input": MergeInput.of(
-                    merge_file_groups_provider=RemoteMergeFileGroupsProvider(
-                        hash_group_index=item[0],
-                        dfe_groups_refs=item[1],
-                        hash_bucket_count=params.hash_bucket_count,
-                        num_hash_groups=params.hash_group_count,
-                        object_store=params.object_store,
-                    ),
+                    merge_file_groups_provider=merge_file_groups_provider(item),
                     write_to_partition=compacted_partition,
                     compacted_file_content_type=params.compacted_file_content_type,
                     primary_keys=params.primary_keys,
@@ -452,14 +661,35 @@ def _execute_compaction(
                     deltacat_storage=params.deltacat_storage,
                     deltacat_storage_kwargs=params.deltacat_storage_kwargs,
                     delete_strategy=delete_strategy,
-                    delete_file_envelopes=delete_file_envelopes,
+                    delete_file_envelopes=delete_file_envelopes
+                    if hash_group_idx_to_delete_file_envelopes is None
+                    else hash_group_idx_to_delete_file_envelopes.get(item[0]),
                     memory_logs_enabled=params.memory_logs_enabled,
+                    pk_hasher_id=pk_hasher.id,
+                    sort_merge_enabled=params.sort_merge_enabled,
+                    pk_bloom_filter_enabled=params.pk_bloom_filter_enabled,
+                    compaction_artifact_s3_bucket=params.compaction_artifact_s3_bucket,
+                    s3_client_kwargs=params.s3_client_kwargs,
+                    two_phase_merge_enabled=params.two_phase_merge_enabled,
+                    merge_prefetch_memory_budget_bytes=params.merge_prefetch_memory_budget_bytes,
+                    merge_thread_count=params.merge_thread_count,
+                    merge_task_memory_bytes=merge_options_provider(index, item).get(
+                        "memory"
+                    )
+                    if params.merge_thread_count > 1 or params.merge_spill_enabled
+                    else None,
+                    merge_spill_enabled=params.merge_spill_enabled,
+                    streaming_materialize_enabled=params.streaming_materialize_enabled,
+                    compacted_file_target_size_bytes=params.compacted_file_target_size_bytes,
+                    compacted_file_row_group_target_size_bytes=params.compacted_file_row_group_target_size_bytes,
+                    compacted_file_inflation=compacted_file_inflation,
+                    deletion_vectors_present=deletion_vectors_present,
                 )
             }
 
         merge_start = time.monotonic()
         merge_tasks_pending = invoke_parallel(
-            items=all_hash_group_idx_to_obj_id.items(),
+            items=merge_items,
             ray_task=mg.merge,
             max_parallelism=task_max_parallelism,
             options_provider=merge_options_provider,
@@ -498,6 +728,15 @@ def _execute_compaction(
     for merge_result in merge_results:
         mat_results.extend(merge_result.materialize_results)
 
+    if append_only:
+        mat_results = assign_coalesced_files_to_hash_buckets(
+            mat_results,
+            params.hash_bucket_count,
+            compacted_partition,
+            round_completion_info,
+            previous_compacted_delta_manifest,
+        )
+
     mat_results: List[MaterializeResult] = sorted(
         mat_results, key=lambda m: m.task_index
     )
@@ -536,6 +775,10 @@ def _execute_compaction(
         deltas,
         stream_position=params.last_stream_position_to_compact,
     )
+    # records deleted by deletion vectors are not records of the compacted delta
+    merged_delta.meta["record_count"] -= get_deleted_record_count(
+        merged_delta.manifest.entries
+    )
 
     record_info_msg = (
         f"Hash bucket records: {total_hb_record_count},"
@@ -545,6 +788,16 @@ def _execute_compaction(
     )
     logger.info(record_info_msg)
 
+    if (
+        has_deletion_vectors(merged_delta.manifest)
+        and not params.deletion_vector_aware_reads_enabled
+    ):
+        raise ValueError(
+            "The compacted delta has deletion vectors, but readers of the "
+            "destination partition are not deletion vector aware. Kindly enable "
+            "deletion_vector_aware_reads_enabled or run rebase compaction instead."
+        )
+
     compacted_delta = params.deltacat_storage.commit_delta(
         merged_delta,
         properties=kwargs.get("properties", {}),
@@ -634,6 +887,16 @@ def _execute_compaction(
         compactor_version=CompactorVersion.V2.value,
         input_inflation=input_inflation,
         input_average_record_size_bytes=input_average_record_size_bytes,
+        pk_hasher_id=pk_hasher.id,
+        pk_hasher_version=pk_hasher.version,
+        hb_index_to_hash_group_index=hb_index_to_hash_group_index,
+        hb_index_to_input_size_bytes=hb_index_to_input_size_bytes.tolist()
+        if hb_index_to_input_size_bytes is not None
+        else None,
+        hb_index_to_input_num_rows=hb_index_to_input_num_rows.tolist()
+        if hb_index_to_input_num_rows is not None
+        else None,
+        deletion_vectors_present=has_deletion_vectors(merged_delta.manifest),
     )
 
     logger.info(
@@ -658,3 +921,38 @@ def _execute_compaction(
         new_round_completion_info,
         rcf_source_partition_locator,
     )
+
+
+def _can_run_append_only_compaction(
+    params: CompactPartitionParams,
+    round_completion_info: Optional[RoundCompletionInfo],
+    delete_strategy: Optional[DeleteStrategy],
+    compacted_partition: Partition,
+) -> bool:
+    if not params.append_only_compaction_enabled:
+        return False
+
+    if params.primary_keys:
+        logger.info("Primary keys are specified. Append-only compaction is skipped.")
+        return False
+
+    if params.sort_keys:
+        logger.info("Sort keys are specified. Append-only compaction is skipped.")
+        return False
+
+    if delete_strategy is not None:
+        logger.info("Input deltas contain deletes. Append-only compaction is skipped.")
+        return False
+
+    if (
+        round_completion_info
+        and round_completion_info.compacted_delta_locator.stream_id
+        != compacted_partition.stream_id
+    ):
+        logger.info(
+            "Previous compacted delta belongs to a different stream and cannot be "
+            "copied by reference. Append-only compaction is skipped."
+        )
+        return False
+
+    return True
@@ -1,9 +1,20 @@
-TOTAL_BYTES_IN_SHA1_HASH = 20
-
 PK_DELIMITER = "L6kl7u5f"
 
+# The id of the default hash function used to digest primary keys.
+# Changing the hash function of a table requires a rebase compaction.
+PK_HASHER_ID = "sha1"
+
 MAX_RECORDS_PER_COMPACTED_FILE = 4_000_000
 
+# The number of bloom filter bits per primary key of a compacted file.
+# 10 bits per key gives a false positive rate of about 1%.
+PK_BLOOM_FILTER_BITS_PER_KEY = 10
+
+# The maximum size in bytes of the encoded positions of a deletion vector
+# embedded in the manifest entry meta. Larger deletion vectors are written
+# to files in the compaction artifact bucket.
+DELETION_VECTOR_MAX_INLINE_BYTES = 1024
+
 # The maximum amount of delta bytes allowed in a batch.
 # A single task will not process more than these many bytes
 # unless a single manifest entry (non-parquet) or single row
@@ -18,21 +29,41 @@ MIN_FILES_IN_BATCH = float("inf")
 # The average record size in a table.
 AVERAGE_RECORD_SIZE_BYTES = 1000
 
+# The number of threads used to hash and group records by hash bucket
+# within a single hash bucket task. Useful when hash bucket tasks
+# are allocated more than one CPU.
+HASH_BUCKET_THREAD_COUNT = 1
+
+# The number of threads used to download the compacted tables of upcoming
+# hash buckets while a merge task merges the current hash bucket. Only used
+# when a merge prefetch memory budget is set.
+MERGE_PREFETCH_THREAD_COUNT = 2
+
+# The number of threads used to merge hash buckets concurrently within a
+# single merge task. Hash buckets are only merged concurrently while their
+# estimated memory footprint fits in the memory requested for the task.
+MERGE_THREAD_COUNT = 1
+
+# The target size of each Parquet row group of a compacted file, used when
+# compacted files are sized by a target file size in bytes.
+COMPACTED_FILE_ROW_GROUP_TARGET_SIZE_BYTES = 128 * 1024 * 1024
+
 # Maximum parallelism for the tasks at each BSP step.
 # Default is the number of vCPUs in about 128
 # r5.8xlarge EC2 instances.
 TASK_MAX_PARALLELISM = 4096
 
+# The previous round's assignment of hash buckets to hash groups by size is
+# kept as long as its largest hash group is at most this fraction heavier
+# than that of a new assignment, so that hash groups stay stable across
+# rounds whose hash bucket sizes barely change.
+HASH_GROUP_REASSIGNMENT_THRESHOLD = 0.1
+
 # The percentage of memory that needs to be allocated
 # as buffer. This value will ensure the job doesn't run out
 # of memory by considering buffer for uncertainities.
 TOTAL_MEMORY_BUFFER_PERCENTAGE = 30
 
-# The total size of records that will be hash bucketed at once
-# Since, sorting is nlogn, we ensure that is not performed
-# on a very large dataset for best performance.
-MAX_SIZE_OF_RECORD_BATCH_IN_GIB = 2 * 1024 * 1024 * 1024
-
 # Whether to drop duplicates during merge.
 DROP_DUPLICATES = True
 
@@ -60,6 +91,15 @@ MERGE_SUCCESS_COUNT = "merge_success_count"
 # Merge failure count
 MERGE_FAILURE_COUNT = "merge_failure_count"
 
+# Time taken for a coalesce task
+COALESCE_TIME_IN_SECONDS = "coalesce_time"
+
+# Coalesce success count
+COALESCE_SUCCESS_COUNT = "coalesce_success_count"
+
+# Coalesce failure count
+COALESCE_FAILURE_COUNT = "coalesce_failure_count"
+
 # Metric prefix for discover deltas
 DISCOVER_DELTAS_METRIC_PREFIX = "discover_deltas"
 
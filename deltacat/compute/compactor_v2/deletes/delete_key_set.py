@@ -0,0 +1,272 @@
+# Allow classes to use self-referencing Type hints in Python 3.7.
+from __future__ import annotations
+
+import base64
+import json
+import logging
+from typing import List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from deltacat import logs
+from deltacat.compute.compactor.utils import system_columns as sc
+from deltacat.compute.compactor_v2.constants import PK_HASHER_ID
+from deltacat.compute.compactor_v2.utils.pk_hasher import (
+    get_pk_hasher,
+    is_fixed_width_pk_type,
+)
+from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    generate_pk_hash_column,
+)
+
+logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
+
+
+def _value_codes(column: pa.ChunkedArray, value_set: pa.Array) -> np.ndarray:
+    """
+    Returns the index of each value of the column in the given value set, or -1
+    for values not in the set. Nulls match a null in the value set.
+    """
+    codes = pc.fill_null(pc.index_in(column, value_set=value_set), -1)
+    return codes.to_numpy().astype(np.int64, copy=False)
+
+
+class EqualityDeleteKeySet:
+    """
+    The distinct delete key tuples of a delete table, built once and probed by
+    the records of any number of tables.
+
+    Each delete column value is encoded as its index in the distinct values of
+    that column, and the codes of the columns are folded into a sorted array of
+    distinct composite codes one column at a time. A record matches only when
+    the tuple of its delete column values equals the tuple of a delete record.
+    """
+
+    def __init__(self, delete_table: pa.Table, delete_columns: List[str]):
+        self.delete_columns = list(delete_columns)
+        self._value_sets: List[pa.Array] = []
+        self._composite_codes: List[np.ndarray] = []
+
+        codes = None
+        for column_name in self.delete_columns:
+            value_set = pc.unique(delete_table[column_name])
+            column_codes = _value_codes(delete_table[column_name], value_set)
+            if codes is None:
+                codes = column_codes
+            else:
+                composite_codes, codes = np.unique(
+                    codes * len(value_set) + column_codes, return_inverse=True
+                )
+                self._composite_codes.append(composite_codes)
+            self._value_sets.append(value_set)
+
+        logger.debug(
+            f"Built a key set of {len(self)} distinct delete keys on "
+            f"{self.delete_columns} from {len(delete_table)} delete records"
+        )
+
+    def __len__(self) -> int:
+        if self._composite_codes:
+            return len(self._composite_codes[-1])
+        return len(self._value_sets[0]) if self._value_sets else 0
+
+    def contains(self, table: pa.Table) -> np.ndarray:
+        """
+        Returns whether the delete column values of each record of the table
+        equal those of a delete record.
+        """
+        matches = np.ones(len(table), dtype=bool)
+        codes = None
+        for column_name, value_set, composite_codes in zip(
+            self.delete_columns, self._value_sets, [None] + self._composite_codes
+        ):
+            column_codes = _value_codes(table[column_name], value_set)
+            matches &= column_codes >= 0
+            if composite_codes is None:
+                codes = column_codes
+                continue
+            # codes of records that already failed to match are meaningless
+            # but harmless, as their match is never set again
+            combined = codes * len(value_set) + column_codes
+            codes = np.searchsorted(composite_codes, combined)
+            found = codes < len(composite_codes)
+            found[found] = composite_codes[codes[found]] == combined[found]
+            matches &= found
+        return matches
+
+
+def _cast_or_null(column: pa.ChunkedArray, target_type: pa.DataType) -> pa.ChunkedArray:
+    """
+    Safely casts the column to the target type. Values that cannot be cast
+    without loss (e.g. out of range integers or truncated timestamps) are
+    replaced by nulls, as are all values if the column cannot be cast at all.
+    """
+    try:
+        return pc.cast(column, target_type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        pass
+    try:
+        cast_column = pc.cast(column, target_type, safe=False)
+        round_trip = pc.cast(cast_column, column.type, safe=False)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return pa.chunked_array([pa.nulls(len(column), target_type)])
+    return pc.if_else(
+        pc.equal(round_trip, column), cast_column, pa.scalar(None, target_type)
+    )
+
+
+def _non_null_mask(table: pa.Table) -> np.ndarray:
+    mask = np.ones(len(table), dtype=bool)
+    for column in table.columns:
+        if column.null_count:
+            mask &= pc.is_valid(column).to_numpy()
+    return mask
+
+
+class CompiledDeleteKeySet:
+    """
+    The sorted, distinct primary key hash digests of the delete key tuples of a
+    delete table. Delete keys are digested the same way as primary keys, with
+    their columns in sorted order, so a record matches when the digest of its
+    delete column values is in the key set.
+
+    A compiled key set is stored as a single column table of its digests, with
+    the delete columns, their types and the primary key hasher in the schema
+    metadata. It can be persisted and loaded again without re-reading and
+    re-hashing the delete deltas it was compiled from.
+    """
+
+    KEY_HASH_COLUMN_NAME = "key_hash"
+    _METADATA_KEY = b"deltacat.compiled_delete_key_set"
+
+    def __init__(
+        self,
+        key_hashes: pa.Array,
+        delete_column_schema: pa.Schema,
+        pk_hasher_id: str = PK_HASHER_ID,
+    ):
+        self.key_hashes = key_hashes
+        self.delete_column_schema = delete_column_schema
+        self.pk_hasher_id = pk_hasher_id
+
+    @property
+    def delete_columns(self) -> List[str]:
+        return self.delete_column_schema.names
+
+    @staticmethod
+    def compile(
+        delete_table: pa.Table,
+        delete_columns: List[str],
+        pk_hasher_id: str = PK_HASHER_ID,
+    ) -> Optional[CompiledDeleteKeySet]:
+        """
+        Compiles the delete key set of the given delete table, or returns None
+        if any delete key has a null value, since null delete values match null
+        record values and have no primary key hash digest.
+        """
+        key_table = delete_table.select(sorted(delete_columns))
+        if not _non_null_mask(key_table).all():
+            return None
+        key_hashes = pc.unique(
+            sc.pk_hash_column(
+                generate_pk_hash_column(
+                    [key_table],
+                    key_table.column_names,
+                    requires_hash=True,
+                    pk_hasher_id=pk_hasher_id,
+                )[0]
+            )
+        )
+        key_hashes = key_hashes.take(pc.sort_indices(key_hashes))
+        logger.debug(
+            f"Compiled a key set of {len(key_hashes)} distinct delete keys on "
+            f"{key_table.column_names} from {len(delete_table)} delete records"
+        )
+        return CompiledDeleteKeySet(key_hashes, key_table.schema, pk_hasher_id)
+
+    @staticmethod
+    def is_compiled(table: Optional[pa.Table]) -> bool:
+        return (
+            table is not None
+            and table.schema.metadata is not None
+            and CompiledDeleteKeySet._METADATA_KEY in table.schema.metadata
+        )
+
+    @staticmethod
+    def from_table(table: pa.Table) -> CompiledDeleteKeySet:
+        metadata = json.loads(table.schema.metadata[CompiledDeleteKeySet._METADATA_KEY])
+        return CompiledDeleteKeySet(
+            table[CompiledDeleteKeySet.KEY_HASH_COLUMN_NAME].combine_chunks(),
+            pa.ipc.read_schema(
+                pa.py_buffer(base64.b64decode(metadata["delete_column_schema"]))
+            ),
+            metadata["pk_hasher_id"],
+        )
+
+    def to_table(self) -> pa.Table:
+        metadata = {
+            "delete_column_schema": base64.b64encode(
+                self.delete_column_schema.serialize().to_pybytes()
+            ).decode("ascii"),
+            "pk_hasher_id": self.pk_hasher_id,
+        }
+        return pa.table(
+            {self.KEY_HASH_COLUMN_NAME: self.key_hashes}
+        ).replace_schema_metadata({self._METADATA_KEY: json.dumps(metadata)})
+
+    def __len__(self) -> int:
+        return len(self.key_hashes)
+
+    def contains(self, table: pa.Table) -> np.ndarray:
+        """
+        Returns whether the digest of the delete column values of each record
+        of the table is a delete key. Records with a null delete column value
+        never match.
+        """
+        key_table = table.select(self.delete_columns)
+        if key_table.schema != self.delete_column_schema and not (
+            self._is_canonicalized(key_table.schema)
+        ):
+            # the string representations of values depend on their type, and
+            # values that cannot be cast to the delete column type never match
+            key_table = pa.table(
+                [
+                    column
+                    if column.type == field.type
+                    else _cast_or_null(column, field.type)
+                    for column, field in zip(
+                        key_table.columns, self.delete_column_schema
+                    )
+                ],
+                schema=self.delete_column_schema,
+            )
+        matches = np.zeros(len(key_table), dtype=bool)
+        is_valid = _non_null_mask(key_table)
+        if not len(self) or not is_valid.any():
+            return matches
+        key_table = key_table.filter(pa.array(is_valid))
+        key_hashes = sc.pk_hash_column(
+            generate_pk_hash_column(
+                [key_table],
+                self.delete_columns,
+                requires_hash=True,
+                pk_hasher_id=self.pk_hasher_id,
+            )[0]
+        )
+        matches[is_valid] = pc.is_in(key_hashes, value_set=self.key_hashes).to_numpy()
+        return matches
+
+    def _is_canonicalized(self, schema: pa.Schema) -> bool:
+        """
+        Whether the delete keys of a table with the given schema are digested
+        from the same canonical int64 values as the key set, regardless of
+        their fixed width type.
+        """
+        return (
+            len(schema) == 1
+            and get_pk_hasher(self.pk_hasher_id).hashes_fixed_width_values
+            and is_fixed_width_pk_type(schema.types[0])
+            and is_fixed_width_pk_type(self.delete_column_schema.types[0])
+        )
@@ -0,0 +1,66 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+
+from deltacat import logs
+from deltacat.aws import s3u as s3_utils
+from deltacat.storage import Delta, PartitionLocator
+from deltacat.utils.common import sha1_hexdigest
+from deltacat.utils.metrics import metrics
+
+logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
+
+
+def get_delete_key_set_file_s3_url(
+    bucket: str,
+    source_partition_locator: PartitionLocator,
+    delete_deltas: List[Delta],
+    delete_columns: List[str],
+    pk_hasher_id: str,
+) -> str:
+    """
+    Returns the URL of the compiled delete key set of a sequence of delete
+    deltas, stored next to the round completion file of the source partition.
+    The same delete deltas compiled on the same columns with the same primary
+    key hasher always share a URL.
+    """
+    delete_key_set_id = sha1_hexdigest(
+        "|".join(
+            [delta.locator.canonical_string() for delta in delete_deltas]
+            + sorted(delete_columns)
+            + [pk_hasher_id]
+        ).encode("utf-8")
+    )
+    base_url = source_partition_locator.path(f"s3://{bucket}")
+    return f"{base_url}/delete_key_sets/{delete_key_set_id}.arrow"
+
+
+@metrics
+def read_delete_key_set_file(
+    delete_key_set_file_s3_url: str,
+    **s3_client_kwargs: Optional[Dict[str, Any]],
+) -> Optional[pa.Table]:
+    logger.info(f"reading delete key set file from: {delete_key_set_file_s3_url}")
+    result = s3_utils.download(delete_key_set_file_s3_url, False, **s3_client_kwargs)
+    if not result:
+        return None
+    return pa.ipc.open_file(pa.py_buffer(result["Body"].read())).read_all()
+
+
+@metrics
+def write_delete_key_set_file(
+    delete_key_set_file_s3_url: str,
+    table: pa.Table,
+    **s3_client_kwargs: Optional[Dict[str, Any]],
+) -> str:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    logger.info(f"writing delete key set file to: {delete_key_set_file_s3_url}")
+    s3_utils.upload(
+        delete_key_set_file_s3_url,
+        sink.getvalue().to_pybytes(),
+        **s3_client_kwargs,
+    )
+    return delete_key_set_file_s3_url
@@ -0,0 +1,98 @@
+from typing import List, Optional
+import logging
+import numpy as np
+import pyarrow as pa
+from deltacat import logs
+
+from deltacat.compute.compactor_v2.deletes.delete_file_envelope import (
+    DeleteFileEnvelope,
+)
+from deltacat.compute.compactor_v2.deletes.delete_strategy_equality_delete import (
+    EqualityDeleteStrategy,
+)
+
+
+logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
+
+
+class DeletionVectorDeleteStrategy(EqualityDeleteStrategy):
+    """
+    A strategy for applying equality deletes to previously compacted files without rewriting them. Compacted files
+    of hash buckets with no new upserts only have their delete columns read, and the positions of their records
+    matching a delete are recorded in a deletion vector referenced by the meta of their manifest entries, and
+    written to a file in the compaction artifact bucket if large. The files themselves are copied by reference,
+    and deleted records are dropped whenever the files are read, until they are folded into the next rewrite of
+    the file.
+
+    Only the compactor v2 merge step drops records deleted by deletion vectors. Storage downloads return deleted
+    records as is, so any other reader of the compacted delta must drop them with `apply_deletion_vector`, and
+    compacted deltas with deletion vectors are only committed if `deletion_vector_aware_reads_enabled` is set. The
+    round completion info of the partition records whether its compacted delta has deletion vectors, and compactor
+    v1 refuses to compact such a partition.
+
+    Deletes are otherwise applied the same way as the equality delete strategy, which is used whenever a hash
+    bucket is rewritten anyway.
+
+    Attributes:
+        _name (str): The name of the delete strategy.
+
+    Methods:
+        match_deletes(self, table, delete_file_envelopes, *args, **kwargs) -> np.ndarray:
+            Returns whether each record of the given table matches a delete of any provided delete file envelope.
+    """
+
+    _name = "DeletionVectorDeleteStrategy"
+
+    @staticmethod
+    def delete_columns(delete_file_envelopes: List[DeleteFileEnvelope]) -> List[str]:
+        """
+        The delete columns of all given delete file envelopes, in order of first use.
+        """
+        delete_columns = []
+        for delete_file_envelope in delete_file_envelopes:
+            for delete_column_name in delete_file_envelope.delete_columns:
+                if delete_column_name not in delete_columns:
+                    delete_columns.append(delete_column_name)
+        return delete_columns
+
+    def match_deletes(
+        self,
+        table: Optional[pa.Table],
+        delete_file_envelopes: List[DeleteFileEnvelope],
+        *args,
+        **kwargs,
+    ) -> np.ndarray:
+        """
+        Match the records of the given table against all provided delete file envelopes without dropping them.
+
+        Args:
+            table (Optional[pa.Table]): The pyarrow table holding at least the delete columns of the envelopes.
+            delete_file_envelopes (List[DeleteFileEnvelope]): A list of delete file envelopes containing delete parameters.
+
+        Returns:
+            np.ndarray: Whether each record of the table matches a delete of any delete file envelope.
+        """
+        if not table:
+            return np.zeros(len(table) if table is not None else 0, dtype=bool)
+        is_deleted = np.zeros(len(table), dtype=bool)
+        for delete_file_envelope in delete_file_envelopes:
+            if delete_file_envelope.table_reference is None:
+                continue
+            delete_columns = [
+                delete_column_name
+                for delete_column_name in delete_file_envelope.delete_columns
+                if delete_column_name in table.column_names
+            ]
+            if not delete_columns:
+                continue
+            delete_key_set = self._get_delete_key_set(
+                delete_file_envelope, delete_columns
+            )
+            if delete_key_set is None:
+                continue
+            is_deleted |= delete_key_set.contains(table)
+        logger.debug(
+            f"Matched {np.count_nonzero(is_deleted)} of {len(table)} records against "
+            f"{len(delete_file_envelopes)} delete file envelopes"
+        )
+        return is_deleted
@@ -1,17 +1,20 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 import logging
+import threading
 import pyarrow as pa
 from deltacat import logs
 
-from typing import Callable, Tuple
+from typing import Tuple
+from deltacat.compute.compactor_v2.deletes.delete_key_set import (
+    CompiledDeleteKeySet,
+    EqualityDeleteKeySet,
+)
 from deltacat.compute.compactor_v2.deletes.delete_file_envelope import (
     DeleteFileEnvelope,
 )
 from deltacat.compute.compactor_v2.deletes.delete_strategy import (
     DeleteStrategy,
 )
-import pyarrow.compute as pc
-import numpy as np
 
 
 logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
@@ -21,6 +24,9 @@ class EqualityDeleteStrategy(DeleteStrategy):
     """
     A strategy for applying row-level deletes on tables during compaction based on equality conditions on one or more columns. It
     implements the "equality delete" approach, which marks a row as deleted by one or more column values like pk1=3 or col1="foo", col2="bar".
+    Rows are matched on the tuple of their delete column values, probing a key set of the delete table that is built once per
+    delete file envelope and reused for every table the deletes are applied to. Delete tables compiled into a key set ahead of
+    time are loaded as is.
 
     Attributes:
         _name (str): The name of the delete strategy.
@@ -45,52 +51,80 @@ class EqualityDeleteStrategy(DeleteStrategy):
         """
         return self._name
 
+    def __init__(self):
+        # Delete key sets are built once per delete file envelope and shared by
+        # all hash buckets this strategy applies deletes to.
+        self._delete_key_sets: Dict[
+            Tuple[int, Tuple[str, ...]],
+            Tuple[
+                DeleteFileEnvelope,
+                Optional[Union[EqualityDeleteKeySet, CompiledDeleteKeySet]],
+            ],
+        ] = {}
+        self._delete_key_sets_lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # built delete key sets stay local to the process that built them
+        return {}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__()
+
+    def _get_delete_key_set(
+        self,
+        delete_file_envelope: DeleteFileEnvelope,
+        delete_column_names: List[str],
+    ) -> Optional[Union[EqualityDeleteKeySet, CompiledDeleteKeySet]]:
+        """
+        Returns the delete key set of the given delete file envelope on the given
+        columns, or None if the envelope has no delete records. The key set is
+        built on first use and cached for subsequent tables.
+        """
+        key = (id(delete_file_envelope), tuple(delete_column_names))
+        with self._delete_key_sets_lock:
+            if key not in self._delete_key_sets:
+                delete_table = delete_file_envelope.table
+                if CompiledDeleteKeySet.is_compiled(delete_table):
+                    delete_key_set = CompiledDeleteKeySet.from_table(delete_table)
+                    if sorted(delete_column_names) != delete_key_set.delete_columns:
+                        # compiled keys can only match on all of their columns
+                        logger.warning(
+                            f"Compiled delete key set on {delete_key_set.delete_columns}"
+                            f" cannot match on {delete_column_names}. Skipping dropping rows."
+                        )
+                        delete_key_set = None
+                else:
+                    delete_key_set = (
+                        EqualityDeleteKeySet(delete_table, delete_column_names)
+                        if delete_table
+                        else None
+                    )
+                # the envelope is kept alongside its key set so that its id is
+                # not reused by another envelope while cached
+                self._delete_key_sets[key] = (delete_file_envelope, delete_key_set)
+            return self._delete_key_sets[key][1]
+
     def _drop_rows(
         self,
         table: pa.Table,
-        delete_table: pa.Table,
-        delete_column_names: List[str],
-        equality_predicate_operation: Optional[Callable] = pa.compute.and_,
+        delete_key_set: Union[EqualityDeleteKeySet, CompiledDeleteKeySet],
     ) -> Tuple[pa.Table, int]:
         """
-        Drop rows from the given table based on the provided delete table and column names.
+        Drop rows from the given table whose delete column values match a delete key.
 
         Args:
             table (pa.Table): The input table to drop rows from.
-            delete_table (pa.Table): The table containing the values to match for deletion.
-            delete_column_names (List[str]): A list of column names to check for equality with the delete table.
-            equality_predicate_operation (Optional[Callable], optional): The operation to combine equality predicates for multiple columns.
-                Defaults to pa.compute.and_.
+            delete_key_set (Union[EqualityDeleteKeySet, CompiledDeleteKeySet]): The delete keys to match the table rows against.
 
         Returns:
             Tuple[pa.Table, int]: A tuple containing the updated table after dropping rows,
                 and the number of rows dropped.
         """
-        if len(delete_column_names) < 1:
-            return table, 0
-        # all 1s -> all True so wont discard any from the curr_boolean_mask
-        prev_boolean_mask = pa.array(np.ones(len(table), dtype=bool))
-        # all 0s -> all False so if mask is never modified all rows will be kept
-        curr_boolean_mask = pa.array(np.zeros(len(table), dtype=bool))
-        for delete_column_name in delete_column_names:
-            if delete_column_name not in table.column_names:
-                logger.warning(
-                    f"Column name {delete_column_name} not in table column names. Skipping dropping rows for this column."
-                )
-                continue
-            curr_boolean_mask = pc.is_in(
-                table[delete_column_name],
-                value_set=delete_table[delete_column_name],
-            )
-            curr_boolean_mask = equality_predicate_operation(
-                prev_boolean_mask, curr_boolean_mask
-            )
-            prev_boolean_mask = curr_boolean_mask
         number_of_rows_before_dropping = len(table)
         logger.debug(
             f"Number of table rows before dropping: {number_of_rows_before_dropping}."
         )
-        table = table.filter(pc.invert(curr_boolean_mask))
+        table = table.filter(pa.array(~delete_key_set.contains(table)))
         number_of_rows_after_dropping = len(table)
         logger.debug(
             f"Number of table rows after dropping: {number_of_rows_after_dropping}."
@@ -116,16 +150,26 @@ class EqualityDeleteStrategy(DeleteStrategy):
             Tuple[pa.Table, int]: A tuple containing the updated Arrow table after applying deletes,
                 and the number of rows deleted.
         """
-        if not table or not delete_file_envelope.table:
+        if not table:
+            logger.debug(f"No table passed. DeleteFileEnvelope: {delete_file_envelope}")
+            return table, 0
+        delete_columns = []
+        for delete_column_name in delete_file_envelope.delete_columns:
+            if delete_column_name not in table.column_names:
+                logger.warning(
+                    f"Column name {delete_column_name} not in table column names. Skipping dropping rows for this column."
+                )
+                continue
+            delete_columns.append(delete_column_name)
+        if not delete_columns:
+            return table, 0
+        delete_key_set = self._get_delete_key_set(delete_file_envelope, delete_columns)
+        if delete_key_set is None:
             logger.debug(
-                f"No table passed or no delete file envelope delete table found. DeleteFileEnvelope: {delete_file_envelope}"
+                f"No delete file envelope delete table found. DeleteFileEnvelope: {delete_file_envelope}"
             )
             return table, 0
-        delete_columns = delete_file_envelope.delete_columns
-        delete_table = delete_file_envelope.table
-        table, number_of_rows_dropped = self._drop_rows(
-            table, delete_table, delete_columns
-        )
+        table, number_of_rows_dropped = self._drop_rows(table, delete_key_set)
         return table, number_of_rows_dropped
 
     def apply_many_deletes(
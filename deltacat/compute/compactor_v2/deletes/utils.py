@@ -10,21 +10,40 @@ from deltacat.storage import (
 from collections import defaultdict
 import logging
 
-from typing import Optional, List, Dict, Tuple
+from typing import Callable, Optional, List, Dict, Tuple
 from deltacat.types.media import StorageType
 from deltacat.compute.compactor.model.compact_partition_params import (
     CompactPartitionParams,
 )
+from deltacat.compute.compactor_v2.deletes.delete_key_set import (
+    CompiledDeleteKeySet,
+)
+from deltacat.compute.compactor_v2.deletes.delete_key_set_file import (
+    get_delete_key_set_file_s3_url,
+    read_delete_key_set_file,
+    write_delete_key_set_file,
+)
+from deltacat.compute.compactor_v2.deletes.delete_strategy_deletion_vector import (
+    DeletionVectorDeleteStrategy,
+)
 from deltacat.compute.compactor_v2.deletes.delete_strategy_equality_delete import (
     EqualityDeleteStrategy,
 )
+import numpy as np
 import pyarrow as pa
 from deltacat.storage import (
     Delta,
 )
 from deltacat import logs
 from deltacat.utils.metrics import metrics
-from deltacat.compute.compactor_v2.constants import PREPARE_DELETES_METRIC_PREFIX
+from deltacat.compute.compactor_v2.constants import (
+    PK_HASHER_ID,
+    PREPARE_DELETES_METRIC_PREFIX,
+)
+from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    group_by_pk_hash_bucket,
+    pk_digest_array_to_hash_bucket_indices,
+)
 
 
 logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
@@ -67,6 +86,85 @@ def _aggregate_delete_deltas(input_deltas: List[Delta]) -> Dict[int, List[Delta]
     return start_stream_spos_to_delete_delta_sequence
 
 
+def _download_delete_table(
+    params: CompactPartitionParams,
+    delete_delta_sequence: List[Delta],
+) -> Tuple[pa.Table, List[str]]:
+    """
+    Downloads the delete columns of a sequence of DELETE deltas with the same delete
+    parameters into a single delete table.
+    """
+    consecutive_delete_tables: List[pa.Table] = []
+    for delete_delta in delete_delta_sequence:
+        assert (
+            delete_delta.delete_parameters is not None
+        ), "Delete type deltas are required to have delete parameters defined"
+        delete_columns: Optional[
+            List[str]
+        ] = delete_delta.delete_parameters.equality_column_names
+        assert len(delete_columns) > 0, "At least 1 delete column is required"
+        # delete columns should exist in underlying table
+        delete_dataset = params.deltacat_storage.download_delta(
+            delete_delta,
+            file_reader_kwargs_provider=params.read_kwargs_provider,
+            columns=delete_columns,
+            storage_type=StorageType.LOCAL,
+            max_parallelism=1,
+            **params.deltacat_storage_kwargs,
+        )
+        consecutive_delete_tables.extend(delete_dataset)
+    return pa.concat_tables(consecutive_delete_tables), delete_columns
+
+
+def _get_compiled_delete_table(
+    params: CompactPartitionParams,
+    delete_delta_sequence: List[Delta],
+) -> Tuple[pa.Table, List[str]]:
+    """
+    Returns the delete table of a sequence of DELETE deltas compiled into a delete key
+    set. A key set compiled by a previous compaction attempt is loaded from the
+    compaction artifact bucket. Otherwise, the delete deltas are downloaded, compiled
+    and the key set is persisted for subsequent attempts. Delete tables that cannot be
+    compiled are returned as is.
+    """
+    assert all(
+        delete_delta.delete_parameters is not None
+        for delete_delta in delete_delta_sequence
+    ), "Delete type deltas are required to have delete parameters defined"
+    delete_columns = delete_delta_sequence[0].delete_parameters.equality_column_names
+    delete_key_set_file_s3_url = get_delete_key_set_file_s3_url(
+        params.compaction_artifact_s3_bucket,
+        params.source_partition_locator,
+        delete_delta_sequence,
+        delete_columns,
+        params.pk_hasher_id,
+    )
+    delete_table = read_delete_key_set_file(
+        delete_key_set_file_s3_url, **params.s3_client_kwargs
+    )
+    if delete_table is not None:
+        logger.info(
+            f"Loaded {len(delete_table)} compiled delete keys of "
+            f"{len(delete_delta_sequence)} delete deltas"
+        )
+        return delete_table, delete_columns
+
+    delete_table, delete_columns = _download_delete_table(params, delete_delta_sequence)
+    delete_key_set = CompiledDeleteKeySet.compile(
+        delete_table, delete_columns, params.pk_hasher_id
+    )
+    if delete_key_set is None:
+        logger.info(
+            f"Unable to compile {len(delete_table)} delete records with null delete keys"
+        )
+        return delete_table, delete_columns
+    delete_table = delete_key_set.to_table()
+    write_delete_key_set_file(
+        delete_key_set_file_s3_url, delete_table, **params.s3_client_kwargs
+    )
+    return delete_table, delete_columns
+
+
 def _get_delete_file_envelopes(
     params: CompactPartitionParams,
     delete_spos_to_delete_deltas: Dict[int, List],
@@ -86,26 +184,14 @@ def _get_delete_file_envelopes(
         start_stream_position,
         delete_delta_sequence,
     ) in delete_spos_to_delete_deltas.items():
-        consecutive_delete_tables: List[pa.Table] = []
-        for delete_delta in delete_delta_sequence:
-            assert (
-                delete_delta.delete_parameters is not None
-            ), "Delete type deltas are required to have delete parameters defined"
-            delete_columns: Optional[
-                List[str]
-            ] = delete_delta.delete_parameters.equality_column_names
-            assert len(delete_columns) > 0, "At least 1 delete column is required"
-            # delete columns should exist in underlying table
-            delete_dataset = params.deltacat_storage.download_delta(
-                delete_delta,
-                file_reader_kwargs_provider=params.read_kwargs_provider,
-                columns=delete_columns,
-                storage_type=StorageType.LOCAL,
-                max_parallelism=1,
-                **params.deltacat_storage_kwargs,
+        if params.compiled_delete_key_sets_enabled:
+            delete_table, delete_columns = _get_compiled_delete_table(
+                params, delete_delta_sequence
+            )
+        else:
+            delete_table, delete_columns = _download_delete_table(
+                params, delete_delta_sequence
             )
-            consecutive_delete_tables.extend(delete_dataset)
-        delete_table: pa.Table = pa.concat_tables(consecutive_delete_tables)
         delete_file_envelopes.append(
             DeleteFileEnvelope.of(
                 start_stream_position,
@@ -139,7 +225,8 @@ def prepare_deletes(
         PrepareDeleteResult:
             - A list of Deltas excluding all DELETE operations.
             - A list of DeleteFileEnvelope objects representing the consolidated delete operations.
-            - An instance of the EqualityDeleteStrategy class.
+            - An instance of the EqualityDeleteStrategy class, or of the DeletionVectorDeleteStrategy
+              class if deletion vectors are enabled.
 
     Raises:
         AssertionError: If the input_deltas list is not sorted in non-decreasing order by stream_position.
@@ -163,5 +250,101 @@ def prepare_deletes(
     return PrepareDeleteResult(
         [delta for delta in input_deltas if delta.type is not DeltaType.DELETE],
         delete_file_envelopes,
-        EqualityDeleteStrategy(),
+        DeletionVectorDeleteStrategy()
+        if params.deletion_vectors_enabled
+        else EqualityDeleteStrategy(),
     )
+
+
+def route_delete_file_envelopes(
+    delete_file_envelopes: List[DeleteFileEnvelope],
+    primary_keys: List[str],
+    hash_bucket_count: int,
+    hash_bucket_index_to_merge_task_index: Callable[[int], int],
+    pk_hasher_id: str = PK_HASHER_ID,
+) -> Optional[Dict[int, List[DeleteFileEnvelope]]]:
+    """
+    Routes the records of each delete file envelope to the merge tasks of the hash
+    buckets of their primary keys, hashing and bucketing them the same way as upserts.
+    Compiled delete key sets are bucketed by their primary key hash digests.
+
+    Args:
+        delete_file_envelopes (List[DeleteFileEnvelope]): The delete file envelopes to route.
+        primary_keys (List[str]): The primary keys of the table.
+        hash_bucket_count (int): The number of hash buckets.
+        hash_bucket_index_to_merge_task_index (Callable[[int], int]): Maps a hash bucket index
+            to the index of the merge task that merges it.
+        pk_hasher_id (str): The id of the primary key hasher used to hash bucket upserts.
+    Returns:
+        Optional[Dict[int, List[DeleteFileEnvelope]]]: The delete file envelopes holding the
+        delete records of each merge task with any, or None if any delete file envelope is not
+        keyed by exactly the primary keys and must be applied to every hash bucket instead.
+    """
+    if not primary_keys or any(
+        sorted(delete_file_envelope.delete_columns) != sorted(primary_keys)
+        for delete_file_envelope in delete_file_envelopes
+    ):
+        return None
+    if any(
+        CompiledDeleteKeySet.is_compiled(delete_file_envelope.table)
+        and CompiledDeleteKeySet.from_table(delete_file_envelope.table).pk_hasher_id
+        != pk_hasher_id
+        for delete_file_envelope in delete_file_envelopes
+    ):
+        return None
+
+    merge_task_index_to_delete_file_envelopes: Dict[
+        int, List[DeleteFileEnvelope]
+    ] = defaultdict(list)
+    for delete_file_envelope in delete_file_envelopes:
+        delete_table: pa.Table = delete_file_envelope.table
+        if not delete_table:
+            continue
+        merge_task_index_to_tables: Dict[int, List[pa.Table]] = defaultdict(list)
+        if CompiledDeleteKeySet.is_compiled(delete_table):
+            merge_task_indices = np.array(
+                [
+                    hash_bucket_index_to_merge_task_index(hb_index)
+                    for hb_index in range(hash_bucket_count)
+                ]
+            )[
+                pk_digest_array_to_hash_bucket_indices(
+                    delete_table[CompiledDeleteKeySet.KEY_HASH_COLUMN_NAME],
+                    hash_bucket_count,
+                )
+            ]
+            for merge_task_index in np.unique(merge_task_indices):
+                merge_task_index_to_tables[int(merge_task_index)].append(
+                    delete_table.filter(
+                        pa.array(merge_task_indices == merge_task_index)
+                    )
+                )
+        else:
+            # null primary keys match no record, so their delete records are dropped
+            delete_table = delete_table.select(primary_keys).drop_null()
+            if not len(delete_table):
+                continue
+            for hb_index, hb_table in enumerate(
+                group_by_pk_hash_bucket(
+                    delete_table, hash_bucket_count, primary_keys, pk_hasher_id
+                )
+            ):
+                if hb_table is not None:
+                    merge_task_index_to_tables[
+                        hash_bucket_index_to_merge_task_index(hb_index)
+                    ].append(hb_table)
+        for merge_task_index, tables in merge_task_index_to_tables.items():
+            merge_task_index_to_delete_file_envelopes[merge_task_index].append(
+                DeleteFileEnvelope.of(
+                    delete_file_envelope.stream_position,
+                    delta_type=DeltaType.DELETE,
+                    table=pa.concat_tables(tables),
+                    delete_columns=delete_file_envelope.delete_columns,
+                )
+            )
+        logger.info(
+            f"Routed {len(delete_table)} delete records at stream position "
+            f"{delete_file_envelope.stream_position} to "
+            f"{len(merge_task_index_to_tables)} merge tasks"
+        )
+    return dict(merge_task_index_to_delete_file_envelopes)
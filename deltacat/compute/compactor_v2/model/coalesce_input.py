@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Any
+from deltacat.utils.metrics import MetricsConfig
+from deltacat.utils.common import ReadKwargsProvider
+from deltacat.storage import (
+    Partition,
+    interface as unimplemented_deltacat_storage,
+)
+from deltacat.compute.compactor import DeltaAnnotated
+from deltacat.compute.compactor_v2.constants import (
+    COMPACTED_FILE_ROW_GROUP_TARGET_SIZE_BYTES,
+    MAX_RECORDS_PER_COMPACTED_FILE,
+    PARQUET_TO_PYARROW_INFLATION,
+)
+from deltacat.types.media import ContentType
+
+
+class CoalesceInput(Dict):
+    @staticmethod
+    def of(
+        annotated_deltas: List[DeltaAnnotated],
+        write_to_partition: Partition,
+        compacted_file_content_type: ContentType,
+        coalesce_task_index: Optional[int] = 0,
+        max_records_per_output_file: Optional[int] = MAX_RECORDS_PER_COMPACTED_FILE,
+        enable_profiler: Optional[bool] = False,
+        metrics_config: Optional[MetricsConfig] = None,
+        s3_table_writer_kwargs: Optional[Dict[str, Any]] = None,
+        read_kwargs_provider: Optional[ReadKwargsProvider] = None,
+        deltacat_storage=unimplemented_deltacat_storage,
+        deltacat_storage_kwargs: Optional[Dict[str, Any]] = None,
+        memory_logs_enabled: Optional[bool] = None,
+        compacted_file_target_size_bytes: Optional[int] = None,
+        compacted_file_row_group_target_size_bytes: Optional[
+            int
+        ] = COMPACTED_FILE_ROW_GROUP_TARGET_SIZE_BYTES,
+        compacted_file_inflation: Optional[float] = PARQUET_TO_PYARROW_INFLATION,
+    ) -> CoalesceInput:
+
+        result = CoalesceInput()
+        result["annotated_deltas"] = annotated_deltas
+        result["write_to_partition"] = write_to_partition
+        result["compacted_file_content_type"] = compacted_file_content_type
+        result["coalesce_task_index"] = coalesce_task_index
+        result["max_records_per_output_file"] = max_records_per_output_file
+        result["enable_profiler"] = enable_profiler
+        result["metrics_config"] = metrics_config
+        result["s3_table_writer_kwargs"] = s3_table_writer_kwargs or {}
+        result["read_kwargs_provider"] = read_kwargs_provider
+        result["deltacat_storage"] = deltacat_storage
+        result["deltacat_storage_kwargs"] = deltacat_storage_kwargs or {}
+        result["memory_logs_enabled"] = memory_logs_enabled
+        result["compacted_file_target_size_bytes"] = compacted_file_target_size_bytes
+        result[
+            "compacted_file_row_group_target_size_bytes"
+        ] = compacted_file_row_group_target_size_bytes
+        result["compacted_file_inflation"] = compacted_file_inflation
+
+        return result
+
+    @property
+    def annotated_deltas(self) -> List[DeltaAnnotated]:
+        return self["annotated_deltas"]
+
+    @property
+    def write_to_partition(self) -> Partition:
+        return self["write_to_partition"]
+
+    @property
+    def compacted_file_content_type(self) -> ContentType:
+        return self["compacted_file_content_type"]
+
+    @property
+    def coalesce_task_index(self) -> int:
+        return self.get("coalesce_task_index")
+
+    @property
+    def max_records_per_output_file(self) -> int:
+        return self.get("max_records_per_output_file")
+
+    @property
+    def enable_profiler(self) -> bool:
+        return self.get("enable_profiler")
+
+    @property
+    def metrics_config(self) -> Optional[MetricsConfig]:
+        return self.get("metrics_config")
+
+    @property
+    def s3_table_writer_kwargs(self) -> Optional[Dict[str, Any]]:
+        return self.get("s3_table_writer_kwargs")
+
+    @property
+    def read_kwargs_provider(self) -> Optional[ReadKwargsProvider]:
+        return self.get("read_kwargs_provider")
+
+    @property
+    def deltacat_storage(self) -> unimplemented_deltacat_storage:
+        return self["deltacat_storage"]
+
+    @property
+    def deltacat_storage_kwargs(self) -> Optional[Dict[str, Any]]:
+        return self.get("deltacat_storage_kwargs")
+
+    @property
+    def memory_logs_enabled(self) -> Optional[bool]:
+        return self.get("memory_logs_enabled")
+
+    @property
+    def compacted_file_target_size_bytes(self) -> Optional[int]:
+        return self.get("compacted_file_target_size_bytes")
+
+    @property
+    def compacted_file_row_group_target_size_bytes(self) -> int:
+        return (
+            self.get("compacted_file_row_group_target_size_bytes")
+            or COMPACTED_FILE_ROW_GROUP_TARGET_SIZE_BYTES
+        )
+
+    @property
+    def compacted_file_inflation(self) -> float:
+        return self.get("compacted_file_inflation") or PARQUET_TO_PYARROW_INFLATION
@@ -0,0 +1,139 @@
+# Allow classes to use self-referencing Type hints in Python 3.7.
+from __future__ import annotations
+
+import base64
+from typing import List, Optional
+
+import numpy as np
+
+from deltacat.storage import Manifest, ManifestEntry
+
+# Deleted record positions are stored as 32-bit integers while they take
+# less space than a bitmap of one bit per record.
+_BITS_PER_POSITION = 32
+
+
+class DeletionVector(dict):
+    """
+    The positions of the deleted records of a compacted manifest entry. It is
+    stored in the manifest entry meta so that deletes can be applied by
+    dropping the deleted records whenever the file is read, instead of
+    rewriting the file. Deleted records are folded into the file the next time
+    it is rewritten.
+
+    Positions are encoded as a list of record indices while few records are
+    deleted, and as a bitmap of the records of the file otherwise. Small
+    encoded positions are embedded in the deletion vector, while large ones are
+    written to a file that the deletion vector references by URL.
+
+    Only the merge step of compactor v2 applies deletion vectors. Any other
+    reader of a compacted delta must drop deleted records itself.
+    """
+
+    @staticmethod
+    def of(is_deleted: np.ndarray) -> DeletionVector:
+        is_deleted = np.asarray(is_deleted, dtype=bool)
+        positions = np.flatnonzero(is_deleted)
+
+        result = DeletionVector()
+        result["record_count"] = len(is_deleted)
+        result["deleted_record_count"] = len(positions)
+        if len(positions) * _BITS_PER_POSITION < len(is_deleted):
+            result["encoding"] = "positions"
+            data = positions.astype("<u4").tobytes()
+        else:
+            result["encoding"] = "bitmap"
+            data = np.packbits(is_deleted, bitorder="little").tobytes()
+        result["size_bytes"] = len(data)
+        result["data"] = base64.b64encode(data).decode("ascii")
+        return result
+
+    def with_file(self, url: str) -> DeletionVector:
+        """
+        Returns a copy of this deletion vector that references the file at the
+        given URL holding its encoded positions instead of embedding them.
+        """
+        result = DeletionVector(self)
+        result.pop("data", None)
+        result["url"] = url
+        return result
+
+    @property
+    def record_count(self) -> int:
+        return self["record_count"]
+
+    @property
+    def deleted_record_count(self) -> int:
+        return self["deleted_record_count"]
+
+    @property
+    def encoding(self) -> str:
+        return self["encoding"]
+
+    @property
+    def size_bytes(self) -> int:
+        """
+        The size in bytes of the encoded positions.
+        """
+        return self["size_bytes"]
+
+    @property
+    def url(self) -> Optional[str]:
+        """
+        The URL of the file holding the encoded positions, if not embedded.
+        """
+        return self.get("url")
+
+    @property
+    def data(self) -> Optional[bytes]:
+        """
+        The encoded positions, if embedded.
+        """
+        data = self.get("data")
+        if data is None:
+            return None
+        return base64.b64decode(data)
+
+    def is_deleted(self, data: Optional[bytes] = None) -> np.ndarray:
+        """
+        Returns whether each record of the manifest entry is deleted, given the
+        encoded positions read from the file of the deletion vector if they
+        are not embedded.
+        """
+        if data is None:
+            data = self.data
+        assert data is not None, f"Deletion vector file not read: {self.url}"
+        data = np.frombuffer(data, dtype=np.uint8)
+        if self.encoding == "bitmap":
+            return np.unpackbits(data, count=self.record_count, bitorder="little").view(
+                bool
+            )
+        is_deleted = np.zeros(self.record_count, dtype=bool)
+        is_deleted[data.view("<u4")] = True
+        return is_deleted
+
+
+def get_deletion_vector(manifest_entry: ManifestEntry) -> Optional[DeletionVector]:
+    meta = manifest_entry.meta
+    if meta is None or meta.deletion_vector is None:
+        return None
+    return DeletionVector(meta.deletion_vector)
+
+
+def has_deletion_vectors(manifest: Optional[Manifest]) -> bool:
+    return manifest is not None and any(
+        get_deletion_vector(manifest_entry) is not None
+        for manifest_entry in manifest.entries
+    )
+
+
+def get_deleted_record_count(manifest_entries: List[ManifestEntry]) -> int:
+    """
+    Returns the number of records of the given manifest entries that are
+    deleted by their deletion vectors.
+    """
+    return sum(
+        deletion_vector.deleted_record_count
+        for deletion_vector in map(get_deletion_vector, manifest_entries)
+        if deletion_vector is not None
+    )
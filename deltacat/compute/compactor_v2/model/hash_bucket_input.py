@@ -6,6 +6,10 @@ from deltacat.utils.common import ReadKwargsProvider
 from deltacat.io.object_store import IObjectStore
 from deltacat.storage import interface as unimplemented_deltacat_storage
 from deltacat.compute.compactor import DeltaAnnotated
+from deltacat.compute.compactor_v2.constants import (
+    HASH_BUCKET_THREAD_COUNT,
+    PK_HASHER_ID,
+)
 
 
 class HashBucketInput(Dict):
@@ -23,6 +27,10 @@ class HashBucketInput(Dict):
         deltacat_storage=unimplemented_deltacat_storage,
         deltacat_storage_kwargs: Optional[Dict[str, Any]] = None,
         memory_logs_enabled: Optional[bool] = None,
+        pk_hasher_id: Optional[str] = PK_HASHER_ID,
+        hash_bucket_thread_count: Optional[int] = HASH_BUCKET_THREAD_COUNT,
+        streaming_hash_bucket_enabled: Optional[bool] = False,
+        hb_index_to_hash_group_index: Optional[List[int]] = None,
     ) -> HashBucketInput:
 
         result = HashBucketInput()
@@ -38,6 +46,10 @@ class HashBucketInput(Dict):
         result["deltacat_storage"] = deltacat_storage
         result["deltacat_storage_kwargs"] = deltacat_storage_kwargs or {}
         result["memory_logs_enabled"] = memory_logs_enabled
+        result["pk_hasher_id"] = pk_hasher_id
+        result["hash_bucket_thread_count"] = hash_bucket_thread_count
+        result["streaming_hash_bucket_enabled"] = streaming_hash_bucket_enabled
+        result["hb_index_to_hash_group_index"] = hb_index_to_hash_group_index
 
         return result
 
@@ -88,3 +100,23 @@ class HashBucketInput(Dict):
     @property
     def memory_logs_enabled(self) -> Optional[bool]:
         return self.get("memory_logs_enabled")
+
+    @property
+    def pk_hasher_id(self) -> str:
+        return self.get("pk_hasher_id") or PK_HASHER_ID
+
+    @property
+    def hash_bucket_thread_count(self) -> int:
+        return self.get("hash_bucket_thread_count") or HASH_BUCKET_THREAD_COUNT
+
+    @property
+    def streaming_hash_bucket_enabled(self) -> bool:
+        return bool(self.get("streaming_hash_bucket_enabled"))
+
+    @property
+    def hb_index_to_hash_group_index(self) -> Optional[List[int]]:
+        """
+        The hash group of every hash bucket, if hash buckets are not assigned
+        to hash groups round-robin.
+        """
+        return self.get("hb_index_to_hash_group_index")
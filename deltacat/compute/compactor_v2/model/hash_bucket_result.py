@@ -1,4 +1,4 @@
-from typing import NamedTuple
+from typing import NamedTuple, Optional
 
 import numpy as np
 
@@ -10,3 +10,5 @@ class HashBucketResult(NamedTuple):
     peak_memory_usage_bytes: np.double
     telemetry_time_in_seconds: np.double
     task_completed_at: np.double
+    hash_bucket_size_bytes: Optional[np.ndarray] = None
+    hash_bucket_num_rows: Optional[np.ndarray] = None
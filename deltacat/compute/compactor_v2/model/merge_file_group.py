@@ -13,10 +13,15 @@ from deltacat.compute.compactor.model.delta_file_envelope import DeltaFileEnvelo
 from deltacat.compute.compactor_v2.utils.delta import read_delta_file_envelopes
 
 from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    hash_bucket_index_to_hash_group_index,
     hash_group_index_to_hash_bucket_indices,
 )
 
-from deltacat.storage import interface as unimplemented_deltacat_storage
+from deltacat.storage import (
+    DeltaLocator,
+    DeltaType,
+    interface as unimplemented_deltacat_storage,
+)
 
 from deltacat.io.object_store import IObjectStore
 
@@ -24,10 +29,14 @@ from deltacat import logs
 
 from deltacat.compute.compactor import DeltaFileEnvelope, DeltaAnnotated
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
 
+# A manifest entry of a pre-bucketed delta, given as the locator and type of its
+# delta, the index of the entry in the delta manifest and its hash bucket index.
+PreBucketedManifestEntry = Tuple[DeltaLocator, DeltaType, int, int]
+
 
 class MergeFileGroup(dict):
     @staticmethod
@@ -156,9 +165,11 @@ class RemoteMergeFileGroupsProvider(MergeFileGroupsProvider):
         hash_bucket_count: int,
         num_hash_groups: int,
         object_store: IObjectStore,
+        hb_index_to_hash_group_index: Optional[List[int]] = None,
     ):
         self.hash_bucket_count = hash_bucket_count
         self.num_hash_groups = num_hash_groups
+        self.hb_index_to_hash_group_index = hb_index_to_hash_group_index
         self.object_store = object_store
         self._hash_group_index = hash_group_index
         self._dfe_groups_refs = dfe_groups_refs
@@ -180,7 +191,10 @@ class RemoteMergeFileGroupsProvider(MergeFileGroupsProvider):
                 if dfes:
                     hb_index_to_delta_file_envelopes_list[hb_idx].append(dfes)
         valid_hb_indices_iterable = hash_group_index_to_hash_bucket_indices(
-            self.hash_group_index, self.hash_bucket_count, self.num_hash_groups
+            self.hash_group_index,
+            self.hash_bucket_count,
+            self.num_hash_groups,
+            self.hb_index_to_hash_group_index,
         )
 
         total_dfes_found = 0
@@ -211,3 +225,99 @@ class RemoteMergeFileGroupsProvider(MergeFileGroupsProvider):
     @property
     def hash_group_index(self):
         return self._hash_group_index
+
+
+class PreBucketedMergeFileGroupsProvider(MergeFileGroupsProvider):
+    """
+    A factory class for producing merge file groups given the manifest entries of
+    pre-bucketed deltas. Since every manifest entry only contains records of a
+    single hash bucket, the entries are downloaded directly by the merge task
+    without a hash bucket step.
+    """
+
+    def __init__(
+        self,
+        hash_group_index: int,
+        pre_bucketed_entries: List[PreBucketedManifestEntry],
+        hash_bucket_count: int,
+        num_hash_groups: int,
+        read_kwargs_provider: Optional[ReadKwargsProvider],
+        deltacat_storage=unimplemented_deltacat_storage,
+        deltacat_storage_kwargs: Optional[dict] = None,
+        hb_index_to_hash_group_index: Optional[List[int]] = None,
+    ):
+        self.hash_bucket_count = hash_bucket_count
+        self.num_hash_groups = num_hash_groups
+        self.hb_index_to_hash_group_index = hb_index_to_hash_group_index
+        self._hash_group_index = hash_group_index
+        self._pre_bucketed_entries = pre_bucketed_entries
+        self._read_kwargs_provider = read_kwargs_provider
+        self._deltacat_storage = deltacat_storage
+        self._deltacat_storage_kwargs = deltacat_storage_kwargs or {}
+        self._dfe_groups = []
+        self._loaded_deltas = False
+
+    def _read_pre_bucketed_entries(self):
+        dfe_start = time.monotonic()
+        hb_index_to_delta_file_envelopes = defaultdict(list)
+        for (
+            delta_locator,
+            delta_type,
+            entry_index,
+            hb_index,
+        ) in self._pre_bucketed_entries:
+            assert (
+                hash_bucket_index_to_hash_group_index(
+                    hb_index, self.num_hash_groups, self.hb_index_to_hash_group_index
+                )
+                == self.hash_group_index
+            ), f"Hash bucket {hb_index} does not belong to group {self.hash_group_index}"
+
+            table = self._deltacat_storage.download_delta_manifest_entry(
+                delta_locator,
+                entry_index=entry_index,
+                file_reader_kwargs_provider=self._read_kwargs_provider,
+                **self._deltacat_storage_kwargs,
+            )
+            hb_index_to_delta_file_envelopes[hb_index].append(
+                DeltaFileEnvelope.of(
+                    stream_position=delta_locator.stream_position,
+                    file_index=entry_index,
+                    delta_type=delta_type,
+                    table=table,
+                )
+            )
+        dfe_end = time.monotonic()
+        logger.info(
+            f"Retrieved {len(self._pre_bucketed_entries)} pre-bucketed manifest "
+            f"entries in {dfe_end - dfe_start}s."
+        )
+
+        valid_hb_indices_iterable = hash_group_index_to_hash_bucket_indices(
+            self.hash_group_index,
+            self.hash_bucket_count,
+            self.num_hash_groups,
+            self.hb_index_to_hash_group_index,
+        )
+        dfe_list_groups = []
+        for hb_idx in valid_hb_indices_iterable:
+            dfes = hb_index_to_delta_file_envelopes.get(hb_idx)
+            if dfes:
+                dfe_list_groups.append(
+                    MergeFileGroup.of(hb_index=hb_idx, dfe_groups=[dfes])
+                )
+            else:
+                dfe_list_groups.append(MergeFileGroup.of(hb_index=hb_idx))
+
+        self._dfe_groups = dfe_list_groups
+        self._loaded_deltas = True
+
+    def create(self) -> List[MergeFileGroup]:
+        if not self._loaded_deltas:
+            self._read_pre_bucketed_entries()
+
+        return self._dfe_groups
+
+    @property
+    def hash_group_index(self):
+        return self._hash_group_index
@@ -17,8 +17,12 @@ from deltacat.storage import (
     interface as unimplemented_deltacat_storage,
 )
 from deltacat.compute.compactor_v2.constants import (
+    COMPACTED_FILE_ROW_GROUP_TARGET_SIZE_BYTES,
     DROP_DUPLICATES,
     MAX_RECORDS_PER_COMPACTED_FILE,
+    MERGE_THREAD_COUNT,
+    PARQUET_TO_PYARROW_INFLATION,
+    PK_HASHER_ID,
 )
 from deltacat.compute.compactor_v2.deletes.delete_strategy import DeleteStrategy
 from deltacat.types.media import ContentType
@@ -47,6 +51,23 @@ class MergeInput(Dict):
         deltacat_storage=unimplemented_deltacat_storage,
         deltacat_storage_kwargs: Optional[Dict[str, Any]] = None,
         memory_logs_enabled: Optional[bool] = None,
+        pk_hasher_id: Optional[str] = PK_HASHER_ID,
+        sort_merge_enabled: Optional[bool] = False,
+        pk_bloom_filter_enabled: Optional[bool] = False,
+        two_phase_merge_enabled: Optional[bool] = False,
+        merge_prefetch_memory_budget_bytes: Optional[int] = None,
+        merge_thread_count: Optional[int] = MERGE_THREAD_COUNT,
+        merge_task_memory_bytes: Optional[float] = None,
+        merge_spill_enabled: Optional[bool] = False,
+        streaming_materialize_enabled: Optional[bool] = False,
+        compacted_file_target_size_bytes: Optional[int] = None,
+        compacted_file_row_group_target_size_bytes: Optional[
+            int
+        ] = COMPACTED_FILE_ROW_GROUP_TARGET_SIZE_BYTES,
+        compacted_file_inflation: Optional[float] = PARQUET_TO_PYARROW_INFLATION,
+        deletion_vectors_present: Optional[bool] = False,
+        compaction_artifact_s3_bucket: Optional[str] = None,
+        s3_client_kwargs: Optional[Dict[str, Any]] = None,
     ) -> MergeInput:
 
         result = MergeInput()
@@ -69,6 +90,25 @@ class MergeInput(Dict):
         result["deltacat_storage"] = deltacat_storage
         result["deltacat_storage_kwargs"] = deltacat_storage_kwargs or {}
         result["memory_logs_enabled"] = memory_logs_enabled
+        result["pk_hasher_id"] = pk_hasher_id
+        result["sort_merge_enabled"] = sort_merge_enabled
+        result["pk_bloom_filter_enabled"] = pk_bloom_filter_enabled
+        result["two_phase_merge_enabled"] = two_phase_merge_enabled
+        result[
+            "merge_prefetch_memory_budget_bytes"
+        ] = merge_prefetch_memory_budget_bytes
+        result["merge_thread_count"] = merge_thread_count
+        result["merge_task_memory_bytes"] = merge_task_memory_bytes
+        result["merge_spill_enabled"] = merge_spill_enabled
+        result["streaming_materialize_enabled"] = streaming_materialize_enabled
+        result["compacted_file_target_size_bytes"] = compacted_file_target_size_bytes
+        result[
+            "compacted_file_row_group_target_size_bytes"
+        ] = compacted_file_row_group_target_size_bytes
+        result["compacted_file_inflation"] = compacted_file_inflation
+        result["deletion_vectors_present"] = deletion_vectors_present
+        result["compaction_artifact_s3_bucket"] = compaction_artifact_s3_bucket
+        result["s3_client_kwargs"] = s3_client_kwargs or {}
         return result
 
     @property
@@ -148,3 +188,66 @@ class MergeInput(Dict):
     @property
     def delete_strategy(self) -> Optional[DeleteStrategy]:
         return self.get("delete_strategy")
+
+    @property
+    def pk_hasher_id(self) -> str:
+        return self.get("pk_hasher_id") or PK_HASHER_ID
+
+    @property
+    def sort_merge_enabled(self) -> bool:
+        return bool(self.get("sort_merge_enabled"))
+
+    @property
+    def pk_bloom_filter_enabled(self) -> bool:
+        return bool(self.get("pk_bloom_filter_enabled"))
+
+    @property
+    def two_phase_merge_enabled(self) -> bool:
+        return bool(self.get("two_phase_merge_enabled"))
+
+    @property
+    def merge_prefetch_memory_budget_bytes(self) -> Optional[int]:
+        return self.get("merge_prefetch_memory_budget_bytes")
+
+    @property
+    def merge_thread_count(self) -> int:
+        return self.get("merge_thread_count") or MERGE_THREAD_COUNT
+
+    @property
+    def merge_task_memory_bytes(self) -> Optional[float]:
+        return self.get("merge_task_memory_bytes")
+
+    @property
+    def merge_spill_enabled(self) -> bool:
+        return bool(self.get("merge_spill_enabled"))
+
+    @property
+    def streaming_materialize_enabled(self) -> bool:
+        return bool(self.get("streaming_materialize_enabled"))
+
+    @property
+    def compacted_file_target_size_bytes(self) -> Optional[int]:
+        return self.get("compacted_file_target_size_bytes")
+
+    @property
+    def compacted_file_row_group_target_size_bytes(self) -> int:
+        return (
+            self.get("compacted_file_row_group_target_size_bytes")
+            or COMPACTED_FILE_ROW_GROUP_TARGET_SIZE_BYTES
+        )
+
+    @property
+    def compacted_file_inflation(self) -> float:
+        return self.get("compacted_file_inflation") or PARQUET_TO_PYARROW_INFLATION
+
+    @property
+    def deletion_vectors_present(self) -> bool:
+        return bool(self.get("deletion_vectors_present"))
+
+    @property
+    def compaction_artifact_s3_bucket(self) -> Optional[str]:
+        return self.get("compaction_artifact_s3_bucket")
+
+    @property
+    def s3_client_kwargs(self) -> Dict[str, Any]:
+        return self.get("s3_client_kwargs") or {}
@@ -0,0 +1,210 @@
+# Allow classes to use self-referencing Type hints in Python 3.7.
+from __future__ import annotations
+
+import math
+import struct
+from typing import List, Optional
+
+import numpy as np
+import pyarrow as pa
+
+from deltacat.compute.compactor.utils import system_columns as sc
+from deltacat.compute.compactor_v2.constants import (
+    PK_BLOOM_FILTER_BITS_PER_KEY,
+    PK_HASHER_ID,
+)
+from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    generate_pk_hash_column,
+)
+
+# The number of keys whose bit positions are computed at a time.
+_KEY_BATCH_SIZE = 1 << 20
+
+# The bit and hash function counts that precede the bits of a serialized filter.
+_HEADER = struct.Struct("<QQ")
+
+_SPLITMIX64_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_SPLITMIX64_MUL_1 = np.uint64(0xBF58476D1CE4E5B9)
+_SPLITMIX64_MUL_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _splitmix64(keys: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        z = keys + _SPLITMIX64_GAMMA
+        z = (z ^ (z >> np.uint64(30))) * _SPLITMIX64_MUL_1
+        z = (z ^ (z >> np.uint64(27))) * _SPLITMIX64_MUL_2
+        return z ^ (z >> np.uint64(31))
+
+
+def pk_bloom_filter_keys(
+    table: pa.Table,
+    primary_keys: List[str],
+    pk_hasher_id: str = PK_HASHER_ID,
+) -> np.ndarray:
+    """
+    Returns the 64-bit bloom filter key of each record of the table, taken from
+    the leading bytes of its primary key digest. Primary keys are always
+    digested, so keys do not depend on whether merge used the digest or the
+    raw primary keys to drop duplicates.
+    """
+    if not len(table):
+        return np.empty(0, dtype=np.uint64)
+
+    digests = sc.pk_hash_column(
+        generate_pk_hash_column(
+            [table.select(primary_keys)],
+            primary_keys,
+            requires_hash=True,
+            pk_hasher_id=pk_hasher_id,
+        )[0]
+    ).combine_chunks()
+    byte_width = digests.type.byte_width
+    assert byte_width >= 8, f"Primary key digests of {byte_width} bytes are too short"
+
+    values = np.frombuffer(digests.buffers()[1], dtype=np.uint8)
+    values = values[
+        digests.offset * byte_width : (digests.offset + len(digests)) * byte_width
+    ]
+    return (
+        np.ascontiguousarray(values.reshape(-1, byte_width)[:, :8]).view("<u8").ravel()
+    )
+
+
+class PkBloomFilter(dict):
+    """
+    A bloom filter of the primary keys of a compacted manifest entry. It is
+    stored as a file in the compaction artifact bucket and referenced by a
+    PkBloomFilterFile in the manifest entry meta, so that merge can skip
+    rewriting compacted files that hold none of the incremental primary keys
+    without growing the manifest.
+    """
+
+    @staticmethod
+    def of(
+        keys: np.ndarray,
+        bits_per_key: int = PK_BLOOM_FILTER_BITS_PER_KEY,
+    ) -> PkBloomFilter:
+        num_bits = max(64, int(len(keys) * bits_per_key))
+        num_hashes = max(1, round(bits_per_key * math.log(2)))
+
+        bits = np.zeros(num_bits, dtype=bool)
+        for offset in range(0, len(keys), _KEY_BATCH_SIZE):
+            positions = PkBloomFilter._bit_positions(
+                keys[offset : offset + _KEY_BATCH_SIZE], num_bits, num_hashes
+            )
+            bits[positions.ravel()] = True
+
+        result = PkBloomFilter()
+        result["num_bits"] = num_bits
+        result["num_hashes"] = num_hashes
+        result["bits"] = np.packbits(bits, bitorder="little").tobytes()
+        return result
+
+    @staticmethod
+    def from_bytes(data: bytes) -> PkBloomFilter:
+        num_bits, num_hashes = _HEADER.unpack_from(data)
+        result = PkBloomFilter()
+        result["num_bits"] = num_bits
+        result["num_hashes"] = num_hashes
+        result["bits"] = data[_HEADER.size :]
+        return result
+
+    @staticmethod
+    def _bit_positions(keys: np.ndarray, num_bits: int, num_hashes: int) -> np.ndarray:
+        """
+        Returns the bit position of each key for each hash function, derived
+        from two hashes of the key by double hashing.
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        step = _splitmix64(keys) | np.uint64(1)
+        hash_indices = np.arange(num_hashes, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            combined = keys[:, None] + hash_indices[None, :] * step[:, None]
+        return combined % np.uint64(num_bits)
+
+    @property
+    def num_bits(self) -> int:
+        return self["num_bits"]
+
+    @property
+    def num_hashes(self) -> int:
+        return self["num_hashes"]
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(self.num_bits, self.num_hashes) + self["bits"]
+
+    def might_contain_any(self, keys: np.ndarray) -> bool:
+        """
+        Returns false if none of the given keys were added to this filter, and
+        true if any of them may have been added.
+        """
+        if not len(keys):
+            return False
+
+        packed_bits = np.frombuffer(self["bits"], dtype=np.uint8)
+        for offset in range(0, len(keys), _KEY_BATCH_SIZE):
+            positions = self._bit_positions(
+                keys[offset : offset + _KEY_BATCH_SIZE], self.num_bits, self.num_hashes
+            )
+            is_set = (
+                packed_bits[positions >> np.uint64(3)]
+                >> (positions & np.uint64(7)).astype(np.uint8)
+            ) & np.uint8(1)
+            if is_set.all(axis=1).any():
+                return True
+        return False
+
+
+class PkBloomFilterFile(dict):
+    """
+    A reference to the primary key bloom filter file of a compacted manifest
+    entry, stored in the manifest entry meta. It records the primary keys and
+    primary key hasher the filter keys were digested with, since a filter is
+    only usable by merges that digest primary keys the same way.
+    """
+
+    @staticmethod
+    def of(
+        url: str,
+        size_bytes: int,
+        primary_keys: List[str],
+        pk_hasher_id: str,
+        pk_hasher_version: int,
+    ) -> PkBloomFilterFile:
+        result = PkBloomFilterFile()
+        result["url"] = url
+        result["size_bytes"] = size_bytes
+        result["primary_keys"] = list(primary_keys)
+        result["pk_hasher_id"] = pk_hasher_id
+        result["pk_hasher_version"] = pk_hasher_version
+        return result
+
+    @property
+    def url(self) -> Optional[str]:
+        return self.get("url")
+
+    @property
+    def size_bytes(self) -> Optional[int]:
+        return self.get("size_bytes")
+
+    @property
+    def primary_keys(self) -> Optional[List[str]]:
+        return self.get("primary_keys")
+
+    @property
+    def pk_hasher_id(self) -> Optional[str]:
+        return self.get("pk_hasher_id")
+
+    @property
+    def pk_hasher_version(self) -> Optional[int]:
+        return self.get("pk_hasher_version")
+
+    def is_compatible(
+        self, primary_keys: List[str], pk_hasher_id: str, pk_hasher_version: int
+    ) -> bool:
+        return (
+            self.url is not None
+            and list(self.primary_keys or []) == list(primary_keys)
+            and self.pk_hasher_id == pk_hasher_id
+            and self.pk_hasher_version == pk_hasher_version
+        )
@@ -0,0 +1,135 @@
+import importlib
+import itertools
+import logging
+import time
+from contextlib import nullcontext
+from typing import List, Tuple
+import numpy as np
+import ray
+from deltacat import logs
+from deltacat.compute.compactor.model.materialize_result import MaterializeResult
+from deltacat.compute.compactor_v2.model.coalesce_input import CoalesceInput
+from deltacat.compute.compactor_v2.model.merge_result import MergeResult
+from deltacat.compute.compactor_v2.utils import merge as merge_utils
+from deltacat.compute.compactor_v2.utils.delta import iterate_delta_file_envelopes
+from deltacat.utils.ray_utils.runtime import (
+    get_current_ray_task_id,
+    get_current_ray_worker_id,
+)
+from deltacat.utils.performance import timed_invocation
+from deltacat.utils.metrics import emit_timer_metrics, failure_metric, success_metric
+from deltacat.utils.resources import (
+    get_current_process_peak_memory_usage_in_bytes,
+    ProcessUtilizationOverTimeRange,
+)
+from deltacat.constants import BYTES_PER_GIBIBYTE
+from deltacat.compute.compactor_v2.constants import (
+    COALESCE_TIME_IN_SECONDS,
+    COALESCE_FAILURE_COUNT,
+    COALESCE_SUCCESS_COUNT,
+)
+
+if importlib.util.find_spec("memray"):
+    import memray
+
+logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
+
+
+def _coalesce_file_records(
+    input: CoalesceInput,
+) -> Tuple[List[MaterializeResult], int]:
+    """
+    Streams the manifest entries of the annotated deltas one at a time and writes
+    their records to files of max_records_per_output_file records each. At most
+    one output file worth of records and a single input file are held in memory,
+    besides the output file being written.
+    """
+    materializer = merge_utils.StreamingMaterializer(input, input.coalesce_task_index)
+    total_record_count = 0
+
+    dfe_iterators = [
+        iterate_delta_file_envelopes(
+            annotated_delta,
+            input.read_kwargs_provider,
+            input.deltacat_storage,
+            input.deltacat_storage_kwargs,
+        )
+        for annotated_delta in input.annotated_deltas
+    ]
+    for dfe in itertools.chain.from_iterable(dfe_iterators):
+        materializer.append(dfe.table)
+        total_record_count += len(dfe.table)
+        del dfe
+
+    return materializer.close(), total_record_count
+
+
+@success_metric(name=COALESCE_SUCCESS_COUNT)
+@failure_metric(name=COALESCE_FAILURE_COUNT)
+def _timed_coalesce(input: CoalesceInput) -> MergeResult:
+    task_id = get_current_ray_task_id()
+    worker_id = get_current_ray_worker_id()
+    with memray.Tracker(
+        f"coalesce_{worker_id}_{task_id}.bin"
+    ) if input.enable_profiler else nullcontext():
+        materialized_results, total_record_count = _coalesce_file_records(input)
+
+        logger.info(
+            f"[Coalesce task index {input.coalesce_task_index}] Coalesced "
+            f"{total_record_count} records into {len(materialized_results)} "
+            f"materialized results"
+        )
+
+        peak_memory_usage_bytes = get_current_process_peak_memory_usage_in_bytes()
+        logger.info(
+            f"Peak memory usage in bytes after coalesce: {peak_memory_usage_bytes}"
+        )
+
+        return MergeResult(
+            materialized_results,
+            np.int64(total_record_count),
+            np.int64(0),
+            np.int64(0),
+            np.double(peak_memory_usage_bytes),
+            np.double(0.0),
+            np.double(time.time()),
+        )
+
+
+@ray.remote
+def coalesce(input: CoalesceInput) -> MergeResult:
+    with ProcessUtilizationOverTimeRange() as process_util:
+        logger.info(f"Starting coalesce task {input.coalesce_task_index}...")
+
+        # Log node peak memory utilization every 10 seconds
+        def log_peak_memory():
+            logger.debug(
+                f"Process peak memory utilization so far: {process_util.max_memory} bytes "
+                f"({process_util.max_memory/BYTES_PER_GIBIBYTE} GB)"
+            )
+
+        if input.memory_logs_enabled:
+            process_util.schedule_callback(log_peak_memory, 10)
+
+        coalesce_result, duration = timed_invocation(func=_timed_coalesce, input=input)
+
+        emit_metrics_time = 0.0
+        if input.metrics_config:
+            emit_result, latency = timed_invocation(
+                func=emit_timer_metrics,
+                metrics_name=COALESCE_TIME_IN_SECONDS,
+                value=duration,
+                metrics_config=input.metrics_config,
+            )
+            emit_metrics_time = latency
+
+        logger.info(f"Finished coalesce task {input.coalesce_task_index}...")
+        return MergeResult(
+            coalesce_result[0],
+            coalesce_result[1],
+            coalesce_result[2],
+            coalesce_result[3],
+            coalesce_result[4],
+            np.double(emit_metrics_time),
+            coalesce_result[6],
+        )
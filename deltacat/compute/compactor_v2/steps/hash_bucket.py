@@ -1,10 +1,12 @@
 import importlib
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import nullcontext
 from typing import List, Optional, Tuple
 from deltacat.compute.compactor_v2.model.hash_bucket_input import HashBucketInput
 import numpy as np
+import pyarrow as pa
 import ray
 from deltacat import logs
 from deltacat.compute.compactor import (
@@ -13,7 +15,10 @@ from deltacat.compute.compactor import (
 )
 from deltacat.compute.compactor.model.delta_file_envelope import DeltaFileEnvelopeGroups
 from deltacat.compute.compactor_v2.model.hash_bucket_result import HashBucketResult
-from deltacat.compute.compactor_v2.utils.delta import read_delta_file_envelopes
+from deltacat.compute.compactor_v2.utils.delta import (
+    iterate_delta_file_envelopes,
+    read_delta_file_envelopes,
+)
 from deltacat.compute.compactor_v2.utils.primary_key_index import (
     group_hash_bucket_indices,
     group_by_pk_hash_bucket,
@@ -35,6 +40,8 @@ from deltacat.compute.compactor_v2.constants import (
     HASH_BUCKET_TIME_IN_SECONDS,
     HASH_BUCKET_FAILURE_COUNT,
     HASH_BUCKET_SUCCESS_COUNT,
+    HASH_BUCKET_THREAD_COUNT,
+    PK_HASHER_ID,
 )
 
 if importlib.util.find_spec("memray"):
@@ -42,6 +49,69 @@ if importlib.util.find_spec("memray"):
 
 logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
 
+# The minimum number of records hash bucketed by a single thread. Smaller
+# tables are not split across threads as the overhead outweighs the gain.
+_MIN_RECORDS_PER_HASH_BUCKET_THREAD = 64 * 1024
+
+
+def _split_table(table: pa.Table, num_splits: int) -> List[pa.Table]:
+    split_size = max(
+        -(-len(table) // num_splits),
+        _MIN_RECORDS_PER_HASH_BUCKET_THREAD,
+    )
+    return [
+        table.slice(offset, split_size) for offset in range(0, len(table), split_size)
+    ] or [table]
+
+
+def _merge_hash_bucket_fragments(
+    fragments: List[np.ndarray], num_hash_buckets: int
+) -> np.ndarray:
+    """
+    Merges the hash bucket to table arrays of consecutive splits of a table into
+    a single hash bucket to table array, preserving the record order of each
+    hash bucket.
+    """
+    if len(fragments) == 1:
+        return fragments[0]
+
+    result = np.empty([num_hash_buckets], dtype="object")
+    for hb in range(num_hash_buckets):
+        tables = [fragment[hb] for fragment in fragments if fragment[hb] is not None]
+        if tables:
+            result[hb] = pa.concat_tables(tables)
+    return result
+
+
+def _group_table_by_pk_hash_bucket(
+    table: pa.Table,
+    num_hash_buckets: int,
+    primary_keys: List[str],
+    pk_hasher_id: str,
+    executor: Optional[ThreadPoolExecutor] = None,
+    hash_bucket_thread_count: int = HASH_BUCKET_THREAD_COUNT,
+) -> np.ndarray:
+    if executor is None:
+        return group_by_pk_hash_bucket(
+            table, num_hash_buckets, primary_keys, pk_hasher_id
+        )
+
+    # Arrow compute kernels release the GIL, so consecutive splits of the
+    # table are grouped concurrently and their fragments merged in order.
+    futures = [
+        executor.submit(
+            group_by_pk_hash_bucket,
+            split,
+            num_hash_buckets,
+            primary_keys,
+            pk_hasher_id,
+        )
+        for split in _split_table(table, hash_bucket_thread_count)
+    ]
+    return _merge_hash_bucket_fragments(
+        [future.result() for future in futures], num_hash_buckets
+    )
+
 
 def _group_file_records_by_pk_hash_bucket(
     annotated_delta: DeltaAnnotated,
@@ -50,52 +120,111 @@ def _group_file_records_by_pk_hash_bucket(
     read_kwargs_provider: Optional[ReadKwargsProvider] = None,
     deltacat_storage=unimplemented_deltacat_storage,
     deltacat_storage_kwargs: Optional[dict] = None,
+    pk_hasher_id: str = PK_HASHER_ID,
+    hash_bucket_thread_count: int = HASH_BUCKET_THREAD_COUNT,
+    streaming_hash_bucket_enabled: bool = False,
 ) -> Tuple[Optional[DeltaFileEnvelopeGroups], int, int]:
-    # read input parquet s3 objects into a list of delta file envelopes
-    (
-        delta_file_envelopes,
-        total_record_count,
-        total_size_bytes,
-    ) = read_delta_file_envelopes(
-        annotated_delta,
-        read_kwargs_provider,
-        deltacat_storage,
-        deltacat_storage_kwargs,
-    )
+    if streaming_hash_bucket_enabled:
+        # download, hash and bucket one manifest entry at a time so that only
+        # one file is held in memory in addition to the hash bucketed records
+        delta_file_envelopes = iterate_delta_file_envelopes(
+            annotated_delta,
+            read_kwargs_provider,
+            deltacat_storage,
+            deltacat_storage_kwargs,
+        )
+    else:
+        # read input parquet s3 objects into a list of delta file envelopes
+        (
+            delta_file_envelopes,
+            total_record_count,
+            total_size_bytes,
+        ) = read_delta_file_envelopes(
+            annotated_delta,
+            read_kwargs_provider,
+            deltacat_storage,
+            deltacat_storage_kwargs,
+        )
 
-    if delta_file_envelopes is None:
-        return None, 0, 0
+        if delta_file_envelopes is None:
+            return None, 0, 0
 
-    logger.info(
-        f"Read all delta file envelopes: {len(delta_file_envelopes)} "
-        f"and total_size_bytes={total_size_bytes} and records={total_record_count}"
-    )
+        logger.info(
+            f"Read all delta file envelopes: {len(delta_file_envelopes)} "
+            f"and total_size_bytes={total_size_bytes} and records={total_record_count}"
+        )
 
     # group the data by primary key hash value
+    logger.info(
+        f"Grouping by pk hash bucket using {hash_bucket_thread_count} thread(s) "
+        f"and streaming_hash_bucket_enabled={streaming_hash_bucket_enabled}"
+    )
+    group_start = time.monotonic()
+    num_delta_file_envelopes = 0
+    total_record_count = 0
+    total_size_bytes = 0
     hb_to_delta_file_envelopes = np.empty([num_hash_buckets], dtype="object")
-    for dfe in delta_file_envelopes:
-        logger.info("Grouping by pk hash bucket")
-        group_start = time.monotonic()
-        hash_bucket_to_table = group_by_pk_hash_bucket(
-            dfe.table, num_hash_buckets, primary_keys
-        )
-        group_end = time.monotonic()
-        logger.info(f"Grouping took: {group_end - group_start}")
-        for hb, table in enumerate(hash_bucket_to_table):
-            if table:
-                if hb_to_delta_file_envelopes[hb] is None:
-                    hb_to_delta_file_envelopes[hb] = []
-                hb_to_delta_file_envelopes[hb].append(
-                    DeltaFileEnvelope.of(
-                        stream_position=dfe.stream_position,
-                        file_index=dfe.file_index,
-                        delta_type=dfe.delta_type,
-                        table=table,
+    with ThreadPoolExecutor(
+        max_workers=hash_bucket_thread_count
+    ) if hash_bucket_thread_count > 1 else nullcontext() as executor:
+        for dfe in delta_file_envelopes:
+            hash_bucket_to_table = _group_table_by_pk_hash_bucket(
+                dfe.table,
+                num_hash_buckets,
+                primary_keys,
+                pk_hasher_id,
+                executor,
+                hash_bucket_thread_count,
+            )
+            num_delta_file_envelopes += 1
+            total_record_count += len(dfe.table)
+            total_size_bytes += int(dfe.table.nbytes)
+            for hb, table in enumerate(hash_bucket_to_table):
+                if table:
+                    if hb_to_delta_file_envelopes[hb] is None:
+                        hb_to_delta_file_envelopes[hb] = []
+                    hb_to_delta_file_envelopes[hb].append(
+                        DeltaFileEnvelope.of(
+                            stream_position=dfe.stream_position,
+                            file_index=dfe.file_index,
+                            delta_type=dfe.delta_type,
+                            table=table,
+                        )
                     )
-                )
+            # release the input table before the next file is downloaded
+            del dfe, hash_bucket_to_table
+    group_end = time.monotonic()
+    logger.info(
+        f"Grouping {num_delta_file_envelopes} delta file envelopes with "
+        f"total_size_bytes={total_size_bytes} and records={total_record_count} "
+        f"took: {group_end - group_start}"
+    )
+
+    if not num_delta_file_envelopes:
+        return None, 0, 0
+
     return hb_to_delta_file_envelopes, total_record_count, total_size_bytes
 
 
+def _get_hash_bucket_sizes(
+    hash_bucket_object_groups: Optional[np.ndarray], num_hash_buckets: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the size in bytes and record count of the records grouped into
+    each hash bucket.
+    """
+    hash_bucket_size_bytes = np.zeros([num_hash_buckets], dtype="int64")
+    hash_bucket_num_rows = np.zeros([num_hash_buckets], dtype="int64")
+    if hash_bucket_object_groups is None:
+        return hash_bucket_size_bytes, hash_bucket_num_rows
+
+    for hb_index, dfes in enumerate(hash_bucket_object_groups):
+        for dfe in dfes or []:
+            hash_bucket_size_bytes[hb_index] += dfe.table_size_bytes
+            hash_bucket_num_rows[hb_index] += dfe.table_num_rows
+    return hash_bucket_size_bytes, hash_bucket_num_rows
+
+
 @success_metric(name=HASH_BUCKET_SUCCESS_COUNT)
 @failure_metric(name=HASH_BUCKET_FAILURE_COUNT)
 def _timed_hash_bucket(input: HashBucketInput):
@@ -115,12 +244,19 @@ def _timed_hash_bucket(input: HashBucketInput):
             read_kwargs_provider=input.read_kwargs_provider,
             deltacat_storage=input.deltacat_storage,
             deltacat_storage_kwargs=input.deltacat_storage_kwargs,
+            pk_hasher_id=input.pk_hasher_id,
+            hash_bucket_thread_count=input.hash_bucket_thread_count,
+            streaming_hash_bucket_enabled=input.streaming_hash_bucket_enabled,
+        )
+        hash_bucket_size_bytes, hash_bucket_num_rows = _get_hash_bucket_sizes(
+            delta_file_envelope_groups, input.num_hash_buckets
         )
         hash_bucket_group_to_obj_id_tuple = group_hash_bucket_indices(
             hash_bucket_object_groups=delta_file_envelope_groups,
             num_buckets=input.num_hash_buckets,
             num_groups=input.num_hash_groups,
             object_store=input.object_store,
+            hb_index_to_hash_group_index=input.hb_index_to_hash_group_index,
         )
 
         peak_memory_usage_bytes = get_current_process_peak_memory_usage_in_bytes()
@@ -134,6 +270,8 @@ def _timed_hash_bucket(input: HashBucketInput):
             np.double(peak_memory_usage_bytes),
             np.double(0.0),
             np.double(time.time()),
+            hash_bucket_size_bytes,
+            hash_bucket_num_rows,
         )
 
 
@@ -174,4 +312,6 @@ def hash_bucket(input: HashBucketInput) -> HashBucketResult:
             hash_bucket_result[3],
             np.double(emit_metrics_time),
             hash_bucket_result[5],
+            hash_bucket_result[6],
+            hash_bucket_result[7],
         )
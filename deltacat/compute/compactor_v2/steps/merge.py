@@ -5,14 +5,35 @@ import numpy as np
 import pyarrow as pa
 import ray
 import itertools
+import math
+import tempfile
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import pyarrow.compute as pc
 import deltacat.compute.compactor_v2.utils.merge as merge_utils
 from uuid import uuid4
 from deltacat import logs
-from typing import Callable, Iterator, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from deltacat.compute.compactor_v2.model.merge_result import MergeResult
 from deltacat.compute.compactor_v2.model.merge_file_group import MergeFileGroup
+from deltacat.compute.compactor_v2.model.deletion_vector import (
+    DeletionVector,
+    get_deleted_record_count,
+)
+from deltacat.compute.compactor_v2.utils.deletion_vector_file import (
+    apply_deletion_vector,
+    read_deleted_records,
+    store_deletion_vector,
+)
+from deltacat.compute.compactor_v2.model.pk_bloom_filter import (
+    PkBloomFilterFile,
+    pk_bloom_filter_keys,
+)
+from deltacat.compute.compactor_v2.utils.pk_bloom_filter_file import (
+    read_pk_bloom_filter_file,
+)
+from deltacat.compute.compactor_v2.utils.pk_hasher import get_pk_hasher
 from deltacat.compute.compactor.model.materialize_result import MaterializeResult
 from deltacat.compute.compactor.model.pyarrow_write_result import PyArrowWriteResult
 from deltacat.compute.compactor import RoundCompletionInfo, DeltaFileEnvelope
@@ -23,6 +44,9 @@ from deltacat.utils.ray_utils.runtime import (
     get_current_ray_worker_id,
 )
 from deltacat.compute.compactor.utils import system_columns as sc
+from deltacat.compute.compactor_v2.deletes.delete_strategy_deletion_vector import (
+    DeletionVectorDeleteStrategy,
+)
 from deltacat.utils.performance import timed_invocation
 from deltacat.utils.metrics import emit_timer_metrics, failure_metric, success_metric
 from deltacat.utils.resources import (
@@ -37,15 +61,33 @@ from deltacat.storage import (
     DeltaLocator,
     DeltaType,
     Manifest,
+    ManifestEntry,
+    ManifestMeta,
     Partition,
+    SortKey,
     interface as unimplemented_deltacat_storage,
 )
 from deltacat.compute.compactor_v2.utils.dedupe import drop_duplicates
+from deltacat.compute.compactor_v2.utils.spill import (
+    read_spill_files,
+    spill_by_pk_hash_sub_range,
+)
+from deltacat.compute.compactor_v2.utils.sort_merge import (
+    can_sort_merge,
+    merge_sorted_by,
+    sort_merge_tables,
+)
 from deltacat.constants import BYTES_PER_GIBIBYTE
 from deltacat.compute.compactor_v2.constants import (
     MERGE_TIME_IN_SECONDS,
     MERGE_SUCCESS_COUNT,
     MERGE_FAILURE_COUNT,
+    MERGE_PREFETCH_THREAD_COUNT,
+    PARQUET_TO_PYARROW_INFLATION,
+    PK_HASHER_ID,
+)
+from deltacat.compute.compactor_v2.utils.task_options import (
+    estimate_manifest_entry_size_bytes,
 )
 
 
@@ -106,12 +148,18 @@ def _merge_tables(
     primary_keys: List[str],
     can_drop_duplicates: bool,
     compacted_table: Optional[pa.Table] = None,
+    pk_hasher_id: str = PK_HASHER_ID,
+    sort_merge: bool = False,
+    sort_keys: Optional[List[SortKey]] = None,
 ) -> pa.Table:
     """
     Merges the table with compacted table dropping duplicates where necessary.
 
     This method ensures the appropriate deltas of types [UPSERT] are correctly
-    appended to the table.
+    appended to the table. If sort merge is enabled, the result is sorted by
+    primary key hash and merged with a compacted table sorted the same way
+    without building hash tables of either. If sort keys are given, the table
+    must be sorted by them and the result is sorted by them too.
     """
 
     all_tables = []
@@ -132,14 +180,26 @@ def _merge_tables(
             all_tables[incremental_idx], DeltaType.DELETE
         )
         # we need not drop duplicates
-        return pa.concat_tables(all_tables)
+        return _concat_tables(all_tables, sort_keys)
 
-    all_tables = generate_pk_hash_column(all_tables, primary_keys=primary_keys)
+    all_tables = generate_pk_hash_column(
+        all_tables, primary_keys=primary_keys, pk_hasher_id=pk_hasher_id
+    )
+
+    if sort_merge and all(
+        can_sort_merge(table, sc._PK_HASH_COLUMN_NAME) for table in all_tables
+    ):
+        final_table = sort_merge_tables(
+            all_tables[0] if compacted_table else None,
+            all_tables[incremental_idx],
+            on=sc._PK_HASH_COLUMN_NAME,
+        )
+        return final_table.drop([sc._PK_HASH_COLUMN_NAME])
 
     result_table_list = []
 
     incremental_table = drop_duplicates(
-        all_tables[incremental_idx], on=sc._PK_HASH_STRING_COLUMN_NAME
+        all_tables[incremental_idx], on=sc._PK_HASH_COLUMN_NAME
     )
 
     if compacted_table:
@@ -147,8 +207,8 @@ def _merge_tables(
 
         records_to_keep = pc.invert(
             pc.is_in(
-                compacted_table[sc._PK_HASH_STRING_COLUMN_NAME],
-                incremental_table[sc._PK_HASH_STRING_COLUMN_NAME],
+                compacted_table[sc._PK_HASH_COLUMN_NAME],
+                incremental_table[sc._PK_HASH_COLUMN_NAME],
             )
         )
 
@@ -157,44 +217,116 @@ def _merge_tables(
     incremental_table = _drop_delta_type_rows(incremental_table, DeltaType.DELETE)
     result_table_list.append(incremental_table)
 
-    final_table = pa.concat_tables(result_table_list)
-    final_table = final_table.drop([sc._PK_HASH_STRING_COLUMN_NAME])
+    final_table = _concat_tables(result_table_list, sort_keys)
+    final_table = final_table.drop([sc._PK_HASH_COLUMN_NAME])
 
     return final_table
 
 
+def _concat_tables(
+    tables: List[pa.Table], sort_keys: Optional[List[SortKey]] = None
+) -> pa.Table:
+    """
+    Concatenates the compacted and incremental tables. If sort keys are given,
+    the tables are merged into a table sorted by them. A compacted table kept
+    sorted by the previous round is merged with the sorted incremental table
+    in linear time instead of sorting all records again.
+    """
+    if not sort_keys or len(tables) < 2:
+        return pa.concat_tables(tables)
+
+    result = merge_sorted_by(tables, sort_keys)
+    if result is None:
+        logger.info(
+            f"Sort keys {sort_keys} hold nulls or NaNs. Sorting the merged table."
+        )
+        result = pa.concat_tables(tables).sort_by(sort_keys)
+    return result
+
+
 def _download_compacted_table(
     hb_index: int,
     rcf: RoundCompletionInfo,
     read_kwargs_provider: Optional[ReadKwargsProvider] = None,
     deltacat_storage=unimplemented_deltacat_storage,
     deltacat_storage_kwargs: Optional[dict] = None,
+    entry_indices: Optional[List[int]] = None,
+    compacted_delta_manifest: Optional[Manifest] = None,
+    s3_client_kwargs: Optional[Dict[str, Any]] = None,
 ) -> pa.Table:
+    """
+    Downloads the compacted manifest entries of the given hash bucket, or only
+    the given entry indices of the hash bucket if specified. Records deleted by
+    the deletion vectors of the entries in the given compacted delta manifest
+    are dropped.
+    """
     tables = []
     hb_index_to_indices = rcf.hb_index_to_entry_range
 
     if str(hb_index) not in hb_index_to_indices:
         return None
 
-    indices = hb_index_to_indices[str(hb_index)]
+    if entry_indices is None:
+        indices = hb_index_to_indices[str(hb_index)]
+
+        assert (
+            indices is not None and len(indices) == 2
+        ), "indices should not be none and contains exactly two elements"
 
-    assert (
-        indices is not None and len(indices) == 2
-    ), "indices should not be none and contains exactly two elements"
+        entry_indices = range(indices[0], indices[1])
 
-    for offset in range(indices[1] - indices[0]):
+    for entry_index in entry_indices:
         table = deltacat_storage.download_delta_manifest_entry(
             rcf.compacted_delta_locator,
-            entry_index=(indices[0] + offset),
+            entry_index=entry_index,
             file_reader_kwargs_provider=read_kwargs_provider,
             **deltacat_storage_kwargs,
         )
+        if compacted_delta_manifest is not None:
+            table = apply_deletion_vector(
+                table,
+                compacted_delta_manifest.entries[entry_index],
+                **(s3_client_kwargs or {}),
+            )
 
         tables.append(table)
 
+    if not tables:
+        return None
+
     return pa.concat_tables(tables)
 
 
+def _materialize_entries_by_reference(
+    manifest_entries: List[ManifestEntry],
+    hb_index: int,
+    write_to_partition: Partition,
+) -> MaterializeResult:
+    manifest = Manifest.of(entries=manifest_entries, uuid=str(uuid4()))
+    # records deleted by deletion vectors are not records of the new delta
+    manifest.meta["record_count"] -= get_deleted_record_count(manifest_entries)
+    delta = Delta.of(
+        locator=DeltaLocator.of(write_to_partition.locator),
+        delta_type=DeltaType.UPSERT,
+        meta=manifest.meta,
+        manifest=manifest,
+        previous_stream_position=write_to_partition.stream_position,
+        properties={},
+    )
+    referenced_pyarrow_write_result = PyArrowWriteResult.of(
+        len(manifest_entries),
+        manifest.meta.source_content_length,
+        manifest.meta.content_length,
+        manifest.meta.record_count,
+    )
+    return MaterializeResult.of(
+        delta=delta,
+        task_index=hb_index,
+        pyarrow_write_result=referenced_pyarrow_write_result,
+        referenced_pyarrow_write_result=referenced_pyarrow_write_result,
+    )
+
+
 def _copy_all_manifest_files_from_old_hash_buckets(
     hb_index_copy_by_reference: List[int],
     round_completion_info: RoundCompletionInfo,
@@ -208,7 +340,6 @@ def _copy_all_manifest_files_from_old_hash_buckets(
         compacted_delta_locator, **deltacat_storage_kwargs
     )
 
-    manifest_entry_referenced_list = []
     materialize_result_list = []
     hb_index_to_indices = round_completion_info.hb_index_to_entry_range
 
@@ -220,6 +351,7 @@ def _copy_all_manifest_files_from_old_hash_buckets(
         if str(hb_index) not in hb_index_to_indices:
             continue
 
+        manifest_entry_referenced_list = []
         indices = hb_index_to_indices[str(hb_index)]
         for offset in range(indices[1] - indices[0]):
             entry_index = indices[0] + offset
@@ -229,31 +361,185 @@ def _copy_all_manifest_files_from_old_hash_buckets(
             manifest_entry = manifest.entries[entry_index]
             manifest_entry_referenced_list.append(manifest_entry)
 
-        manifest = Manifest.of(
-            entries=manifest_entry_referenced_list, uuid=str(uuid4())
+        materialize_result_list.append(
+            _materialize_entries_by_reference(
+                manifest_entry_referenced_list, hb_index, write_to_partition
+            )
         )
-        delta = Delta.of(
-            locator=DeltaLocator.of(write_to_partition.locator),
-            delta_type=DeltaType.UPSERT,
-            meta=manifest.meta,
-            manifest=manifest,
-            previous_stream_position=write_to_partition.stream_position,
-            properties={},
+    return materialize_result_list
+
+
+def _can_skip_unaffected_compacted_entries(has_delete: bool, input: MergeInput) -> bool:
+    """
+    Compacted files without any incremental primary key can only be skipped
+    when incremental records replace compacted records by primary key and
+    there are no deletes to apply to every compacted record.
+    """
+    return (
+        (input.pk_bloom_filter_enabled or input.two_phase_merge_enabled)
+        and not has_delete
+        and bool(input.primary_keys)
+        and input.drop_duplicates
+    )
+
+
+def _split_compacted_entries_by_pk_bloom_filter(
+    input: MergeInput,
+    merge_file_group: MergeFileGroup,
+    compacted_delta_manifest: Manifest,
+) -> Optional[Tuple[List[int], List[int]]]:
+    """
+    Splits the compacted manifest entry indices of the hash bucket into the
+    entries that may contain an incremental primary key and must be rewritten,
+    and the entries that contain none of them and can be copied by reference.
+    Returns None if any entry has no primary key bloom filter file of the
+    current primary keys and primary key hasher, or its file cannot be read.
+    """
+    start, end = input.round_completion_info.hb_index_to_entry_range[
+        str(merge_file_group.hb_index)
+    ]
+    pk_hasher = get_pk_hasher(input.pk_hasher_id)
+    entry_bloom_filter_files = []
+    for entry_index in range(start, end):
+        meta = compacted_delta_manifest.entries[entry_index].meta
+        if meta is None or meta.pk_bloom_filter_file is None:
+            return None
+        bloom_filter_file = PkBloomFilterFile(meta.pk_bloom_filter_file)
+        if not bloom_filter_file.is_compatible(
+            input.primary_keys, pk_hasher.id, pk_hasher.version
+        ):
+            return None
+        entry_bloom_filter_files.append((entry_index, bloom_filter_file))
+
+    entry_bloom_filters = []
+    for entry_index, bloom_filter_file in entry_bloom_filter_files:
+        bloom_filter = read_pk_bloom_filter_file(
+            bloom_filter_file, **input.s3_client_kwargs
         )
-        referenced_pyarrow_write_result = PyArrowWriteResult.of(
-            len(manifest_entry_referenced_list),
-            manifest.meta.source_content_length,
-            manifest.meta.content_length,
-            manifest.meta.record_count,
+        if bloom_filter is None:
+            return None
+        entry_bloom_filters.append((entry_index, bloom_filter))
+
+    incremental_keys = [
+        pk_bloom_filter_keys(dfe.table, input.primary_keys, input.pk_hasher_id)
+        for dfe in _flatten_dfe_list(merge_file_group.dfe_groups)
+    ]
+    incremental_keys = (
+        np.concatenate(incremental_keys)
+        if incremental_keys
+        else np.empty(0, dtype=np.uint64)
+    )
+
+    rewrite_entry_indices, referenced_entry_indices = [], []
+    for entry_index, bloom_filter in entry_bloom_filters:
+        if bloom_filter.might_contain_any(incremental_keys):
+            rewrite_entry_indices.append(entry_index)
+        else:
+            referenced_entry_indices.append(entry_index)
+
+    logger.info(
+        f"[Hash bucket index {merge_file_group.hb_index}] Rewriting "
+        f"{len(rewrite_entry_indices)} and copying {len(referenced_entry_indices)}"
+        f" compacted files by reference based on primary key bloom filters"
+    )
+    return rewrite_entry_indices, referenced_entry_indices
+
+
+def _split_compacted_entries_by_primary_keys(
+    input: MergeInput,
+    merge_file_group: MergeFileGroup,
+    entry_indices: List[int],
+) -> Tuple[List[int], List[int]]:
+    """
+    Reads only the primary key columns of the given compacted manifest entries
+    and splits them into the entries that contain an incremental primary key
+    and must be rewritten, and the entries that contain none of them and can be
+    copied by reference. Records are last-writer-wins by primary key, so the
+    primary keys alone decide which compacted records are replaced.
+    """
+    incremental_key_tables = [
+        dfe.table.select(input.primary_keys)
+        for dfe in _flatten_dfe_list(merge_file_group.dfe_groups)
+    ]
+    if not incremental_key_tables:
+        return [], entry_indices
+
+    compacted_key_tables = []
+    for entry_index in entry_indices:
+        compacted_key_tables.append(
+            input.deltacat_storage.download_delta_manifest_entry(
+                input.round_completion_info.compacted_delta_locator,
+                entry_index=entry_index,
+                columns=input.primary_keys,
+                file_reader_kwargs_provider=input.read_kwargs_provider,
+                **input.deltacat_storage_kwargs,
+            )
         )
-        materialize_result = MaterializeResult.of(
-            delta=delta,
-            task_index=hb_index,
-            pyarrow_write_result=referenced_pyarrow_write_result,
-            referenced_pyarrow_write_result=referenced_pyarrow_write_result,
+    incremental_key_table = pa.concat_tables(incremental_key_tables)
+
+    # hash all key tables together so that every table uses the same pk hash
+    all_key_tables = generate_pk_hash_column(
+        compacted_key_tables + [incremental_key_table],
+        primary_keys=input.primary_keys,
+        pk_hasher_id=input.pk_hasher_id,
+    )
+    incremental_pk_hashes = sc.pk_hash_column(all_key_tables[-1])
+
+    rewrite_entry_indices, referenced_entry_indices = [], []
+    affected_record_count = 0
+    for entry_index, key_table in zip(entry_indices, all_key_tables[:-1]):
+        affected_records = pc.sum(
+            pc.is_in(sc.pk_hash_column(key_table), value_set=incremental_pk_hashes)
+        ).as_py()
+        if affected_records:
+            rewrite_entry_indices.append(entry_index)
+            affected_record_count += affected_records
+        else:
+            referenced_entry_indices.append(entry_index)
+
+    logger.info(
+        f"[Hash bucket index {merge_file_group.hb_index}] Found "
+        f"{affected_record_count} compacted records replaced by incremental "
+        f"records in {len(rewrite_entry_indices)} of {len(entry_indices)} files"
+    )
+    return rewrite_entry_indices, referenced_entry_indices
+
+
+def _split_compacted_entries(
+    input: MergeInput,
+    merge_file_group: MergeFileGroup,
+    compacted_delta_manifest: Manifest,
+) -> Tuple[List[int], List[int]]:
+    """
+    Splits the compacted manifest entry indices of the hash bucket into the
+    entries to rewrite and the entries to copy by reference. Primary key bloom
+    filters rule out files first, and the primary keys of the remaining files
+    are read to rule out false positives in a two phase merge.
+    """
+    start, end = input.round_completion_info.hb_index_to_entry_range[
+        str(merge_file_group.hb_index)
+    ]
+    rewrite_entry_indices, referenced_entry_indices = list(range(start, end)), []
+
+    if input.pk_bloom_filter_enabled:
+        split_entry_indices = _split_compacted_entries_by_pk_bloom_filter(
+            input, merge_file_group, compacted_delta_manifest
+        )
+        if split_entry_indices is not None:
+            rewrite_entry_indices, referenced_entry_indices = split_entry_indices
+
+    if input.two_phase_merge_enabled and rewrite_entry_indices:
+        (
+            rewrite_entry_indices,
+            unaffected_entry_indices,
+        ) = _split_compacted_entries_by_primary_keys(
+            input, merge_file_group, rewrite_entry_indices
+        )
+        referenced_entry_indices = sorted(
+            referenced_entry_indices + unaffected_entry_indices
         )
-        materialize_result_list.append(materialize_result)
-    return materialize_result_list
+
+    return rewrite_entry_indices, referenced_entry_indices
 
 
 def _has_previous_compacted_table(input: MergeInput, hb_idx: int) -> bool:
@@ -425,6 +711,581 @@ def _compact_tables(
     )
 
 
+def _prepare_compacted_table(
+    input: MergeInput,
+    merge_file_group: MergeFileGroup,
+    has_delete: bool,
+    compacted_delta_manifest: Optional[Manifest],
+) -> Tuple[Optional[pa.Table], List[int]]:
+    """
+    Downloads the previously compacted table of the hash bucket to merge with
+    its incremental records. Returns the table along with the indices of the
+    compacted manifest entries of the hash bucket to copy by reference instead.
+    """
+    compacted_table = None
+    referenced_entry_indices = []
+    if _has_previous_compacted_table(input, merge_file_group.hb_index):
+        rewrite_entry_indices = None
+        if _can_skip_unaffected_compacted_entries(has_delete, input):
+            rewrite_entry_indices, referenced_entry_indices = _split_compacted_entries(
+                input, merge_file_group, compacted_delta_manifest
+            )
+        compacted_table = _download_compacted_table(
+            hb_index=merge_file_group.hb_index,
+            rcf=input.round_completion_info,
+            read_kwargs_provider=input.read_kwargs_provider,
+            deltacat_storage=input.deltacat_storage,
+            deltacat_storage_kwargs=input.deltacat_storage_kwargs,
+            entry_indices=rewrite_entry_indices,
+            compacted_delta_manifest=compacted_delta_manifest,
+            s3_client_kwargs=input.s3_client_kwargs,
+        )
+    return compacted_table, referenced_entry_indices
+
+
+def _estimate_compacted_table_size_bytes(
+    input: MergeInput,
+    hb_index: int,
+    compacted_delta_manifest: Optional[Manifest],
+) -> float:
+    if compacted_delta_manifest is None or not _has_previous_compacted_table(
+        input, hb_index
+    ):
+        return 0.0
+
+    start, end = input.round_completion_info.hb_index_to_entry_range[str(hb_index)]
+    return sum(
+        estimate_manifest_entry_size_bytes(
+            compacted_delta_manifest.entries[entry_index],
+            PARQUET_TO_PYARROW_INFLATION,
+        )
+        for entry_index in range(start, end)
+    )
+
+
+def _iterate_within_memory_budget(
+    func: Callable,
+    items: List,
+    estimated_sizes_bytes: List[float],
+    memory_budget_bytes: float,
+    max_workers: int,
+) -> Iterator[Tuple]:
+    """
+    Yields each item with the result of calling func on it, in order, while
+    func runs on upcoming items in a thread pool. Items are submitted as long
+    as the estimated size of all items submitted but not yet consumed fits in
+    the memory budget, and at least one item is always submitted. The size of
+    an item is released once the caller has consumed it.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        pending_size_bytes = 0.0
+        next_index = 0
+        max_depth = 0
+        while next_index < len(items) or pending:
+            while next_index < len(items) and (
+                not pending
+                or pending_size_bytes + estimated_sizes_bytes[next_index]
+                <= memory_budget_bytes
+            ):
+                future = executor.submit(func, items[next_index])
+                pending.append(
+                    (items[next_index], future, estimated_sizes_bytes[next_index])
+                )
+                pending_size_bytes += estimated_sizes_bytes[next_index]
+                next_index += 1
+            max_depth = max(max_depth, len(pending))
+
+            item, future, size_bytes = pending.popleft()
+            yield item, future.result()
+            pending_size_bytes -= size_bytes
+
+    logger.info(
+        f"Ran {len(items)} items with {max_workers} threads, a max depth of "
+        f"{max_depth} and memory budget of {memory_budget_bytes} bytes"
+    )
+
+
+def _iterate_compacted_tables(
+    input: MergeInput,
+    merge_file_groups: List[MergeFileGroup],
+    has_delete: bool,
+    compacted_delta_manifest: Optional[Manifest],
+) -> Iterator[Tuple[MergeFileGroup, Optional[pa.Table], List[int]]]:
+    """
+    Yields each merge file group with its previously compacted table and the
+    compacted manifest entry indices to copy by reference, in order.
+
+    If a merge prefetch memory budget is set, the compacted tables of upcoming
+    hash buckets are downloaded in background threads while the current hash
+    bucket is merged and materialized. Hash buckets are prefetched as long as
+    the estimated in-memory size of all compacted tables downloaded but not yet
+    merged fits in the budget.
+    """
+    memory_budget_bytes = input.merge_prefetch_memory_budget_bytes
+    if not memory_budget_bytes:
+        for merge_file_group in merge_file_groups:
+            yield (
+                merge_file_group,
+                *_prepare_compacted_table(
+                    input, merge_file_group, has_delete, compacted_delta_manifest
+                ),
+            )
+        return
+
+    for merge_file_group, prepared in _iterate_within_memory_budget(
+        lambda merge_file_group: _prepare_compacted_table(
+            input, merge_file_group, has_delete, compacted_delta_manifest
+        ),
+        merge_file_groups,
+        [
+            _estimate_compacted_table_size_bytes(
+                input, merge_file_group.hb_index, compacted_delta_manifest
+            )
+            for merge_file_group in merge_file_groups
+        ],
+        memory_budget_bytes,
+        MERGE_PREFETCH_THREAD_COUNT,
+    ):
+        yield (merge_file_group, *prepared)
+
+
+def _compact_hash_bucket(
+    input: MergeInput,
+    merge_file_group: MergeFileGroup,
+    compacted_table: Optional[pa.Table],
+) -> Optional[Tuple[pa.Table, int, int, int]]:
+    """
+    Merges the incremental records of a hash bucket into its previously
+    compacted table. Returns the merged table with the input, deduped and
+    dropped record counts, or None if the hash bucket has nothing to merge.
+    """
+    if not merge_file_group.dfe_groups and compacted_table is None:
+        logger.warning(
+            f" [Hash bucket index {merge_file_group.hb_index}]"
+            + f" No new deltas and no compacted table found. Skipping compaction for {merge_file_group.hb_index}"
+        )
+        return None
+    return _compact_tables(
+        input,
+        merge_file_group.dfe_groups,
+        merge_file_group.hb_index,
+        compacted_table,
+    )
+
+
+def _materialize_merged_tables(
+    input: MergeInput,
+    hb_index: int,
+    tables: Iterable[pa.Table],
+) -> List[MaterializeResult]:
+    """
+    Materializes the merged tables of a hash bucket. If streaming materialize
+    is enabled, records are written to output files as each table is merged,
+    rolling to a new file every max records per output file, and file uploads
+    overlap with merging the next table. Otherwise each table is materialized
+    on its own.
+    """
+
+    def bloom_filter_keys(table: pa.Table) -> Optional[np.ndarray]:
+        if input.pk_bloom_filter_enabled and input.primary_keys:
+            return pk_bloom_filter_keys(table, input.primary_keys, input.pk_hasher_id)
+        return None
+
+    if not input.streaming_materialize_enabled:
+        return [
+            merge_utils.materialize(input, hb_index, [table], bloom_filter_keys(table))
+            for table in tables
+        ]
+
+    materializer = merge_utils.StreamingMaterializer(input, hb_index)
+    empty_table = None
+    for table in tables:
+        if not len(table):
+            empty_table = table
+            continue
+        materializer.append(table, bloom_filter_keys(table))
+    materialize_results = materializer.close()
+    if not materialize_results and empty_table is not None:
+        # all records of the hash bucket were deleted
+        materialize_results = [merge_utils.materialize(input, hb_index, [empty_table])]
+    return materialize_results
+
+
+def _union_hash_bucket_results(
+    input: MergeInput,
+    hb_index: int,
+    materialize_results: List[MaterializeResult],
+    referenced_entry_indices: List[int],
+    compacted_delta_manifest: Optional[Manifest],
+) -> Optional[MaterializeResult]:
+    """
+    Unions the materialize results of a hash bucket, along with its compacted
+    manifest entries copied by reference, into a single materialize result.
+    """
+    # empty deltas are only kept if the hash bucket has no other files
+    materialize_results = [
+        materialize_result
+        for materialize_result in materialize_results
+        if materialize_result.delta.manifest.entries
+    ] or (materialize_results[:1] if not referenced_entry_indices else [])
+    if referenced_entry_indices:
+        materialize_results.insert(
+            0,
+            _materialize_entries_by_reference(
+                [
+                    compacted_delta_manifest.entries[entry_index]
+                    for entry_index in referenced_entry_indices
+                ],
+                hb_index,
+                input.write_to_partition,
+            ),
+        )
+    if not materialize_results:
+        return None
+    return merge_utils.union_materialize_results(materialize_results)
+
+
+def _merge_hash_bucket(
+    input: MergeInput,
+    merge_file_group: MergeFileGroup,
+    compacted_table: Optional[pa.Table],
+    referenced_entry_indices: List[int],
+    compacted_delta_manifest: Optional[Manifest],
+) -> Optional[Tuple[MaterializeResult, int, int, int]]:
+    """
+    Merges the incremental records of a hash bucket into its previously
+    compacted table and materializes the result. Returns the materialize
+    result with the input, deduped and dropped record counts, or None if the
+    hash bucket has nothing to merge.
+    """
+    compact_result = _compact_hash_bucket(input, merge_file_group, compacted_table)
+    if compact_result is None:
+        return None
+    table, input_records, deduped_records, dropped_records = compact_result
+    materialize_results = _materialize_merged_tables(
+        input, merge_file_group.hb_index, [table]
+    )
+    return (
+        _union_hash_bucket_results(
+            input,
+            merge_file_group.hb_index,
+            materialize_results,
+            referenced_entry_indices,
+            compacted_delta_manifest,
+        ),
+        input_records,
+        deduped_records,
+        dropped_records,
+    )
+
+
+def _estimate_hash_bucket_merge_size_bytes(
+    input: MergeInput,
+    merge_file_group: MergeFileGroup,
+    compacted_delta_manifest: Optional[Manifest],
+) -> float:
+    """
+    Estimates the peak memory needed to merge a hash bucket as twice the
+    in-memory size of its compacted and incremental tables, since the merged
+    table is held alongside its inputs until it is materialized.
+    """
+    incremental_size_bytes = sum(
+        dfe.table.nbytes for dfe in _flatten_dfe_list(merge_file_group.dfe_groups)
+    )
+    return 2 * (
+        incremental_size_bytes
+        + _estimate_compacted_table_size_bytes(
+            input, merge_file_group.hb_index, compacted_delta_manifest
+        )
+    )
+
+
+def _merge_hash_buckets_concurrently(
+    input: MergeInput,
+    merge_file_groups: List[MergeFileGroup],
+    has_delete: bool,
+    compacted_delta_manifest: Optional[Manifest],
+) -> Iterator[Optional[Tuple[MaterializeResult, int, int, int]]]:
+    """
+    Merges hash buckets in a pool of merge_thread_count threads, yielding the
+    result of each hash bucket in order. Hash buckets are only merged
+    concurrently while their estimated merge memory fits in the memory
+    requested for the merge task. Compacted tables are downloaded by the same
+    threads, so a merge prefetch memory budget is not used.
+    """
+    memory_budget_bytes = input.merge_task_memory_bytes or float("inf")
+
+    def prepare_and_merge(merge_file_group: MergeFileGroup):
+        return _merge_hash_bucket(
+            input,
+            merge_file_group,
+            *_prepare_compacted_table(
+                input, merge_file_group, has_delete, compacted_delta_manifest
+            ),
+            compacted_delta_manifest,
+        )
+
+    for _, result in _iterate_within_memory_budget(
+        prepare_and_merge,
+        merge_file_groups,
+        [
+            _estimate_hash_bucket_merge_size_bytes(
+                input, merge_file_group, compacted_delta_manifest
+            )
+            for merge_file_group in merge_file_groups
+        ],
+        memory_budget_bytes,
+        input.merge_thread_count,
+    ):
+        yield result
+
+
+def _spill_sub_range_count(
+    input: MergeInput,
+    merge_file_group: MergeFileGroup,
+    compacted_delta_manifest: Optional[Manifest],
+) -> int:
+    """
+    Returns the number of primary key hash sub-ranges to merge the hash bucket
+    in, so that the estimated merge memory of each sub-range fits in the
+    memory requested for the merge task. Returns 1 if the hash bucket fits or
+    spill merge does not apply. Hash buckets with sort keys are not spilled,
+    since sub-ranges would only be sorted within themselves.
+    """
+    if (
+        not input.merge_spill_enabled
+        or not input.merge_task_memory_bytes
+        or not input.primary_keys
+        or input.sort_keys
+    ):
+        return 1
+
+    estimated_size_bytes = _estimate_hash_bucket_merge_size_bytes(
+        input, merge_file_group, compacted_delta_manifest
+    )
+    return max(1, math.ceil(estimated_size_bytes / input.merge_task_memory_bytes))
+
+
+def _merge_hash_bucket_with_spill(
+    input: MergeInput,
+    merge_file_group: MergeFileGroup,
+    has_delete: bool,
+    compacted_delta_manifest: Optional[Manifest],
+    sub_range_count: int,
+) -> Optional[Tuple[MaterializeResult, int, int, int]]:
+    """
+    Merges a hash bucket too large to merge in memory. Compacted files are
+    downloaded one at a time and, along with the incremental tables, split by
+    primary key hash sub-range into local Arrow IPC spill files. Sub-ranges are
+    then merged and materialized one at a time, since records of the same
+    primary key always fall in the same sub-range.
+    """
+    hb_index = merge_file_group.hb_index
+    logger.info(
+        f"[Hash bucket index {hb_index}] Merging in {sub_range_count} "
+        f"primary key hash sub-ranges spilled to local disk"
+    )
+    with tempfile.TemporaryDirectory(prefix=f"merge_spill_{hb_index}_") as spill_dir:
+        compacted_paths = [[] for _ in range(sub_range_count)]
+        referenced_entry_indices = []
+        if _has_previous_compacted_table(input, hb_index):
+            start, end = input.round_completion_info.hb_index_to_entry_range[
+                str(hb_index)
+            ]
+            rewrite_entry_indices = range(start, end)
+            if _can_skip_unaffected_compacted_entries(has_delete, input):
+                (
+                    rewrite_entry_indices,
+                    referenced_entry_indices,
+                ) = _split_compacted_entries(
+                    input, merge_file_group, compacted_delta_manifest
+                )
+            for entry_index in rewrite_entry_indices:
+                table = input.deltacat_storage.download_delta_manifest_entry(
+                    input.round_completion_info.compacted_delta_locator,
+                    entry_index=entry_index,
+                    file_reader_kwargs_provider=input.read_kwargs_provider,
+                    **input.deltacat_storage_kwargs,
+                )
+                if compacted_delta_manifest is not None:
+                    table = apply_deletion_vector(
+                        table,
+                        compacted_delta_manifest.entries[entry_index],
+                        **input.s3_client_kwargs,
+                    )
+                for sub_range, path in enumerate(
+                    spill_by_pk_hash_sub_range(
+                        table,
+                        input.primary_keys,
+                        sub_range_count,
+                        spill_dir,
+                        f"compacted_{entry_index}",
+                        input.pk_hasher_id,
+                    )
+                ):
+                    if path:
+                        compacted_paths[sub_range].append(path)
+                del table
+
+        incremental_dfes = [[] for _ in range(sub_range_count)]
+        for dfe_index, dfe in enumerate(_flatten_dfe_list(merge_file_group.dfe_groups)):
+            for sub_range, path in enumerate(
+                spill_by_pk_hash_sub_range(
+                    dfe.table,
+                    input.primary_keys,
+                    sub_range_count,
+                    spill_dir,
+                    f"incremental_{dfe_index}",
+                    input.pk_hasher_id,
+                )
+            ):
+                if path:
+                    incremental_dfes[sub_range].append((dfe, path))
+
+        record_counts = [0, 0, 0]
+
+        def merge_sub_ranges() -> Iterator[pa.Table]:
+            for sub_range in range(sub_range_count):
+                if not compacted_paths[sub_range] and not incremental_dfes[sub_range]:
+                    continue
+                dfe_list = [
+                    DeltaFileEnvelope.of(
+                        stream_position=dfe.stream_position,
+                        delta_type=dfe.delta_type,
+                        table=read_spill_files([path]),
+                        file_index=dfe.file_index,
+                        is_src_delta=dfe.is_src_delta,
+                        file_record_count=dfe.file_record_count,
+                    )
+                    for dfe, path in incremental_dfes[sub_range]
+                ]
+                compact_result = _compact_hash_bucket(
+                    input,
+                    MergeFileGroup.of(hb_index, [dfe_list] if dfe_list else None),
+                    read_spill_files(compacted_paths[sub_range]),
+                )
+                if compact_result is None:
+                    continue
+                table, *sub_range_record_counts = compact_result
+                for i, record_count in enumerate(sub_range_record_counts):
+                    record_counts[i] += record_count
+                yield table
+
+        materialize_results = _materialize_merged_tables(
+            input, hb_index, merge_sub_ranges()
+        )
+
+    materialize_result = _union_hash_bucket_results(
+        input,
+        hb_index,
+        materialize_results,
+        referenced_entry_indices,
+        compacted_delta_manifest,
+    )
+    if materialize_result is None:
+        return None
+    return (materialize_result, *record_counts)
+
+
+def _can_apply_deletion_vectors(
+    has_delete: bool, merge_file_group: MergeFileGroup, input: MergeInput
+) -> bool:
+    """
+    Deletes are recorded in deletion vectors of the compacted files of a hash
+    bucket instead of rewriting them only if the hash bucket has no new upserts
+    and its compacted files can be copied by reference to the new stream.
+    """
+    return (
+        has_delete
+        and isinstance(input.delete_strategy, DeletionVectorDeleteStrategy)
+        and not merge_file_group.dfe_groups
+        and _has_previous_compacted_table(input, merge_file_group.hb_index)
+        and (
+            input.write_to_partition.stream_id
+            == input.round_completion_info.compacted_delta_locator.stream_id
+        )
+    )
+
+
+def _with_deletion_vector(
+    manifest_entry: ManifestEntry, deletion_vector: DeletionVector
+) -> ManifestEntry:
+    manifest_entry = ManifestEntry(manifest_entry)
+    manifest_entry["meta"] = meta = ManifestMeta(manifest_entry.meta)
+    meta.deletion_vector = deletion_vector
+    return manifest_entry
+
+
+def _merge_hash_bucket_with_deletion_vectors(
+    input: MergeInput,
+    merge_file_group: MergeFileGroup,
+    compacted_delta_manifest: Manifest,
+) -> Optional[Tuple[MaterializeResult, int, int, int]]:
+    """
+    Applies deletes to a hash bucket with no new upserts without rewriting its
+    compacted files. Only the delete columns of each compacted file are read,
+    and the positions of the records matching a delete are added to the
+    deletion vector of its manifest entry. Compacted files are then copied by
+    reference along with their updated manifest entry meta.
+    """
+    hb_index = merge_file_group.hb_index
+    start, end = input.round_completion_info.hb_index_to_entry_range[str(hb_index)]
+    if start == end:
+        return None
+
+    delete_columns = DeletionVectorDeleteStrategy.delete_columns(
+        input.delete_file_envelopes
+    )
+    manifest_entries = []
+    dropped_records = 0
+    for entry_index in range(start, end):
+        manifest_entry = compacted_delta_manifest.entries[entry_index]
+        delete_column_table = input.deltacat_storage.download_delta_manifest_entry(
+            input.round_completion_info.compacted_delta_locator,
+            entry_index=entry_index,
+            columns=delete_columns,
+            file_reader_kwargs_provider=input.read_kwargs_provider,
+            **input.deltacat_storage_kwargs,
+        )
+        is_deleted = input.delete_strategy.match_deletes(
+            delete_column_table, input.delete_file_envelopes
+        )
+        previously_deleted = read_deleted_records(
+            manifest_entry, **input.s3_client_kwargs
+        )
+        if previously_deleted is not None:
+            newly_deleted_records = np.count_nonzero(is_deleted & ~previously_deleted)
+            is_deleted |= previously_deleted
+        else:
+            newly_deleted_records = np.count_nonzero(is_deleted)
+        if newly_deleted_records:
+            manifest_entry = _with_deletion_vector(
+                manifest_entry,
+                store_deletion_vector(
+                    is_deleted,
+                    input.compaction_artifact_s3_bucket,
+                    input.write_to_partition.locator,
+                    **input.s3_client_kwargs,
+                ),
+            )
+            dropped_records += newly_deleted_records
+        manifest_entries.append(manifest_entry)
+
+    logger.info(
+        f"[Hash bucket index {hb_index}] Recorded {dropped_records} deleted "
+        f"records in the deletion vectors of {len(manifest_entries)} compacted files"
+    )
+    return (
+        _materialize_entries_by_reference(
+            manifest_entries, hb_index, input.write_to_partition
+        ),
+        0,
+        0,
+        dropped_records,
+    )
+
+
 def _apply_upserts(
     input: MergeInput,
     dfe_list: List[DeltaFileEnvelope],
@@ -448,6 +1309,8 @@ def _apply_upserts(
         # on non event based sort key does not produce consistent
         # compaction results. E.g., compaction(delta1, delta2, delta3)
         # will not be equal to compaction(compaction(delta1, delta2), delta3).
+        # The compacted table is kept sorted by the sort keys, so it is merged
+        # with the sorted incremental table rather than sorted again.
         table = table.sort_by(input.sort_keys)
     hb_table_record_count = len(table) + (len(prev_table) if prev_table else 0)
     table, merge_time = timed_invocation(
@@ -456,6 +1319,10 @@ def _apply_upserts(
         primary_keys=input.primary_keys,
         can_drop_duplicates=input.drop_duplicates,
         compacted_table=prev_table,
+        pk_hasher_id=input.pk_hasher_id,
+        # sorting by sort keys takes precedence over the primary key hash layout
+        sort_merge=input.sort_merge_enabled and not input.sort_keys,
+        sort_keys=input.sort_keys,
     )
     deduped_records = hb_table_record_count - len(table)
     return table, incremental_len, deduped_records, merge_time
@@ -497,46 +1364,112 @@ def _timed_merge(input: MergeInput) -> MergeResult:
         materialized_results: List[MaterializeResult] = []
         merge_file_groups = input.merge_file_groups_provider.create()
         hb_index_copy_by_ref_ids = []
+        merge_file_groups_to_merge = []
+        deletion_vector_merge_file_groups = []
+        has_delete = input.delete_file_envelopes is not None
+        if has_delete:
+            assert (
+                input.delete_strategy is not None
+            ), "Merge input missing delete_strategy"
 
         for merge_file_group in merge_file_groups:
-            compacted_table = None
-            has_delete = input.delete_file_envelopes is not None
-            if has_delete:
-                assert (
-                    input.delete_strategy is not None
-                ), "Merge input missing delete_strategy"
             if _can_copy_by_reference(
                 has_delete=has_delete, merge_file_group=merge_file_group, input=input
             ):
                 hb_index_copy_by_ref_ids.append(merge_file_group.hb_index)
                 continue
+            if _can_apply_deletion_vectors(
+                has_delete=has_delete, merge_file_group=merge_file_group, input=input
+            ):
+                deletion_vector_merge_file_groups.append(merge_file_group)
+                continue
+            merge_file_groups_to_merge.append(merge_file_group)
+
+        compacted_delta_manifest = None
+        if input.round_completion_info and (
+            _can_skip_unaffected_compacted_entries(has_delete, input)
+            or input.merge_prefetch_memory_budget_bytes
+            or input.merge_thread_count > 1
+            or input.merge_spill_enabled
+            or input.deletion_vectors_present
+            or deletion_vector_merge_file_groups
+        ):
+            compacted_delta_manifest = input.deltacat_storage.get_delta_manifest(
+                input.round_completion_info.compacted_delta_locator,
+                **input.deltacat_storage_kwargs,
+            )
 
-            if _has_previous_compacted_table(input, merge_file_group.hb_index):
-                compacted_table = _download_compacted_table(
-                    hb_index=merge_file_group.hb_index,
-                    rcf=input.round_completion_info,
-                    read_kwargs_provider=input.read_kwargs_provider,
-                    deltacat_storage=input.deltacat_storage,
-                    deltacat_storage_kwargs=input.deltacat_storage_kwargs,
+        spill_merge_file_groups = []
+        if input.merge_spill_enabled:
+            in_memory_merge_file_groups = []
+            for merge_file_group in merge_file_groups_to_merge:
+                sub_range_count = _spill_sub_range_count(
+                    input, merge_file_group, compacted_delta_manifest
                 )
-            if not merge_file_group.dfe_groups and compacted_table is None:
-                logger.warning(
-                    f" [Hash bucket index {merge_file_group.hb_index}]"
-                    + f" No new deltas and no compacted table found. Skipping compaction for {merge_file_group.hb_index}"
+                if sub_range_count > 1:
+                    spill_merge_file_groups.append((merge_file_group, sub_range_count))
+                else:
+                    in_memory_merge_file_groups.append(merge_file_group)
+            merge_file_groups_to_merge = in_memory_merge_file_groups
+
+        if input.merge_thread_count > 1:
+            hash_bucket_results = _merge_hash_buckets_concurrently(
+                input, merge_file_groups_to_merge, has_delete, compacted_delta_manifest
+            )
+        else:
+            hash_bucket_results = (
+                _merge_hash_bucket(
+                    input,
+                    merge_file_group,
+                    compacted_table,
+                    referenced_entry_indices,
+                    compacted_delta_manifest,
+                )
+                for (
+                    merge_file_group,
+                    compacted_table,
+                    referenced_entry_indices,
+                ) in _iterate_compacted_tables(
+                    input,
+                    merge_file_groups_to_merge,
+                    has_delete,
+                    compacted_delta_manifest,
                 )
-                continue
-            table, input_records, deduped_records, dropped_records = _compact_tables(
-                input,
-                merge_file_group.dfe_groups,
-                merge_file_group.hb_index,
-                compacted_table,
             )
+
+        hash_bucket_results = itertools.chain(
+            hash_bucket_results,
+            (
+                _merge_hash_bucket_with_spill(
+                    input,
+                    merge_file_group,
+                    has_delete,
+                    compacted_delta_manifest,
+                    sub_range_count,
+                )
+                for merge_file_group, sub_range_count in spill_merge_file_groups
+            ),
+            (
+                _merge_hash_bucket_with_deletion_vectors(
+                    input, merge_file_group, compacted_delta_manifest
+                )
+                for merge_file_group in deletion_vector_merge_file_groups
+            ),
+        )
+
+        for hash_bucket_result in hash_bucket_results:
+            if hash_bucket_result is None:
+                continue
+            (
+                materialize_result,
+                input_records,
+                deduped_records,
+                dropped_records,
+            ) = hash_bucket_result
             total_input_records += input_records
             total_deduped_records += deduped_records
             total_dropped_records += dropped_records
-            materialized_results.append(
-                merge_utils.materialize(input, merge_file_group.hb_index, [table])
-            )
+            materialized_results.append(materialize_result)
 
         if hb_index_copy_by_ref_ids:
             materialized_results.extend(
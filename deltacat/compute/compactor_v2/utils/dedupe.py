@@ -4,62 +4,76 @@ import pyarrow.compute as pc
 import pyarrow as pa
 import numpy as np
 from deltacat.utils.performance import timed_invocation
-from deltacat.compute.compactor.utils import system_columns as sc
 
 logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
 
 
-def _create_chunked_index_array(array: pa.Array) -> pa.Array:
+def _last_occurrence_indices(array: pa.ChunkedArray) -> np.ndarray:
     """
-    Creates an chunked array where each chunk is of same size in the input array.
-    """
-    chunk_lengths = [
-        len(array.chunk(chunk_index)) for chunk_index in range(len(array.chunks))
-    ]
-
-    # if all chunk lengths are equal, numpy assumes correct shape
-    # which make addition operation append elements instead of adding.
-    result = np.empty((len(chunk_lengths),), dtype="object")
+    Returns the ascending indices of the last occurrence of each distinct value
+    in the given array. Nulls are treated as a single distinct value.
 
-    for index, cl in enumerate(chunk_lengths):
-        result[index] = np.arange(cl, dtype="int32")
+    The last occurrence of each value is found in a single hash aggregation
+    over the values and their ordinals, and the indices are ordered with a
+    boolean mask instead of a sort or a lookup of every ordinal.
+    """
+    ordinals = np.arange(len(array), dtype=np.int64)
+    selector = (
+        pa.table({"value": array, "ordinal": ordinals})
+        .group_by(["value"])
+        .aggregate([("ordinal", "max")])
+    )
 
-    chunk_lengths = ([0] + chunk_lengths)[:-1]
-    result = pa.chunked_array(result + np.cumsum(chunk_lengths))
-    return result
+    is_last = np.zeros(len(array), dtype=bool)
+    is_last[selector["ordinal_max"].to_numpy()] = True
+    return np.flatnonzero(is_last)
 
 
 def drop_duplicates(table: pa.Table, on: str) -> pa.Table:
     """
+    Drops all but the last record of each distinct value of the given column,
+    preserving the order of the remaining records.
+
     It is important to not combine the chunks for performance reasons.
     """
 
-    if on not in table.column_names:
+    if on not in table.column_names or len(table) < 2:
         return table
 
-    index_array, array_latency = timed_invocation(
-        _create_chunked_index_array, table[on]
-    )
+    indices, latency = timed_invocation(_last_occurrence_indices, table[on])
 
     logger.info(
-        "Created a chunked index array of length "
-        f" {len(index_array)} in {array_latency}s"
+        f"Found {len(indices)} distinct values of {on} in {len(table)} "
+        f"records in {latency}s"
     )
 
-    table = table.set_column(
-        table.shape[1], sc._ORDERED_RECORD_IDX_COLUMN_NAME, index_array
-    )
-    selector = table.group_by([on]).aggregate(
-        [(sc._ORDERED_RECORD_IDX_COLUMN_NAME, "max")]
-    )
+    if len(indices) == len(table):
+        return table
 
-    table = table.filter(
-        pc.is_in(
-            table[sc._ORDERED_RECORD_IDX_COLUMN_NAME],
-            value_set=selector[f"{sc._ORDERED_RECORD_IDX_COLUMN_NAME}_max"],
-        )
+    return table.take(indices)
+
+
+def drop_duplicates_presorted(table: pa.Table, on: str) -> pa.Table:
+    """
+    Drops all but the last record of each distinct value of the given column
+    in a table already sorted by that column. Records of a value are adjacent,
+    so each record is only compared with the next record and no hash table is
+    built.
+    """
+
+    if on not in table.column_names or len(table) < 2:
+        return table
+
+    column = table[on]
+    current, following = column.slice(0, len(table) - 1), column.slice(1)
+    # adjacent nulls are duplicates, while a null next to a value is not
+    is_last = pc.and_not(
+        pc.fill_null(pc.not_equal(current, following), True),
+        pc.and_(pc.is_null(current), pc.is_null(following)),
     )
+    mask = pa.chunked_array(is_last.chunks + [pa.array([True])], type=pa.bool_())
 
-    table = table.drop([sc._ORDERED_RECORD_IDX_COLUMN_NAME])
+    if pc.all(mask).as_py():
+        return table
 
-    return table
+    return table.filter(mask)
@@ -0,0 +1,117 @@
+import logging
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+import numpy as np
+import pyarrow as pa
+
+from deltacat import logs
+from deltacat.aws import s3u as s3_utils
+from deltacat.compute.compactor_v2.constants import DELETION_VECTOR_MAX_INLINE_BYTES
+from deltacat.compute.compactor_v2.model.deletion_vector import (
+    DeletionVector,
+    get_deletion_vector,
+)
+from deltacat.storage import ManifestEntry, PartitionLocator
+from deltacat.utils.metrics import metrics
+
+logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
+
+
+def get_deletion_vector_file_s3_url(
+    bucket: str,
+    partition_locator: PartitionLocator,
+) -> str:
+    """
+    Returns a new URL for a deletion vector file under the path of the given
+    partition in the compaction artifact bucket. Every version of the deletion
+    vector of a compacted file gets its own file, since compacted deltas of
+    earlier rounds keep referencing earlier versions.
+    """
+    base_url = partition_locator.path(f"s3://{bucket}")
+    return f"{base_url}/deletion_vectors/{uuid4()}.bin"
+
+
+@metrics
+def read_deletion_vector_file(
+    deletion_vector: DeletionVector,
+    **s3_client_kwargs: Optional[Dict[str, Any]],
+) -> bytes:
+    logger.info(f"reading deletion vector file from: {deletion_vector.url}")
+    result = s3_utils.download(deletion_vector.url, **s3_client_kwargs)
+    return result["Body"].read()
+
+
+@metrics
+def write_deletion_vector_file(
+    deletion_vector_file_s3_url: str,
+    deletion_vector: DeletionVector,
+    **s3_client_kwargs: Optional[Dict[str, Any]],
+) -> None:
+    logger.info(f"writing deletion vector file to: {deletion_vector_file_s3_url}")
+    s3_utils.upload(
+        deletion_vector_file_s3_url, deletion_vector.data, **s3_client_kwargs
+    )
+
+
+def store_deletion_vector(
+    is_deleted: np.ndarray,
+    bucket: Optional[str],
+    partition_locator: PartitionLocator,
+    **s3_client_kwargs: Optional[Dict[str, Any]],
+) -> DeletionVector:
+    """
+    Returns a deletion vector of the given deleted records. Its encoded
+    positions are embedded if small, and written to a file in the compaction
+    artifact bucket otherwise.
+    """
+    deletion_vector = DeletionVector.of(is_deleted)
+    if deletion_vector.size_bytes <= DELETION_VECTOR_MAX_INLINE_BYTES:
+        return deletion_vector
+
+    if not bucket:
+        logger.warning(
+            f"No compaction artifact bucket to write a deletion vector of "
+            f"{deletion_vector.size_bytes} bytes to. Embedding it..."
+        )
+        return deletion_vector
+
+    url = get_deletion_vector_file_s3_url(bucket, partition_locator)
+    write_deletion_vector_file(url, deletion_vector, **s3_client_kwargs)
+    return deletion_vector.with_file(url)
+
+
+def read_deleted_records(
+    manifest_entry: ManifestEntry,
+    **s3_client_kwargs: Optional[Dict[str, Any]],
+) -> Optional[np.ndarray]:
+    """
+    Returns whether each record of the given manifest entry is deleted by its
+    deletion vector, if any.
+    """
+    deletion_vector = get_deletion_vector(manifest_entry)
+    if deletion_vector is None:
+        return None
+    data = None
+    if deletion_vector.url:
+        data = read_deletion_vector_file(deletion_vector, **s3_client_kwargs)
+    return deletion_vector.is_deleted(data)
+
+
+def apply_deletion_vector(
+    table: pa.Table,
+    manifest_entry: ManifestEntry,
+    **s3_client_kwargs: Optional[Dict[str, Any]],
+) -> pa.Table:
+    """
+    Drops the records of a table read from the given manifest entry that are
+    deleted by the deletion vector of the entry, if any.
+    """
+    is_deleted = read_deleted_records(manifest_entry, **s3_client_kwargs)
+    if is_deleted is None:
+        return table
+    assert len(table) == len(is_deleted), (
+        f"Deletion vector of {len(is_deleted)} records does not "
+        f"match table of {len(table)} records"
+    )
+    return table.filter(pa.array(~is_deleted))
@@ -1,5 +1,5 @@
 import time
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 
 from deltacat.compute.compactor import (
     DeltaAnnotated,
@@ -28,6 +28,26 @@ def contains_delete_deltas(deltas: List[Delta]) -> bool:
     return False
 
 
+def _validate_annotations(
+    annotated_delta: DeltaAnnotated,
+) -> Tuple[int, DeltaType]:
+    annotations = annotated_delta.annotations
+    delta_stream_position = annotations[0].annotation_stream_position
+    delta_type = annotations[0].annotation_delta_type
+
+    for annotation in annotations:
+        assert annotation.annotation_stream_position == delta_stream_position, (
+            f"Annotation stream position does not match - {annotation.annotation_stream_position} "
+            f"!= {delta_stream_position}"
+        )
+        assert annotation.annotation_delta_type == delta_type, (
+            f"Annotation delta type does not match - {annotation.annotation_delta_type} "
+            f"!= {delta_type}"
+        )
+
+    return delta_stream_position, delta_type
+
+
 def read_delta_file_envelopes(
     annotated_delta: DeltaAnnotated,
     read_kwargs_provider: Optional[ReadKwargsProvider],
@@ -51,18 +71,7 @@ def read_delta_file_envelopes(
     if not tables:
         return None, 0, 0
 
-    delta_stream_position = annotations[0].annotation_stream_position
-    delta_type = annotations[0].annotation_delta_type
-
-    for annotation in annotations:
-        assert annotation.annotation_stream_position == delta_stream_position, (
-            f"Annotation stream position does not match - {annotation.annotation_stream_position} "
-            f"!= {delta_stream_position}"
-        )
-        assert annotation.annotation_delta_type == delta_type, (
-            f"Annotation delta type does not match - {annotation.annotation_delta_type} "
-            f"!= {delta_type}"
-        )
+    delta_stream_position, delta_type = _validate_annotations(annotated_delta)
 
     delta_file_envelopes = []
     table = pa.concat_tables(tables)
@@ -78,6 +87,36 @@ def read_delta_file_envelopes(
     return delta_file_envelopes, total_record_count, total_size_bytes
 
 
+def iterate_delta_file_envelopes(
+    annotated_delta: DeltaAnnotated,
+    read_kwargs_provider: Optional[ReadKwargsProvider],
+    deltacat_storage=unimplemented_deltacat_storage,
+    deltacat_storage_kwargs: Optional[dict] = None,
+) -> Iterator[DeltaFileEnvelope]:
+    """
+    Lazily downloads the manifest entries of the annotated delta one at a time
+    and yields a delta file envelope per manifest entry. Unlike
+    read_delta_file_envelopes, only a single downloaded entry needs to be held
+    in memory at a time as long as the caller does not retain it.
+    """
+    if not annotated_delta.manifest or not annotated_delta.manifest.entries:
+        return
+
+    delta_stream_position, delta_type = _validate_annotations(annotated_delta)
+
+    for entry_index in range(len(annotated_delta.manifest.entries)):
+        yield DeltaFileEnvelope.of(
+            stream_position=delta_stream_position,
+            delta_type=delta_type,
+            table=deltacat_storage.download_delta_manifest_entry(
+                annotated_delta,
+                entry_index=entry_index,
+                file_reader_kwargs_provider=read_kwargs_provider,
+                **deltacat_storage_kwargs,
+            ),
+        )
+
+
 def get_local_delta_file_envelopes(
     uniform_deltas: List[DeltaAnnotated],
     read_kwargs_provider: Optional[ReadKwargsProvider],
@@ -0,0 +1,154 @@
+import heapq
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from deltacat import logs
+from deltacat.compute.compactor.model.round_completion_info import RoundCompletionInfo
+from deltacat.compute.compactor_v2.constants import HASH_GROUP_REASSIGNMENT_THRESHOLD
+from deltacat.compute.compactor_v2.utils.task_options import (
+    estimate_manifest_entry_num_rows,
+    estimate_manifest_entry_size_bytes,
+)
+from deltacat.storage import Manifest, ManifestEntry
+
+logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
+
+
+def estimate_hash_bucket_sizes(
+    hash_bucket_count: int,
+    round_completion_info: Optional[RoundCompletionInfo],
+    compacted_delta_manifest: Optional[Manifest],
+    previous_inflation: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Estimates the size in bytes and record count of every hash bucket from the
+    compacted manifest entries of each hash bucket in the previous round, plus
+    the incremental records of each hash bucket measured by the hash bucket
+    step of the previous round, if it recorded them.
+    """
+    hash_bucket_size_bytes = np.zeros([hash_bucket_count], dtype="float64")
+    hash_bucket_num_rows = np.zeros([hash_bucket_count], dtype="int64")
+
+    if (
+        round_completion_info is None
+        or round_completion_info.hash_bucket_count != hash_bucket_count
+    ):
+        return hash_bucket_size_bytes, hash_bucket_num_rows
+
+    write_result = round_completion_info.compacted_pyarrow_write_result
+    if (
+        compacted_delta_manifest
+        and round_completion_info.hb_index_to_entry_range
+        and write_result
+        and write_result.records
+    ):
+        if write_result.file_bytes:
+            previous_inflation = write_result.pyarrow_bytes / write_result.file_bytes
+        average_record_size = write_result.pyarrow_bytes / write_result.records
+
+        def entry_size_bytes(entry: ManifestEntry) -> float:
+            return estimate_manifest_entry_size_bytes(
+                entry=entry, previous_inflation=previous_inflation
+            )
+
+        def entry_num_rows(entry: ManifestEntry) -> int:
+            return estimate_manifest_entry_num_rows(
+                entry=entry,
+                average_record_size_bytes=average_record_size,
+                previous_inflation=previous_inflation,
+            )
+
+        for (
+            hb_index,
+            entry_range,
+        ) in round_completion_info.hb_index_to_entry_range.items():
+            entry_start, entry_end = entry_range
+            for entry_index in range(entry_start, entry_end):
+                entry = compacted_delta_manifest.entries[entry_index]
+                hash_bucket_size_bytes[int(hb_index)] += entry_size_bytes(entry)
+                hash_bucket_num_rows[int(hb_index)] += entry_num_rows(entry)
+
+    for measured, estimate in [
+        (round_completion_info.hb_index_to_input_size_bytes, hash_bucket_size_bytes),
+        (round_completion_info.hb_index_to_input_num_rows, hash_bucket_num_rows),
+    ]:
+        if measured is not None and len(measured) == hash_bucket_count:
+            estimate += np.asarray(measured, dtype=estimate.dtype)
+
+    return hash_bucket_size_bytes, hash_bucket_num_rows
+
+
+def assign_hash_buckets_to_hash_groups(
+    hash_bucket_size_bytes: np.ndarray,
+    hash_bucket_num_rows: np.ndarray,
+    num_hash_groups: int,
+    previous_hb_index_to_hash_group_index: Optional[List[int]] = None,
+) -> List[int]:
+    """
+    Assigns every hash bucket to a hash group such that the hash groups are
+    about equally large. Hash buckets are weighed by their share of the total
+    bytes plus their share of the total records, and are packed from largest
+    to smallest into the hash group with the least weight so far, breaking ties
+    by the fewest hash buckets so far. Returns the hash group of every hash
+    bucket. Hash buckets of equal weight are assigned round-robin.
+
+    The previous round's assignment, if given, is returned instead as long as
+    its heaviest hash group is at most HASH_GROUP_REASSIGNMENT_THRESHOLD
+    heavier than the heaviest hash group of the new assignment.
+    """
+    weights = np.zeros([len(hash_bucket_size_bytes)], dtype="float64")
+    for sizes in [hash_bucket_size_bytes, hash_bucket_num_rows]:
+        total = np.sum(sizes)
+        if total > 0:
+            weights += np.asarray(sizes, dtype="float64") / total
+
+    hb_index_to_hash_group_index = [0] * len(weights)
+    hash_group_heap = [(0.0, 0, hb_group) for hb_group in range(num_hash_groups)]
+    # a stable sort keeps hash buckets of equal weight in index order
+    for hb_index in np.argsort(-weights, kind="stable"):
+        weight, hb_count, hb_group = heapq.heappop(hash_group_heap)
+        hb_index_to_hash_group_index[int(hb_index)] = hb_group
+        heapq.heappush(
+            hash_group_heap, (weight + weights[hb_index], hb_count + 1, hb_group)
+        )
+    max_hash_group_weight = max(weight for weight, _, _ in hash_group_heap)
+
+    if _is_valid_assignment(
+        previous_hb_index_to_hash_group_index, len(weights), num_hash_groups
+    ):
+        previous_max_hash_group_weight = np.bincount(
+            previous_hb_index_to_hash_group_index,
+            weights=weights,
+            minlength=num_hash_groups,
+        ).max()
+        if previous_max_hash_group_weight <= max_hash_group_weight * (
+            1 + HASH_GROUP_REASSIGNMENT_THRESHOLD
+        ):
+            logger.info(
+                f"Kept the previous assignment of {len(weights)} hash buckets "
+                f"to {num_hash_groups} hash groups with a max hash group weight "
+                f"of {previous_max_hash_group_weight}"
+            )
+            return list(previous_hb_index_to_hash_group_index)
+
+    logger.info(
+        f"Assigned {len(weights)} hash buckets to {num_hash_groups} hash groups "
+        f"with a max hash group weight of {max_hash_group_weight}"
+    )
+    return hb_index_to_hash_group_index
+
+
+def _is_valid_assignment(
+    hb_index_to_hash_group_index: Optional[List[int]],
+    hash_bucket_count: int,
+    num_hash_groups: int,
+) -> bool:
+    return (
+        hb_index_to_hash_group_index is not None
+        and len(hb_index_to_hash_group_index) == hash_bucket_count
+        and all(
+            0 <= hb_group < num_hash_groups for hb_group in hb_index_to_hash_group_index
+        )
+    )
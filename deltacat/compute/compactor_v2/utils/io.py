@@ -150,3 +150,40 @@ def create_uniform_input_deltas(
     logger.info(f"Input uniform delta count: {len(rebatched_da_list)}")
 
     return rebatched_da_list
+
+
+def group_uniform_deltas_by_size(
+    uniform_deltas: List[DeltaAnnotated],
+    min_delta_bytes: Optional[float] = MIN_DELTA_BYTES_IN_BATCH,
+    previous_inflation: Optional[float] = PYARROW_INFLATION_MULTIPLIER,
+) -> List[List[DeltaAnnotated]]:
+    """
+    Greedily groups consecutive uniform deltas until the estimated in-memory
+    size of a group reaches min_delta_bytes. Unlike rebatching, uniform deltas
+    of different source deltas may share a group, which lets small deltas be
+    coalesced together.
+    """
+    groups: List[List[DeltaAnnotated]] = []
+    group: List[DeltaAnnotated] = []
+    group_bytes = 0
+
+    for uniform_delta in uniform_deltas:
+        group.append(uniform_delta)
+        group_bytes += sum(
+            estimate_manifest_entry_size_bytes(
+                entry=entry, previous_inflation=previous_inflation
+            )
+            for entry in uniform_delta.manifest.entries
+        )
+        if group_bytes >= min_delta_bytes:
+            groups.append(group)
+            group = []
+            group_bytes = 0
+
+    if group:
+        groups.append(group)
+
+    logger.info(
+        f"Grouped {len(uniform_deltas)} uniform deltas into {len(groups)} groups"
+    )
+    return groups
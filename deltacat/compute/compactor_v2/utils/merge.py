@@ -1,4 +1,8 @@
+import heapq
 import logging
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from uuid import uuid4
 
 from deltacat.compute.compactor.model.compact_partition_params import (
     CompactPartitionParams,
@@ -6,12 +10,25 @@ from deltacat.compute.compactor.model.compact_partition_params import (
 from deltacat.compute.compactor_v2.model.merge_file_group import (
     LocalMergeFileGroupsProvider,
 )
+from deltacat.compute.compactor_v2.model.deletion_vector import (
+    get_deleted_record_count,
+)
 from deltacat.compute.compactor_v2.model.merge_input import MergeInput
+from deltacat.compute.compactor_v2.model.pk_bloom_filter import (
+    PkBloomFilter,
+    PkBloomFilterFile,
+)
+from deltacat.compute.compactor_v2.utils.pk_bloom_filter_file import (
+    get_pk_bloom_filter_file_s3_url,
+    write_pk_bloom_filter_file,
+)
+from deltacat.compute.compactor_v2.utils.pk_hasher import get_pk_hasher
+import numpy as np
 import pyarrow as pa
 from deltacat import logs
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from deltacat.types.media import DELIMITED_TEXT_CONTENT_TYPES
+from deltacat.types.media import DELIMITED_TEXT_CONTENT_TYPES, ContentType
 from deltacat.compute.compactor.model.materialize_result import MaterializeResult
 from deltacat.compute.compactor.model.pyarrow_write_result import PyArrowWriteResult
 from deltacat.compute.compactor import (
@@ -23,6 +40,11 @@ from deltacat.types.tables import TABLE_CLASS_TO_SIZE_FUNC
 
 from deltacat.utils.performance import timed_invocation
 from deltacat.storage import (
+    Delta,
+    DeltaLocator,
+    DeltaType,
+    Manifest,
+    ManifestEntry,
     Partition,
 )
 from deltacat.compute.compactor_v2.deletes.delete_strategy import (
@@ -36,12 +58,137 @@ from deltacat.compute.compactor_v2.deletes.delete_file_envelope import (
 logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
 
 
+def _write_pk_bloom_filters(
+    input: MergeInput,
+    manifest: Manifest,
+    keys: np.ndarray,
+) -> None:
+    """
+    Writes a bloom filter of the primary keys of each manifest entry to the
+    compaction artifact bucket and references it in the entry meta, given the
+    bloom filter keys of all records of the manifest in order.
+    """
+    if not input.compaction_artifact_s3_bucket:
+        logger.warning(
+            "No compaction artifact bucket to write primary key bloom filters "
+            "to. Skipping..."
+        )
+        return
+
+    record_counts = [entry.meta.record_count for entry in manifest.entries]
+    if any(count is None for count in record_counts) or sum(record_counts) != len(keys):
+        logger.warning(
+            f"Unable to split {len(keys)} primary key bloom filter keys "
+            f"by manifest entry record counts: {record_counts}. Skipping..."
+        )
+        return
+
+    pk_hasher = get_pk_hasher(input.pk_hasher_id)
+    offset = 0
+    for entry, record_count in zip(manifest.entries, record_counts):
+        url = get_pk_bloom_filter_file_s3_url(
+            input.compaction_artifact_s3_bucket,
+            input.write_to_partition.locator,
+            entry,
+        )
+        size_bytes = write_pk_bloom_filter_file(
+            url,
+            PkBloomFilter.of(keys[offset : offset + record_count]),
+            **input.s3_client_kwargs,
+        )
+        entry.meta.pk_bloom_filter_file = PkBloomFilterFile.of(
+            url, size_bytes, input.primary_keys, pk_hasher.id, pk_hasher.version
+        )
+        offset += record_count
+
+
+def estimate_compacted_file_inflation(
+    round_completion_info: Optional[RoundCompletionInfo],
+    previous_inflation: float,
+) -> float:
+    """
+    Returns the ratio of in-memory PyArrow bytes to file bytes observed when
+    the previous round wrote its compacted files, or the given previous
+    inflation if no compacted files were written before.
+    """
+    write_result = (
+        round_completion_info.compacted_pyarrow_write_result
+        if round_completion_info
+        else None
+    )
+    if write_result and write_result.pyarrow_bytes and write_result.file_bytes:
+        return write_result.pyarrow_bytes / write_result.file_bytes
+    return previous_inflation
+
+
+def _compacted_file_sizing(
+    input: MergeInput,
+    in_memory_bytes_per_record: float,
+) -> Tuple[int, Dict[str, Any]]:
+    """
+    Returns the max records per compacted file and the table writer kwargs to
+    write them with. If a compacted file target size is set, records per file
+    are picked so that files reach the target size given the in-memory bytes
+    per record and the compacted file inflation, and Parquet row groups are
+    sized to the row group target size the same way. Records per file never
+    exceed max_records_per_output_file.
+    """
+    max_records_per_file = input.max_records_per_output_file
+    s3_table_writer_kwargs = input.s3_table_writer_kwargs or {}
+    if not input.compacted_file_target_size_bytes or not in_memory_bytes_per_record:
+        return max_records_per_file, s3_table_writer_kwargs
+
+    file_bytes_per_record = in_memory_bytes_per_record / input.compacted_file_inflation
+    max_records_per_file = int(
+        max(
+            1,
+            min(
+                max_records_per_file,
+                input.compacted_file_target_size_bytes // file_bytes_per_record,
+            ),
+        )
+    )
+    if (
+        input.compacted_file_content_type == ContentType.PARQUET
+        and "row_group_size" not in s3_table_writer_kwargs
+    ):
+        s3_table_writer_kwargs = {
+            **s3_table_writer_kwargs,
+            "row_group_size": int(
+                max(
+                    1,
+                    min(
+                        max_records_per_file,
+                        input.compacted_file_row_group_target_size_bytes
+                        // file_bytes_per_record,
+                    ),
+                )
+            ),
+        }
+    return max_records_per_file, s3_table_writer_kwargs
+
+
 def materialize(
     input: MergeInput,
     task_index: int,
     compacted_tables: List[pa.Table],
+    pk_bloom_filter_keys: Optional[np.ndarray] = None,
+    in_memory_bytes_per_record: Optional[float] = None,
 ) -> MaterializeResult:
+    """
+    Writes the compacted tables to the partition to write to. If the primary
+    key bloom filter keys of the compacted records are given, a bloom filter
+    of the primary keys of each written file is written to the compaction
+    artifact bucket and referenced by its manifest entry.
+    Files are sized by the in-memory bytes per record of the given tables
+    unless given.
+    """
     compacted_table = pa.concat_tables(compacted_tables)
+    if in_memory_bytes_per_record is None and len(compacted_table):
+        in_memory_bytes_per_record = compacted_table.nbytes / len(compacted_table)
+    max_records_per_file, s3_table_writer_kwargs = _compacted_file_sizing(
+        input, in_memory_bytes_per_record
+    )
     if input.compacted_file_content_type in DELIMITED_TEXT_CONTENT_TYPES:
         # TODO (rkenmi): Investigate if we still need to convert this table to pandas DataFrame
         # TODO (pdames): compare performance to pandas-native materialize path
@@ -51,9 +198,9 @@ def materialize(
         input.deltacat_storage.stage_delta,
         compacted_table,
         input.write_to_partition,
-        max_records_per_entry=input.max_records_per_output_file,
+        max_records_per_entry=max_records_per_file,
         content_type=input.compacted_file_content_type,
-        s3_table_writer_kwargs=input.s3_table_writer_kwargs,
+        s3_table_writer_kwargs=s3_table_writer_kwargs,
         **input.deltacat_storage_kwargs,
     )
     compacted_table_size = TABLE_CLASS_TO_SIZE_FUNC[type(compacted_table)](
@@ -71,6 +218,17 @@ def materialize(
         f"({manifest_records}) does not equal compacted table record count "
         f"({len(compacted_table)})"
     )
+    if pk_bloom_filter_keys is not None:
+        _, bloom_filter_latency = timed_invocation(
+            _write_pk_bloom_filters,
+            input,
+            manifest,
+            pk_bloom_filter_keys,
+        )
+        logger.info(
+            f"Built primary key bloom filters of {len(manifest.entries)} files "
+            f"in {bloom_filter_latency}s"
+        )
     materialize_result = MaterializeResult.of(
         delta=delta,
         task_index=task_index,
@@ -87,6 +245,146 @@ def materialize(
     return materialize_result
 
 
+def union_materialize_results(
+    materialize_results: List[MaterializeResult],
+) -> MaterializeResult:
+    """
+    Unions materialize results of the same task index into a single
+    materialize result, keeping the stream position of the last result.
+    """
+    if len(materialize_results) == 1:
+        return materialize_results[0]
+
+    referenced_pyarrow_write_results = [
+        materialize_result.referenced_pyarrow_write_result
+        for materialize_result in materialize_results
+        if materialize_result.referenced_pyarrow_write_result
+    ]
+    return MaterializeResult.of(
+        delta=Delta.merge_deltas(
+            [materialize_result.delta for materialize_result in materialize_results],
+            stream_position=materialize_results[-1].delta.stream_position,
+        ),
+        task_index=materialize_results[0].task_index,
+        pyarrow_write_result=PyArrowWriteResult.union(
+            [
+                materialize_result.pyarrow_write_result
+                for materialize_result in materialize_results
+            ]
+        ),
+        referenced_pyarrow_write_result=PyArrowWriteResult.union(
+            referenced_pyarrow_write_results
+        )
+        if referenced_pyarrow_write_results
+        else None,
+    )
+
+
+class StreamingMaterializer:
+    """
+    Materializes tables appended to it as they are produced instead of
+    materializing one fully built table. Records are buffered until an output
+    file worth of records is available, and each output file is then written
+    on its own in a background thread while the caller produces more records.
+    At most one output file is buffered and one is being written at a time.
+    Files are sized by the in-memory bytes per record observed across all
+    appended records.
+    """
+
+    def __init__(self, input: MergeInput, task_index: int):
+        self._input = input
+        self._task_index = task_index
+        self._appended_bytes = 0
+        self._appended_records = 0
+        self._buffered_tables: List[pa.Table] = []
+        self._buffered_keys: List[np.ndarray] = []
+        self._buffered_records = 0
+        self._materialize_results: List[MaterializeResult] = []
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_write: Optional[Future] = None
+
+    def append(
+        self,
+        table: pa.Table,
+        pk_bloom_filter_keys: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Appends records to materialize, along with their primary key bloom
+        filter keys if bloom filters are written.
+        """
+        if not len(table):
+            return
+        self._buffered_tables.append(table)
+        if pk_bloom_filter_keys is not None:
+            self._buffered_keys.append(pk_bloom_filter_keys)
+        self._buffered_records += len(table)
+        self._appended_bytes += table.nbytes
+        self._appended_records += len(table)
+
+        max_records_per_file, _ = _compacted_file_sizing(
+            self._input, self._in_memory_bytes_per_record
+        )
+        if self._buffered_records < max_records_per_file:
+            return
+
+        table = pa.concat_tables(self._buffered_tables)
+        keys = np.concatenate(self._buffered_keys) if self._buffered_keys else None
+        offset = 0
+        while len(table) - offset >= max_records_per_file:
+            self._write(
+                table.slice(offset, max_records_per_file),
+                keys[offset : offset + max_records_per_file]
+                if keys is not None
+                else None,
+            )
+            offset += max_records_per_file
+        self._buffered_records = len(table) - offset
+        self._buffered_tables = [table.slice(offset)] if self._buffered_records else []
+        self._buffered_keys = (
+            [keys[offset:]] if keys is not None and self._buffered_records else []
+        )
+
+    def close(self) -> List[MaterializeResult]:
+        """
+        Materializes any remaining buffered records, waits for all output files
+        to be written, and returns the materialize result of each write.
+        """
+        try:
+            if self._buffered_records:
+                self._write(
+                    pa.concat_tables(self._buffered_tables),
+                    np.concatenate(self._buffered_keys)
+                    if self._buffered_keys
+                    else None,
+                )
+                self._buffered_tables, self._buffered_keys = [], []
+                self._buffered_records = 0
+            self._wait_for_pending_write()
+        finally:
+            self._executor.shutdown(wait=True)
+        return self._materialize_results
+
+    @property
+    def _in_memory_bytes_per_record(self) -> float:
+        return self._appended_bytes / self._appended_records
+
+    def _write(self, table: pa.Table, keys: Optional[np.ndarray]) -> None:
+        self._wait_for_pending_write()
+        self._pending_write = self._executor.submit(
+            materialize,
+            self._input,
+            self._task_index,
+            [table],
+            keys,
+            self._in_memory_bytes_per_record,
+        )
+
+    def _wait_for_pending_write(self) -> None:
+        if self._pending_write is not None:
+            self._materialize_results.append(self._pending_write.result())
+            self._pending_write = None
+
+
 def generate_local_merge_input(
     params: CompactPartitionParams,
     annotated_deltas: List[DeltaAnnotated],
@@ -94,6 +392,8 @@ def generate_local_merge_input(
     round_completion_info: Optional[RoundCompletionInfo],
     delete_strategy: Optional[DeleteStrategy] = None,
     delete_file_envelopes: Optional[DeleteFileEnvelope] = None,
+    merge_task_memory_bytes: Optional[float] = None,
+    deletion_vectors_present: bool = False,
 ):
     """
     Generates a merge input for local deltas that do not reside in the Ray object store and
@@ -104,6 +404,8 @@ def generate_local_merge_input(
         annotated_deltas: a list of annotated deltas
         compacted_partition: the compacted partition to write to
         round_completion_info: keeps track of high watermarks and other metadata from previous compaction rounds
+        merge_task_memory_bytes: the memory requested for the local merge task
+        deletion_vectors_present: whether any previously compacted file has a deletion vector
 
     Returns:
         A MergeInput object
@@ -133,4 +435,114 @@ def generate_local_merge_input(
         deltacat_storage_kwargs=params.deltacat_storage_kwargs,
         delete_strategy=delete_strategy,
         delete_file_envelopes=delete_file_envelopes,
+        pk_hasher_id=params.pk_hasher_id,
+        sort_merge_enabled=params.sort_merge_enabled,
+        pk_bloom_filter_enabled=params.pk_bloom_filter_enabled,
+        compaction_artifact_s3_bucket=params.compaction_artifact_s3_bucket,
+        s3_client_kwargs=params.s3_client_kwargs,
+        two_phase_merge_enabled=params.two_phase_merge_enabled,
+        merge_prefetch_memory_budget_bytes=params.merge_prefetch_memory_budget_bytes,
+        merge_task_memory_bytes=merge_task_memory_bytes,
+        merge_spill_enabled=params.merge_spill_enabled,
+        streaming_materialize_enabled=params.streaming_materialize_enabled,
+        compacted_file_target_size_bytes=params.compacted_file_target_size_bytes,
+        compacted_file_row_group_target_size_bytes=params.compacted_file_row_group_target_size_bytes,
+        compacted_file_inflation=estimate_compacted_file_inflation(
+            round_completion_info, params.previous_inflation
+        ),
+        deletion_vectors_present=deletion_vectors_present,
+    )
+
+
+def _referenced_write_result(entries: List[ManifestEntry]) -> PyArrowWriteResult:
+    manifest = Manifest.of(entries=entries, uuid=str(uuid4()))
+    return PyArrowWriteResult.of(
+        len(entries),
+        manifest.meta.source_content_length,
+        manifest.meta.content_length,
+        manifest.meta.record_count - get_deleted_record_count(entries),
+    )
+
+
+def assign_coalesced_files_to_hash_buckets(
+    coalesced_results: List[MaterializeResult],
+    hash_bucket_count: int,
+    write_to_partition: Partition,
+    round_completion_info: Optional[RoundCompletionInfo] = None,
+    compacted_delta_manifest: Optional[Manifest] = None,
+) -> List[MaterializeResult]:
+    """
+    Lays out the files written by append-only compaction across hash buckets
+    and returns a materialize result per non-empty hash bucket.
+
+    Records of tables without primary keys may live in any hash bucket, so the
+    files compacted by the previous round keep their hash buckets and are copied
+    by reference, while each new file is added to the hash bucket with the
+    fewest records. This keeps the entries of each hash bucket contiguous in the
+    compacted delta and the buckets balanced for subsequent rounds.
+    """
+    hb_index_to_referenced_entries: Dict[int, List[ManifestEntry]] = defaultdict(list)
+    hb_index_to_new_entries: Dict[int, List[ManifestEntry]] = defaultdict(list)
+    hb_index_to_record_count = [0] * hash_bucket_count
+
+    if round_completion_info and compacted_delta_manifest:
+        hb_index_to_indices = round_completion_info.hb_index_to_entry_range or {
+            "0": (0, len(compacted_delta_manifest.entries))
+        }
+        for hb_index, indices in hb_index_to_indices.items():
+            entries = [
+                compacted_delta_manifest.entries[entry_index]
+                for entry_index in range(indices[0], indices[1])
+            ]
+            hb_index_to_referenced_entries[int(hb_index)].extend(entries)
+            hb_index_to_record_count[int(hb_index)] += sum(
+                entry.meta.record_count or 0 for entry in entries
+            ) - get_deleted_record_count(entries)
+
+    heap = [
+        (record_count, i) for i, record_count in enumerate(hb_index_to_record_count)
+    ]
+    heapq.heapify(heap)
+    for coalesced_result in sorted(coalesced_results, key=lambda m: m.task_index):
+        for entry in coalesced_result.delta.manifest.entries:
+            record_count, hb_index = heapq.heappop(heap)
+            hb_index_to_new_entries[hb_index].append(entry)
+            heapq.heappush(
+                heap, (record_count + (entry.meta.record_count or 0), hb_index)
+            )
+
+    materialize_results = []
+    for hb_index in range(hash_bucket_count):
+        referenced_entries = hb_index_to_referenced_entries[hb_index]
+        entries = referenced_entries + hb_index_to_new_entries[hb_index]
+        if not entries:
+            continue
+
+        manifest = Manifest.of(entries=entries, uuid=str(uuid4()))
+        # records deleted by deletion vectors are not records of the new delta
+        manifest.meta["record_count"] -= get_deleted_record_count(referenced_entries)
+        delta = Delta.of(
+            locator=DeltaLocator.of(write_to_partition.locator),
+            delta_type=DeltaType.UPSERT,
+            meta=manifest.meta,
+            manifest=manifest,
+            previous_stream_position=write_to_partition.stream_position,
+            properties={},
+        )
+        materialize_results.append(
+            MaterializeResult.of(
+                delta=delta,
+                task_index=hb_index,
+                pyarrow_write_result=_referenced_write_result(entries),
+                referenced_pyarrow_write_result=_referenced_write_result(
+                    referenced_entries
+                ),
+            )
+        )
+
+    logger.info(
+        f"Assigned {sum(len(e) for e in hb_index_to_new_entries.values())} coalesced "
+        f"files and {sum(len(e) for e in hb_index_to_referenced_entries.values())} "
+        f"referenced files to {len(materialize_results)} hash buckets"
     )
+    return materialize_results
@@ -0,0 +1,56 @@
+import logging
+from typing import Any, Dict, Optional
+
+from deltacat import logs
+from deltacat.aws import s3u as s3_utils
+from deltacat.compute.compactor_v2.model.pk_bloom_filter import (
+    PkBloomFilter,
+    PkBloomFilterFile,
+)
+from deltacat.storage import ManifestEntry, PartitionLocator
+from deltacat.utils.common import sha1_hexdigest
+from deltacat.utils.metrics import metrics
+
+logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
+
+
+def get_pk_bloom_filter_file_s3_url(
+    bucket: str,
+    partition_locator: PartitionLocator,
+    manifest_entry: ManifestEntry,
+) -> str:
+    """
+    Returns the URL of the primary key bloom filter file of a compacted
+    manifest entry, stored under the path of its partition in the compaction
+    artifact bucket.
+    """
+    pk_bloom_filter_id = sha1_hexdigest(manifest_entry.uri.encode("utf-8"))
+    base_url = partition_locator.path(f"s3://{bucket}")
+    return f"{base_url}/pk_bloom_filters/{pk_bloom_filter_id}.bin"
+
+
+@metrics
+def read_pk_bloom_filter_file(
+    pk_bloom_filter_file: PkBloomFilterFile,
+    **s3_client_kwargs: Optional[Dict[str, Any]],
+) -> Optional[PkBloomFilter]:
+    logger.info(f"reading pk bloom filter file from: {pk_bloom_filter_file.url}")
+    result = s3_utils.download(pk_bloom_filter_file.url, False, **s3_client_kwargs)
+    if not result:
+        return None
+    return PkBloomFilter.from_bytes(result["Body"].read())
+
+
+@metrics
+def write_pk_bloom_filter_file(
+    pk_bloom_filter_file_s3_url: str,
+    pk_bloom_filter: PkBloomFilter,
+    **s3_client_kwargs: Optional[Dict[str, Any]],
+) -> int:
+    """
+    Writes the given bloom filter to the given URL and returns its size in bytes.
+    """
+    body = pk_bloom_filter.to_bytes()
+    logger.info(f"writing pk bloom filter file to: {pk_bloom_filter_file_s3_url}")
+    s3_utils.upload(pk_bloom_filter_file_s3_url, body, **s3_client_kwargs)
+    return len(body)
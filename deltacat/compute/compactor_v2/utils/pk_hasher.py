@@ -0,0 +1,278 @@
+import hashlib
+import importlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Type, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+if importlib.util.find_spec("xxhash"):
+    import xxhash
+
+# The number of primary keys converted to Python bytes at once when hashing.
+# Batching bounds the memory used by these bytes objects. Each key is still
+# digested by its own call, which holds the GIL for keys under 2 KiB.
+_HASH_BATCH_SIZE = 64 * 1024
+
+
+class PkHasher(ABC):
+    """
+    Hashes primary key values into fixed size binary digests during compaction.
+
+    The id and version of the hasher used by a compaction round are recorded in
+    its round completion info. Since the digest determines the hash bucket of a
+    record, the version of a hasher must be bumped whenever its digest of the same
+    primary key changes.
+
+    Example:
+        >>> class MyPkHasher(PkHasher):
+        ...     @property
+        ...     def id(self) -> str:
+        ...         return "my_hasher"
+        ...
+        ...     @property
+        ...     def version(self) -> int:
+        ...         return 1
+        ...
+        ...     @property
+        ...     def digest_byte_width(self) -> int:
+        ...         return 8
+        ...
+        ...     def digest(self, value: bytes) -> bytes:
+        ...         # Implement hashing here
+        ...         pass
+        >>> register_pk_hasher(MyPkHasher)
+    """
+
+    @property
+    @abstractmethod
+    def id(self) -> str:
+        """
+        The unique id of the hash function family.
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def version(self) -> int:
+        """
+        The version of the hasher that changes whenever its digests change.
+        """
+        pass
+
+    @property
+    @abstractmethod
+    def digest_byte_width(self) -> int:
+        """
+        The number of bytes in each digest.
+        """
+        pass
+
+    @abstractmethod
+    def digest(self, value: bytes) -> bytes:
+        """
+        Returns the digest of the given primary key bytes.
+        """
+        pass
+
+    @property
+    def digest_type(self) -> pa.DataType:
+        return pa.binary(self.digest_byte_width)
+
+    @property
+    def hashes_fixed_width_values(self) -> bool:
+        """
+        Whether a single fixed width primary key (e.g. int64, timestamp or date)
+        is digested from the raw bytes of its canonical int64 values instead of
+        its string representation.
+        Hashers that digested the string representation of such keys in a prior
+        version must keep this disabled for the same version.
+        """
+        return False
+
+    def hash_array(self, array: pa.Array) -> pa.FixedSizeBinaryArray:
+        """
+        Hashes the values of a string, binary or fixed width array and returns
+        the digests as a fixed size binary array. Values are digested one at a
+        time, in batches read straight from the Arrow buffers. Fixed width values
+        are digested from the raw little-endian bytes of their canonical int64
+        values.
+        """
+        assert array.null_count == 0, f"Expected non-null primary key"
+
+        if is_fixed_width_pk_type(array.type):
+            array = canonicalize_fixed_width_pk_values(array)
+            digests = self._digest_fixed_width_array(array)
+        else:
+            digests = self._digest_binary_array(array)
+
+        return pa.FixedSizeBinaryArray.from_buffers(
+            self.digest_type,
+            len(array),
+            [None, pa.py_buffer(b"".join(digests))],
+        )
+
+    def _digest_binary_array(self, array: pa.Array) -> List[bytes]:
+        if pa.types.is_large_string(array.type) or pa.types.is_large_binary(array.type):
+            binary_array = pc.cast(array, pa.large_binary())
+        else:
+            binary_array = pc.cast(array, pa.binary())
+
+        digest = self.digest
+        digests = []
+        for offset in range(0, len(binary_array), _HASH_BATCH_SIZE):
+            batch = binary_array.slice(offset, _HASH_BATCH_SIZE)
+            digests.extend(
+                [digest(value) for value in batch.to_numpy(zero_copy_only=False)]
+            )
+        return digests
+
+    def _digest_fixed_width_array(self, array: pa.Array) -> List[bytes]:
+        byte_width = array.type.bit_width // 8
+        values = memoryview(array.buffers()[1])
+
+        digest = self.digest
+        digests = []
+        for offset in range(0, len(array), _HASH_BATCH_SIZE):
+            start = (array.offset + offset) * byte_width
+            end = (
+                array.offset + min(offset + _HASH_BATCH_SIZE, len(array))
+            ) * byte_width
+            batch = values[start:end].tobytes()
+            digests.extend(
+                [
+                    digest(batch[index : index + byte_width])
+                    for index in range(0, len(batch), byte_width)
+                ]
+            )
+        return digests
+
+
+class Sha1PkHasher(PkHasher):
+    """
+    Hashes primary keys with SHA-1. This is the default hasher. It always digests
+    the string representation of primary keys to keep the hash buckets of tables
+    compacted by earlier versions stable.
+    """
+
+    ID = "sha1"
+
+    @property
+    def id(self) -> str:
+        return Sha1PkHasher.ID
+
+    @property
+    def version(self) -> int:
+        return 1
+
+    @property
+    def digest_byte_width(self) -> int:
+        return 20
+
+    def digest(self, value: bytes) -> bytes:
+        return hashlib.sha1(value).digest()
+
+
+class Xxh3128PkHasher(PkHasher):
+    """
+    Hashes primary keys with the non-cryptographic 128-bit XXH3 hash. It is
+    several times faster than SHA-1 and requires the `xxhash` package. A single
+    fixed width primary key is digested from its raw canonical int64 values, so
+    that the same key written as int32 in one file and int64 in another lands in
+    the same hash bucket.
+    """
+
+    ID = "xxh3_128"
+
+    def __init__(self):
+        if not importlib.util.find_spec("xxhash"):
+            raise ImportError(
+                f"xxhash not installed. Install the xxhash extra using pip to use "
+                f"the {Xxh3128PkHasher.ID} primary key hasher: "
+                f"`pip install deltacat-fork[xxhash]`"
+            )
+
+    @property
+    def id(self) -> str:
+        return Xxh3128PkHasher.ID
+
+    @property
+    def version(self) -> int:
+        return 1
+
+    @property
+    def digest_byte_width(self) -> int:
+        return 16
+
+    @property
+    def hashes_fixed_width_values(self) -> bool:
+        return True
+
+    def digest(self, value: bytes) -> bytes:
+        return xxhash.xxh3_128_digest(value)
+
+
+def is_fixed_width_pk_type(pk_type: pa.DataType) -> bool:
+    """
+    Returns true if primary key values of the given type are fixed width and
+    can be hashed from the raw bytes of their canonical int64 values. Decimals
+    are not, since the raw values of the same decimal differ by scale.
+    """
+    return (
+        pa.types.is_integer(pk_type)
+        or pa.types.is_timestamp(pk_type)
+        or pa.types.is_date(pk_type)
+    )
+
+
+def canonicalize_fixed_width_pk_values(
+    values: Union[pa.Array, pa.ChunkedArray]
+) -> Union[pa.Array, pa.ChunkedArray]:
+    """
+    Casts fixed width primary key values to int64 so that the same key has the
+    same raw bytes regardless of the integer width, timestamp unit or date type
+    of the file it was read from. Timestamps are cast to nanoseconds since the
+    epoch and dates to days since the epoch. Unsigned 64-bit values above the
+    int64 maximum wrap around.
+    """
+    pk_type = values.type
+    if pa.types.is_int64(pk_type):
+        return values
+    if pa.types.is_timestamp(pk_type):
+        values = pc.cast(values, pa.timestamp("ns", tz=pk_type.tz))
+    elif pa.types.is_date(pk_type):
+        values = pc.cast(pc.cast(values, pa.date32(), safe=False), pa.int32())
+    return pc.cast(values, pa.int64(), safe=not pa.types.is_uint64(pk_type))
+
+
+_PK_HASHER_ID_TO_CLASS: Dict[str, Type[PkHasher]] = {
+    Sha1PkHasher.ID: Sha1PkHasher,
+    Xxh3128PkHasher.ID: Xxh3128PkHasher,
+}
+
+
+def register_pk_hasher(pk_hasher_class: Type[PkHasher]) -> None:
+    """
+    Registers a primary key hasher so that it can be selected by its id.
+    """
+    pk_hasher_id = pk_hasher_class().id
+    registered = _PK_HASHER_ID_TO_CLASS.get(pk_hasher_id)
+    if registered is not None and registered is not pk_hasher_class:
+        raise ValueError(f"A primary key hasher with id {pk_hasher_id} exists")
+    _PK_HASHER_ID_TO_CLASS[pk_hasher_id] = pk_hasher_class
+
+
+def get_pk_hasher(pk_hasher_id: str) -> PkHasher:
+    """
+    Returns a new instance of the primary key hasher registered with the given id.
+    """
+    if pk_hasher_id not in _PK_HASHER_ID_TO_CLASS:
+        raise ValueError(
+            f"Unknown primary key hasher: {pk_hasher_id}. "
+            f"Supported hashers are {list_pk_hasher_ids()}"
+        )
+    return _PK_HASHER_ID_TO_CLASS[pk_hasher_id]()
+
+
+def list_pk_hasher_ids() -> List[str]:
+    return list(_PK_HASHER_ID_TO_CLASS.keys())
@@ -0,0 +1,166 @@
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import pyarrow as pa
+
+from deltacat import logs
+from deltacat.compute.compactor_v2.constants import PK_HASHER_ID
+from deltacat.compute.compactor_v2.model.merge_file_group import (
+    PreBucketedManifestEntry,
+)
+from deltacat.compute.compactor_v2.utils.pk_hasher import PkHasher, get_pk_hasher
+from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    group_by_pk_hash_bucket,
+    hash_bucket_index_to_hash_group_index,
+)
+from deltacat.compute.compactor_v2.utils.task_options import (
+    estimate_manifest_entry_size_bytes,
+)
+from deltacat.storage import (
+    Delta,
+    DeltaType,
+    Partition,
+    interface as unimplemented_deltacat_storage,
+)
+
+logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
+
+
+def stage_pre_bucketed_delta(
+    table: pa.Table,
+    partition: Partition,
+    primary_keys: List[str],
+    hash_bucket_count: int,
+    delta_type: DeltaType = DeltaType.UPSERT,
+    pk_hasher_id: str = PK_HASHER_ID,
+    deltacat_storage=unimplemented_deltacat_storage,
+    deltacat_storage_kwargs: Optional[dict] = None,
+    **stage_delta_kwargs,
+) -> Delta:
+    """
+    Stages a delta whose manifest entries each contain the records of a single
+    primary key hash bucket, and records the hash bucket index and the primary
+    keys used for bucketing in the manifest entry meta. Compaction of a partition
+    with the same primary keys, hash bucket count and primary key hasher can then
+    skip the hash bucket step and send each manifest entry straight to the merge
+    task of its hash bucket.
+
+    The returned delta is not committed.
+    """
+    assert primary_keys, "Pre-bucketed deltas require primary keys"
+    assert len(table), "Pre-bucketed deltas require at least one record"
+
+    if deltacat_storage_kwargs is None:
+        deltacat_storage_kwargs = {}
+
+    pk_hasher = get_pk_hasher(pk_hasher_id)
+
+    # compaction hashes primary keys in sorted order
+    primary_keys = sorted(primary_keys)
+    hb_to_table = group_by_pk_hash_bucket(
+        table, hash_bucket_count, primary_keys, pk_hasher.id
+    )
+
+    deltas = []
+    for hb_index, hb_table in enumerate(hb_to_table):
+        if hb_table is None:
+            continue
+
+        delta = deltacat_storage.stage_delta(
+            hb_table,
+            partition,
+            delta_type=delta_type,
+            **stage_delta_kwargs,
+            **deltacat_storage_kwargs,
+        )
+        for entry in delta.manifest.entries:
+            entry.meta.hash_bucket_index = hb_index
+            entry.meta.hash_bucket_count = hash_bucket_count
+            entry.meta.primary_keys = primary_keys
+            entry.meta.pk_hasher_id = pk_hasher.id
+            entry.meta.pk_hasher_version = pk_hasher.version
+        deltas.append(delta)
+
+    logger.info(
+        f"Staged {len(table)} records in {len(deltas)} of "
+        f"{hash_bucket_count} hash buckets"
+    )
+
+    if len(deltas) == 1:
+        return deltas[0]
+    return Delta.merge_deltas(deltas)
+
+
+def is_pre_bucketed(
+    deltas: List[Delta],
+    primary_keys: List[str],
+    hash_bucket_count: int,
+    pk_hasher: PkHasher,
+) -> bool:
+    """
+    Returns true if every manifest entry of the given deltas was pre-bucketed
+    on the given primary keys into the given number of hash buckets by the given
+    primary key hasher. Entries bucketed on other primary keys, e.g. before the
+    primary keys of the table changed, must be hash bucketed again.
+    """
+    if not deltas or not primary_keys:
+        return False
+
+    primary_keys = sorted(primary_keys)
+
+    for delta in deltas:
+        if not delta.manifest or not delta.manifest.entries:
+            return False
+        for entry in delta.manifest.entries:
+            if (
+                entry.meta is None
+                or entry.meta.hash_bucket_index is None
+                or entry.meta.hash_bucket_count != hash_bucket_count
+                or entry.meta.primary_keys != primary_keys
+                or entry.meta.pk_hasher_id != pk_hasher.id
+                or entry.meta.pk_hasher_version != pk_hasher.version
+            ):
+                return False
+
+    return True
+
+
+def group_pre_bucketed_entries_by_hash_group(
+    deltas: List[Delta],
+    num_hash_groups: int,
+    previous_inflation: float,
+    hb_index_to_hash_group_index: Optional[List[int]] = None,
+) -> Tuple[Dict[int, List[PreBucketedManifestEntry]], Dict[int, int], Dict[int, int]]:
+    """
+    Groups the manifest entries of pre-bucketed deltas by the hash group of their
+    hash bucket, in ascending order of delta stream position. Returns the entries
+    of each hash group along with the estimated size in bytes and record count of
+    each hash group. Hash buckets are assigned to hash groups by the given
+    assignment, if any.
+    """
+    hash_group_to_entries = defaultdict(list)
+    hash_group_to_size_bytes = defaultdict(int)
+    hash_group_to_num_rows = defaultdict(int)
+
+    # initialize all hash groups
+    for hash_group_index in range(num_hash_groups):
+        hash_group_to_entries[hash_group_index] = []
+        hash_group_to_size_bytes[hash_group_index] = 0
+        hash_group_to_num_rows[hash_group_index] = 0
+
+    for delta in sorted(deltas, key=lambda d: d.stream_position):
+        for entry_index, entry in enumerate(delta.manifest.entries):
+            hb_index = entry.meta.hash_bucket_index
+            hash_group_index = hash_bucket_index_to_hash_group_index(
+                hb_index, num_hash_groups, hb_index_to_hash_group_index
+            )
+            hash_group_to_entries[hash_group_index].append(
+                (delta.locator, delta.type, entry_index, hb_index)
+            )
+            hash_group_to_size_bytes[hash_group_index] += int(
+                estimate_manifest_entry_size_bytes(entry, previous_inflation)
+            )
+            hash_group_to_num_rows[hash_group_index] += entry.meta.record_count or 0
+
+    return hash_group_to_entries, hash_group_to_size_bytes, hash_group_to_num_rows
@@ -1,39 +1,58 @@
+import binascii
 import logging
-from typing import List, Optional, Iterable
+from typing import List, Optional, Iterable, Union
 
 import numpy as np
 import pyarrow as pa
 import pyarrow.compute as pc
 import uuid
-import hashlib
 from deltacat.compute.compactor_v2.constants import (
-    TOTAL_BYTES_IN_SHA1_HASH,
     PK_DELIMITER,
-    MAX_SIZE_OF_RECORD_BATCH_IN_GIB,
+    PK_HASHER_ID,
 )
 import time
 from deltacat.compute.compactor.model.delta_file_envelope import DeltaFileEnvelope
 from deltacat import logs
 from deltacat.compute.compactor.utils import system_columns as sc
+from deltacat.compute.compactor_v2.utils.pk_hasher import (
+    PkHasher,
+    canonicalize_fixed_width_pk_values,
+    get_pk_hasher,
+    is_fixed_width_pk_type,
+)
 from deltacat.io.object_store import IObjectStore
 from deltacat.utils.performance import timed_invocation
 from deltacat.utils.pyarrow import sliced_string_cast
 
 logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
 
+# The running remainder is shifted left by 32 bits before each reduction,
+# so it must fit in 32 bits for the uint64 arithmetic not to overflow.
+_MAX_VECTORIZED_HASH_BUCKET_COUNT = 2**32
 
-def _append_sha1_hash_to_table(table: pa.Table, hash_column: pa.Array) -> pa.Table:
-    hash_column_np = hash_column.to_numpy()
+# Hash bucket indices are radix sorted by 16-bit digits.
+_RADIX_SORT_DIGIT_MASK = 0xFFFF
 
-    result = []
-    for hash_value in hash_column_np:
-        assert hash_value is not None, f"Expected non-null primary key"
-        result.append(hashlib.sha1(hash_value.encode("utf-8")).hexdigest())
 
-    return sc.append_pk_hash_string_column(table, result)
+def _append_pk_hash_to_table(
+    table: pa.Table,
+    hash_column: Union[pa.Array, pa.ChunkedArray],
+    pk_hasher: PkHasher,
+) -> pa.Table:
+    if isinstance(hash_column, pa.ChunkedArray):
+        digest_column = pa.chunked_array(
+            [pk_hasher.hash_array(chunk) for chunk in hash_column.chunks],
+            pk_hasher.digest_type,
+        )
+    else:
+        digest_column = pk_hasher.hash_array(hash_column)
+
+    return table.append_column(
+        pa.field(sc._PK_HASH_COLUMN_NAME, pk_hasher.digest_type), digest_column
+    )
 
 
-def _is_sha1_desired(hash_columns: List[pa.Array]) -> bool:
+def _is_hash_desired(hash_columns: List[pa.Array], pk_hasher: PkHasher) -> bool:
     total_size = 0
     total_len = 0
 
@@ -45,101 +64,81 @@ def _is_sha1_desired(hash_columns: List[pa.Array]) -> bool:
         f"Found total length of hash column={total_len} and total_size={total_size}"
     )
 
-    return total_size > TOTAL_BYTES_IN_SHA1_HASH * total_len
+    return total_size > pk_hasher.digest_byte_width * total_len
 
 
-def _append_table_by_hash_bucket(
-    pki_table: pa.Table, hash_bucket_to_table: np.ndarray
-) -> int:
-
-    hb_pk_table, sort_latency = timed_invocation(
-        lambda: pki_table.sort_by(sc._HASH_BUCKET_IDX_COLUMN_NAME)
+def _counting_sort_indices(
+    hash_bucket_indices: np.ndarray, num_buckets: int
+) -> np.ndarray:
+    """
+    Returns the indices that stably sort the given hash bucket indices. This is a
+    least significant digit radix sort over 16-bit digits, which numpy sorts in
+    linear time.
+    """
+    sort_indices = np.argsort(
+        (hash_bucket_indices & _RADIX_SORT_DIGIT_MASK).astype(np.uint16),
+        kind="stable",
     )
-    logger.info(f"Sorting a pk table of length {len(pki_table)} took {sort_latency}s")
+    if num_buckets > _RADIX_SORT_DIGIT_MASK + 1:
+        high_digits = (hash_bucket_indices[sort_indices] >> 16).astype(np.uint16)
+        sort_indices = sort_indices[np.argsort(high_digits, kind="stable")]
+    return sort_indices
 
-    hb_pk_grouped_by, groupby_latency = timed_invocation(
-        lambda: hb_pk_table.group_by(sc._HASH_BUCKET_IDX_COLUMN_NAME).aggregate(
-            [(sc._HASH_BUCKET_IDX_COLUMN_NAME, "count")]
-        )
-    )
 
-    logger.info(
-        f"Grouping a pki table of length {len(pki_table)} took {groupby_latency}s"
-    )
+def _append_record_batch_by_hash_bucket(
+    record_batch: pa.RecordBatch,
+    hash_bucket_indices: np.ndarray,
+    hash_bucket_to_batches: np.ndarray,
+) -> int:
+    num_buckets = len(hash_bucket_to_batches)
+    hb_counts = np.bincount(hash_bucket_indices, minlength=num_buckets)
+    hb_offsets = np.cumsum(hb_counts) - hb_counts
 
-    group_count_array = hb_pk_grouped_by[f"{sc._HASH_BUCKET_IDX_COLUMN_NAME}_count"]
-    hb_group_array = hb_pk_grouped_by[sc._HASH_BUCKET_IDX_COLUMN_NAME]
+    sort_indices = _counting_sort_indices(hash_bucket_indices, num_buckets)
+    hb_record_batch = record_batch.take(pa.array(sort_indices))
 
     result_len = 0
-    for i, group_count in enumerate(group_count_array):
-        hb_idx = hb_group_array[i].as_py()
-        pyarrow_table = hb_pk_table.slice(offset=result_len, length=group_count.as_py())
-        pyarrow_table = pyarrow_table.drop(
-            [sc._HASH_BUCKET_IDX_COLUMN_NAME, sc._PK_HASH_STRING_COLUMN_NAME]
+    for hb_idx in np.flatnonzero(hb_counts):
+        batch = hb_record_batch.slice(
+            offset=int(hb_offsets[hb_idx]), length=int(hb_counts[hb_idx])
         )
-        if hash_bucket_to_table[hb_idx] is None:
-            hash_bucket_to_table[hb_idx] = []
-        hash_bucket_to_table[hb_idx].append(pyarrow_table)
-        result_len += len(pyarrow_table)
+        if hash_bucket_to_batches[hb_idx] is None:
+            hash_bucket_to_batches[hb_idx] = []
+        hash_bucket_to_batches[hb_idx].append(batch)
+        result_len += len(batch)
 
     return result_len
 
 
-def _optimized_group_record_batches_by_hash_bucket(
-    pki_table: pa.Table, num_buckets: int
-):
-
-    input_table_len = len(pki_table)
+def _group_record_batches_by_hash_bucket(
+    table: pa.Table, hash_bucket_indices: np.ndarray, num_buckets: int
+) -> np.ndarray:
+    """
+    Partitions the rows of the table by hash bucket in linear time. Each record
+    batch of the table is partitioned on its own with a counting sort followed by
+    a single take, so no array is ever concatenated beyond its original size.
+    """
+    input_table_len = len(table)
 
-    hash_bucket_to_tables = np.empty([num_buckets], dtype="object")
+    hash_bucket_to_batches = np.empty([num_buckets], dtype="object")
     hb_to_table = np.empty([num_buckets], dtype="object")
 
-    # This split will ensure that the sort is not performed on a very huge table
-    # resulting in ArrowInvalid: offset overflow while concatenating arrays
-    # Known issue with Arrow: https://github.com/apache/arrow/issues/25822
-    table_batches, to_batches_latency = timed_invocation(lambda: pki_table.to_batches())
-
-    logger.info(f"to_batches took {to_batches_latency} for {len(pki_table)} rows")
-
-    current_bytes = 0
-    record_batches = []
     result_len = 0
-    for record_batch in table_batches:
-        current_bytes += record_batch.nbytes
-        record_batches.append(record_batch)
-        if current_bytes >= MAX_SIZE_OF_RECORD_BATCH_IN_GIB:
-            logger.info(
-                f"Total number of record batches without exceeding {MAX_SIZE_OF_RECORD_BATCH_IN_GIB} "
-                f"is {len(record_batches)} and size {current_bytes}"
-            )
-            appended_len, append_latency = timed_invocation(
-                _append_table_by_hash_bucket,
-                pa.Table.from_batches(record_batches),
-                hash_bucket_to_tables,
-            )
-            logger.info(
-                f"Appended the hash bucketed batch of {appended_len} in {append_latency}s"
-            )
-
-            result_len += appended_len
-            current_bytes = 0
-            record_batches.clear()
-
-    if record_batches:
-        appended_len, append_latency = timed_invocation(
-            _append_table_by_hash_bucket,
-            pa.Table.from_batches(record_batches),
-            hash_bucket_to_tables,
+    offset = 0
+    for record_batch in table.to_batches():
+        if not len(record_batch):
+            continue
+        result_len += _append_record_batch_by_hash_bucket(
+            record_batch,
+            hash_bucket_indices[offset : offset + len(record_batch)],
+            hash_bucket_to_batches,
         )
-        result_len += appended_len
-        current_bytes = 0
-        record_batches.clear()
+        offset += len(record_batch)
 
     concat_start = time.monotonic()
-    for hb, tables in enumerate(hash_bucket_to_tables):
-        if tables:
-            assert hb_to_table[hb] is None, f"The HB index is repeated {hb}"
-            hb_to_table[hb] = pa.concat_tables(tables)
+    for hb, batches in enumerate(hash_bucket_to_batches):
+        if batches:
+            hb_to_table[hb] = pa.Table.from_batches(batches, schema=table.schema)
 
     concat_end = time.monotonic()
     logger.info(
@@ -154,10 +153,35 @@ def _optimized_group_record_batches_by_hash_bucket(
     return hb_to_table
 
 
+def _get_fixed_width_pk_columns(
+    tables: List[pa.Table], primary_keys: List[str]
+) -> Optional[List[pa.ChunkedArray]]:
+    """
+    Returns the canonical int64 values of the primary key column of each table if
+    there is a single fixed width primary key in every table without any nulls,
+    else None. Canonical values keep the hash bucket of a key stable across files
+    and rounds that wrote it with different integer widths or temporal units.
+    """
+    if len(primary_keys) != 1 or not tables:
+        return None
+
+    pk_columns = [table[primary_keys[0]] for table in tables]
+    for pk_column in pk_columns:
+        if not is_fixed_width_pk_type(pk_column.type) or pk_column.null_count:
+            return None
+
+    return [canonicalize_fixed_width_pk_values(pk_column) for pk_column in pk_columns]
+
+
 def group_by_pk_hash_bucket(
-    table: pa.Table, num_buckets: int, primary_keys: List[str]
+    table: pa.Table,
+    num_buckets: int,
+    primary_keys: List[str],
+    pk_hasher_id: str = PK_HASHER_ID,
 ) -> np.ndarray:
-    table = generate_pk_hash_column([table], primary_keys, requires_sha1=True)[0]
+    table = generate_pk_hash_column(
+        [table], primary_keys, requires_hash=True, pk_hasher_id=pk_hasher_id
+    )[0]
 
     # group hash bucket record indices
     result = group_record_indices_by_hash_bucket(
@@ -171,13 +195,20 @@ def group_by_pk_hash_bucket(
 def generate_pk_hash_column(
     tables: List[pa.Table],
     primary_keys: Optional[List[str]] = None,
-    requires_sha1: bool = False,
+    requires_hash: bool = False,
+    pk_hasher_id: str = PK_HASHER_ID,
 ) -> List[pa.Table]:
     """
     Returns a new table list after generating the primary key hash if desired.
 
-    1. If there are no primary keys, each hash will be unique uuid/sha1 hex
+    1. If there are no primary keys, each hash will be a unique 16 byte uuid
     2. If there are more than 0 primary keys, returns a table with pk hash column appended.
+       The pk hash is the digest of the joined primary keys produced by the primary
+       key hasher with the given id when hashing is required or desired, and the
+       joined primary keys string otherwise.
+    3. If there is a single fixed width primary key (e.g. int64), its canonical
+       int64 values are used as is when hashing is not required, and are digested
+       from their raw bytes if the primary key hasher supports it.
     """
 
     def _generate_pk_hash(table: pa.Table) -> pa.Array:
@@ -191,7 +222,7 @@ def generate_pk_hash_column(
 
     def _generate_uuid(table: pa.Table) -> pa.Array:
         hash_column = pa.array(
-            [uuid.uuid4().hex for _ in range(len(table))], pa.string()
+            [uuid.uuid4().bytes for _ in range(len(table))], pa.binary(16)
         )
         return hash_column
 
@@ -199,16 +230,25 @@ def generate_pk_hash_column(
 
     hash_column_list = []
 
-    can_sha1 = False
-    if primary_keys:
-        hash_column_list = [_generate_pk_hash(table) for table in tables]
+    pk_hasher = get_pk_hasher(pk_hasher_id)
 
-        can_sha1 = requires_sha1 or _is_sha1_desired(hash_column_list)
+    can_hash = False
+    if primary_keys:
+        fixed_width_pk_columns = _get_fixed_width_pk_columns(tables, primary_keys)
+        if fixed_width_pk_columns is not None and (
+            not requires_hash or pk_hasher.hashes_fixed_width_values
+        ):
+            hash_column_list = fixed_width_pk_columns
+            can_hash = requires_hash
+        else:
+            hash_column_list = [_generate_pk_hash(table) for table in tables]
+            can_hash = requires_hash or _is_hash_desired(hash_column_list, pk_hasher)
     else:
         hash_column_list = [_generate_uuid(table) for table in tables]
 
     logger.info(
-        f"can_generate_sha1={can_sha1} for the table and requires_sha1={requires_sha1}"
+        f"can_generate_hash={can_hash} with pk hasher {pk_hasher.id} "
+        f"for the table and requires_hash={requires_hash}"
     )
 
     result = []
@@ -216,11 +256,12 @@ def generate_pk_hash_column(
     total_len = 0
     total_size = 0
     for index, table in enumerate(tables):
-        if can_sha1:
-            table = _append_sha1_hash_to_table(table, hash_column_list[index])
+        if can_hash:
+            table = _append_pk_hash_to_table(table, hash_column_list[index], pk_hasher)
         else:
             table = table.append_column(
-                sc._PK_HASH_STRING_COLUMN_FIELD, hash_column_list[index]
+                pa.field(sc._PK_HASH_COLUMN_NAME, hash_column_list[index].type),
+                hash_column_list[index],
             )
 
         total_len += len(table)
@@ -248,14 +289,12 @@ def group_record_indices_by_hash_bucket(
 
     input_table_len = len(pki_table)
 
-    hash_bucket_id_col_list = np.empty([input_table_len], dtype="int32")
     bucketing_start_time = time.monotonic()
 
-    for index, hash_value in enumerate(sc.pk_hash_string_column_np(pki_table)):
-        hash_bucket = pk_digest_to_hash_bucket_index(hash_value, num_buckets)
-        hash_bucket_id_col_list[index] = hash_bucket
+    hash_bucket_id_col_list = pk_digest_array_to_hash_bucket_indices(
+        sc.pk_hash_column(pki_table), num_buckets
+    )
 
-    pki_table = sc.append_hash_bucket_idx_col(pki_table, hash_bucket_id_col_list)
     bucketing_end_time = time.monotonic()
 
     logger.info(
@@ -264,8 +303,9 @@ def group_record_indices_by_hash_bucket(
     )
 
     result, group_latency = timed_invocation(
-        _optimized_group_record_batches_by_hash_bucket,
-        pki_table=pki_table,
+        _group_record_batches_by_hash_bucket,
+        table=pki_table.drop([sc._PK_HASH_COLUMN_NAME]),
+        hash_bucket_indices=hash_bucket_id_col_list,
         num_buckets=num_buckets,
     )
 
@@ -276,15 +316,64 @@ def group_record_indices_by_hash_bucket(
     return result
 
 
+def _coalesce_delta_file_envelopes(
+    delta_file_envelopes: List[DeltaFileEnvelope],
+) -> List[DeltaFileEnvelope]:
+    """
+    Concatenates consecutive delta file envelopes of a hash bucket that share a
+    stream position and delta type into a single envelope with one contiguous
+    table. Envelopes are expected in file order, so rows keep their relative
+    order, and the envelope of each run keeps the file index of its first file
+    so that merge sorts runs by (stream position, file index) as before.
+    """
+    result = []
+    run: List[DeltaFileEnvelope] = []
+
+    def _flush_run():
+        if len(run) == 1 and all(
+            column.num_chunks <= 1 for column in run[0].table.columns
+        ):
+            result.append(run[0])
+            return
+        result.append(
+            DeltaFileEnvelope.of(
+                stream_position=run[0].stream_position,
+                file_index=run[0].file_index,
+                delta_type=run[0].delta_type,
+                table=pa.concat_tables([dfe.table for dfe in run]).combine_chunks(),
+                is_src_delta=run[0].is_src_delta,
+            )
+        )
+
+    for dfe in delta_file_envelopes:
+        if run and (
+            dfe.stream_position != run[-1].stream_position
+            or dfe.delta_type != run[-1].delta_type
+            or dfe.is_src_delta != run[-1].is_src_delta
+        ):
+            _flush_run()
+            run = []
+        run.append(dfe)
+
+    if run:
+        _flush_run()
+
+    return result
+
+
 def group_hash_bucket_indices(
     hash_bucket_object_groups: np.ndarray,
     num_buckets: int,
     num_groups: int,
     object_store: Optional[IObjectStore] = None,
+    hb_index_to_hash_group_index: Optional[List[int]] = None,
 ) -> np.ndarray:
     """
     This method persists all tables for a given hash bucket into the object store
-    and returns the object references for each hash group.
+    and returns the object references for each hash group. The table fragments of
+    each hash bucket are first coalesced into a contiguous table per stream
+    position, which is much cheaper to serialize than many small tables.
+    Hash buckets are assigned to hash groups by the given assignment, if any.
     """
 
     hash_bucket_group_to_obj_id_size_tuple = np.empty([num_groups], dtype="object")
@@ -298,11 +387,14 @@ def group_hash_bucket_indices(
 
     for hb_index, obj in enumerate(hash_bucket_object_groups):
         if obj:
-            hb_group = hash_bucket_index_to_hash_group_index(hb_index, num_groups)
+            hb_group = hash_bucket_index_to_hash_group_index(
+                hb_index, num_groups, hb_index_to_hash_group_index
+            )
             if hb_group_to_object[hb_group] is None:
                 hb_group_to_object[hb_group] = np.empty([num_buckets], dtype="object")
                 hash_group_to_size[hb_group] = np.int64(0)
                 hash_group_to_num_rows[hb_group] = np.int64(0)
+            obj = _coalesce_delta_file_envelopes(obj)
             hb_group_to_object[hb_group][hb_index] = obj
             for dfe in obj:
                 casted_dfe: DeltaFileEnvelope = dfe
@@ -326,22 +418,164 @@ def group_hash_bucket_indices(
     return hash_bucket_group_to_obj_id_size_tuple
 
 
-def hash_bucket_index_to_hash_group_index(hb_index: int, num_groups: int) -> int:
+def hash_bucket_index_to_hash_group_index(
+    hb_index: int,
+    num_groups: int,
+    hb_index_to_hash_group_index: Optional[List[int]] = None,
+) -> int:
+    """
+    Returns the hash group of the given hash bucket. Hash buckets are assigned
+    to hash groups round-robin unless an explicit assignment of the hash group
+    of every hash bucket is given.
+    """
+    if hb_index_to_hash_group_index is not None:
+        return hb_index_to_hash_group_index[hb_index]
+
     return hb_index % num_groups
 
 
 def hash_group_index_to_hash_bucket_indices(
-    hb_group: int, num_buckets: int, num_groups: int
+    hb_group: int,
+    num_buckets: int,
+    num_groups: int,
+    hb_index_to_hash_group_index: Optional[List[int]] = None,
 ) -> Iterable[int]:
 
+    if hb_index_to_hash_group_index is not None:
+        return [
+            hb_index
+            for hb_index, hb_index_group in enumerate(hb_index_to_hash_group_index)
+            if hb_index_group == hb_group
+        ]
+
     if hb_group > num_buckets:
         return []
 
     return range(hb_group, num_buckets, num_groups)
 
 
-def pk_digest_to_hash_bucket_index(digest: str, num_buckets: int) -> int:
+def pk_digest_to_hash_bucket_index(digest: Union[bytes, str], num_buckets: int) -> int:
     """
-    Generates the hash bucket index from the given digest.
+    Generates the hash bucket index from the given digest. A hex digest
+    string maps to the same hash bucket as its decoded bytes.
     """
+    if isinstance(digest, bytes):
+        return int.from_bytes(digest, "big") % num_buckets
+
     return int(digest, 16) % num_buckets
+
+
+def pk_digest_array_to_hash_bucket_indices(
+    digests: Union[pa.Array, pa.ChunkedArray], num_buckets: int
+) -> np.ndarray:
+    """
+    Generates the hash bucket index of every digest in the given array. The
+    result is equal to calling pk_digest_to_hash_bucket_index on each digest,
+    but fixed size binary digests and fixed-width hex digests are reduced with
+    vectorized NumPy operations instead of a Python loop.
+    """
+    if isinstance(digests, pa.ChunkedArray):
+        chunks = digests.chunks
+    else:
+        chunks = [digests]
+
+    result = [np.empty([0], dtype="int32")]
+    for chunk in chunks:
+        if pa.types.is_fixed_size_binary(chunk.type):
+            digest_bytes = _fixed_size_binary_array_to_bytes(chunk)
+        else:
+            digest_bytes = _hex_digest_array_to_bytes(chunk)
+        if digest_bytes is None or num_buckets > _MAX_VECTORIZED_HASH_BUCKET_COUNT:
+            logger.info(
+                f"Falling back to row-wise hash bucket assignment for "
+                f"{len(chunk)} digests of type {chunk.type}"
+            )
+            hash_buckets = np.array(
+                [
+                    pk_digest_to_hash_bucket_index(digest, num_buckets)
+                    for digest in chunk.to_numpy(zero_copy_only=False)
+                ],
+                dtype="int32",
+            )
+        else:
+            hash_buckets = _digest_bytes_to_hash_bucket_indices(
+                digest_bytes, num_buckets
+            )
+        result.append(hash_buckets)
+
+    return np.concatenate(result)
+
+
+def _fixed_size_binary_array_to_bytes(array: pa.Array) -> Optional[np.ndarray]:
+    """
+    Returns a zero-copy 2D view of the bytes of a fixed size binary array with
+    one row per value, or None if the array contains nulls.
+    """
+    if array.null_count:
+        return None
+
+    byte_width = array.type.byte_width
+    data = np.frombuffer(array.buffers()[1], dtype="uint8")
+    return data[
+        array.offset * byte_width : (array.offset + len(array)) * byte_width
+    ].reshape(len(array), byte_width)
+
+
+def _hex_digest_array_to_bytes(array: pa.Array) -> Optional[np.ndarray]:
+    """
+    Decodes a string array of equal length hex digests into a 2D array of
+    big-endian digest bytes with one row per digest. Returns None if the
+    digests are not all non-null and of the same even length.
+    """
+    if not pa.types.is_string(array.type):
+        return None
+
+    if array.null_count:
+        return None
+
+    num_digests = len(array)
+    if num_digests == 0:
+        return np.empty([0, 0], dtype="uint8")
+
+    _, offsets_buffer, data_buffer = array.buffers()
+    offsets = np.frombuffer(offsets_buffer, dtype="int32")[
+        array.offset : array.offset + num_digests + 1
+    ]
+    digest_len = offsets[1] - offsets[0]
+    if digest_len == 0 or digest_len % 2:
+        return None
+
+    if not np.all(np.diff(offsets) == digest_len):
+        return None
+
+    # the hex digests are contiguous in the data buffer, so they can be
+    # decoded at once. binascii.Error is raised for invalid hex like int().
+    digest_bytes = binascii.unhexlify(memoryview(data_buffer)[offsets[0] : offsets[-1]])
+    return np.frombuffer(digest_bytes, dtype="uint8").reshape(
+        num_digests, digest_len // 2
+    )
+
+
+def _digest_bytes_to_hash_bucket_indices(
+    digest_bytes: np.ndarray, num_buckets: int
+) -> np.ndarray:
+    """
+    Computes int.from_bytes(digest, "big") % num_buckets for every row of
+    a 2D array of digest bytes by reducing one 32-bit word at a time.
+    """
+    num_digests, digest_len = digest_bytes.shape
+    padding = -digest_len % 4
+    if padding:
+        digest_bytes = np.hstack(
+            [np.zeros([num_digests, padding], dtype="uint8"), digest_bytes]
+        )
+
+    words = np.ascontiguousarray(digest_bytes).view(">u4").astype("uint64")
+    divisor = np.uint64(num_buckets)
+    word_bits = np.uint64(32)
+
+    remainders = np.zeros([num_digests], dtype="uint64")
+    for word_index in range(words.shape[1]):
+        remainders = ((remainders << word_bits) | words[:, word_index]) % divisor
+
+    return remainders.astype("int32")
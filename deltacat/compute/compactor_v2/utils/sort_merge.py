@@ -0,0 +1,316 @@
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from deltacat import logs
+from deltacat.compute.compactor.utils import system_columns as sc
+from deltacat.compute.compactor_v2.utils.dedupe import drop_duplicates_presorted
+from deltacat.storage import DeltaType, SortKey, SortOrder
+from deltacat.utils.performance import timed_invocation
+
+logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
+
+
+def _to_sortable_array(array: pa.ChunkedArray) -> np.ndarray:
+    """
+    Converts a primary key hash column into a numpy array whose ordering matches
+    the byte-wise ordering of the hash values. Fixed size binary digests are
+    viewed as fixed width bytes without copying each value into a Python object.
+    """
+    array = array.combine_chunks() if isinstance(array, pa.ChunkedArray) else array
+    if pa.types.is_fixed_size_binary(array.type):
+        byte_width = array.type.byte_width
+        values = np.frombuffer(array.buffers()[1], dtype=f"S{byte_width}")
+        return values[array.offset : array.offset + len(array)]
+    return array.to_numpy(zero_copy_only=False)
+
+
+def _is_sorted(keys: np.ndarray) -> bool:
+    return len(keys) < 2 or bool(np.all(keys[1:] >= keys[:-1]))
+
+
+def _sort_order(keys: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Returns the stable sort order of the given keys, or None if the keys are
+    already sorted.
+    """
+    if _is_sorted(keys):
+        return None
+    return np.argsort(keys, kind="stable")
+
+
+def can_sort_merge(table: pa.Table, on: str) -> bool:
+    """
+    Returns true if the given column can be used to sort merge the table, i.e.
+    it exists and has no nulls.
+    """
+    return on in table.column_names and table[on].null_count == 0
+
+
+def drop_duplicates_sorted(table: pa.Table, on: str) -> pa.Table:
+    """
+    Drops all but the last record of each key in the given column and returns
+    the remaining records sorted by the key. Records of the same key are
+    resolved in table order, so the last written record wins. Tables already
+    sorted by the key are deduplicated in linear time without building a hash
+    table.
+    """
+    keys = _to_sortable_array(table[on])
+    order = _sort_order(keys)
+    if order is None:
+        return drop_duplicates_presorted(table, on)
+
+    keys = keys[order]
+    is_last = np.ones(len(keys), dtype=bool)
+    is_last[:-1] = keys[1:] != keys[:-1]
+    return table.take(order[is_last])
+
+
+def merge_sorted(
+    compacted_table: Optional[pa.Table],
+    incremental_table: pa.Table,
+    on: str,
+    drop_incremental: Optional[np.ndarray] = None,
+) -> pa.Table:
+    """
+    Merges a compacted table with a deduplicated incremental table, both sorted
+    by the key in the given column, into a single table sorted by the key.
+    Compacted records replaced by an incremental record of the same key are
+    dropped. Incremental records flagged in drop_incremental (e.g. deletes) still
+    replace compacted records but are not written to the result.
+
+    Instead of building hash tables of either side, compacted records are
+    located in the sorted incremental keys with a binary search and the two
+    sides are interleaved by their sorted positions.
+    """
+    incremental_keys = _to_sortable_array(incremental_table[on])
+
+    if compacted_table is None or not len(compacted_table):
+        result = incremental_table
+        if drop_incremental is not None:
+            result = result.filter(pa.array(~drop_incremental))
+        return result
+
+    compacted_keys = _to_sortable_array(compacted_table[on])
+    order = _sort_order(compacted_keys)
+    if order is not None:
+        logger.info(
+            f"Compacted table of {len(compacted_table)} records is not sorted "
+            f"by {on}. Sorting it before merge."
+        )
+        compacted_table = compacted_table.take(order)
+        compacted_keys = compacted_keys[order]
+
+    positions = np.searchsorted(incremental_keys, compacted_keys)
+    replaced = np.zeros(len(compacted_keys), dtype=bool)
+    in_bounds = positions < len(incremental_keys)
+    replaced[in_bounds] = (
+        incremental_keys[positions[in_bounds]] == compacted_keys[in_bounds]
+    )
+
+    if replaced.any():
+        compacted_table = compacted_table.filter(pa.array(~replaced))
+        compacted_keys = compacted_keys[~replaced]
+
+    if drop_incremental is not None and drop_incremental.any():
+        incremental_table = incremental_table.filter(pa.array(~drop_incremental))
+        incremental_keys = incremental_keys[~drop_incremental]
+
+    # The result position of a record is its position on its own side plus the
+    # number of records on the other side with a smaller key. Keys are unique
+    # across both sides at this point.
+    compacted_positions = np.arange(len(compacted_keys)) + np.searchsorted(
+        incremental_keys, compacted_keys
+    )
+    incremental_positions = np.arange(len(incremental_keys)) + np.searchsorted(
+        compacted_keys, incremental_keys
+    )
+    take_indices = np.empty(len(compacted_keys) + len(incremental_keys), dtype=np.int64)
+    take_indices[compacted_positions] = np.arange(len(compacted_keys))
+    take_indices[incremental_positions] = np.arange(
+        len(compacted_keys), len(take_indices)
+    )
+
+    result, latency = timed_invocation(
+        lambda: pa.concat_tables([compacted_table, incremental_table]).take(
+            take_indices
+        )
+    )
+    logger.info(
+        f"Sort merged {len(compacted_keys)} compacted and {len(incremental_keys)} "
+        f"incremental records in {latency}s"
+    )
+    return result
+
+
+def sort_merge_tables(
+    compacted_table: Optional[pa.Table],
+    incremental_table: pa.Table,
+    on: str = sc._PK_HASH_COLUMN_NAME,
+) -> pa.Table:
+    """
+    Deduplicates the incremental table and merges it into the compacted table,
+    returning a table sorted by the key in the given column. Rows of the
+    incremental table flagged as deletes replace compacted records of the same
+    key and are then dropped.
+    """
+    incremental_table = drop_duplicates_sorted(incremental_table, on)
+
+    drop_incremental = None
+    if sc._DELTA_TYPE_COLUMN_NAME in incremental_table.column_names:
+        drop_incremental = np.not_equal(
+            incremental_table[sc._DELTA_TYPE_COLUMN_NAME].to_numpy(),
+            sc.delta_type_to_field(DeltaType.UPSERT),
+        )
+        incremental_table = incremental_table.drop([sc._DELTA_TYPE_COLUMN_NAME])
+
+    return merge_sorted(compacted_table, incremental_table, on, drop_incremental)
+
+
+def _sort_key_columns(
+    table: pa.Table, sort_keys: List[SortKey]
+) -> Optional[List[Tuple[np.ndarray, bool]]]:
+    """
+    Returns the values of each sort key column of the table along with whether
+    the key is sorted in descending order, or None if any column holds nulls or
+    NaNs, whose sort order numpy comparisons do not reproduce.
+    """
+    columns = []
+    for sort_key in sort_keys:
+        column = table[sort_key.key_name]
+        if column.null_count:
+            return None
+        values = column.to_numpy()
+        if values.dtype.kind == "f" and np.isnan(values).any():
+            return None
+        columns.append((values, sort_key.sort_order is SortOrder.DESCENDING))
+    return columns
+
+
+def _sorts_before(
+    left_columns: List[Tuple[np.ndarray, bool]],
+    left_indices: np.ndarray,
+    right_columns: List[Tuple[np.ndarray, bool]],
+    right_indices: np.ndarray,
+) -> np.ndarray:
+    """
+    Returns whether each left record sorts strictly before the right record at
+    the same position, comparing their sort keys lexicographically.
+    """
+    result = np.zeros(len(left_indices), dtype=bool)
+    equal = np.ones(len(left_indices), dtype=bool)
+    for (left, descending), (right, _) in zip(left_columns, right_columns):
+        left = left[left_indices]
+        right = right[right_indices]
+        result |= equal & ((left > right) if descending else (left < right))
+        equal &= left == right
+    return result
+
+
+def _insertion_indices(
+    sorted_columns: List[Tuple[np.ndarray, bool]],
+    sorted_length: int,
+    query_columns: List[Tuple[np.ndarray, bool]],
+    query_length: int,
+) -> np.ndarray:
+    """
+    Returns the number of sorted records that sort before or equal to each
+    query record, i.e. the index each query record is inserted at after all
+    sorted records with equal keys. All queries are binary searched together,
+    so each step compares them at once.
+    """
+    low = np.zeros(query_length, dtype=np.int64)
+    high = np.full(query_length, sorted_length, dtype=np.int64)
+    active = np.flatnonzero(low < high)
+    while len(active):
+        middle = (low[active] + high[active]) // 2
+        goes_before = _sorts_before(query_columns, active, sorted_columns, middle)
+        high[active[goes_before]] = middle[goes_before]
+        low[active[~goes_before]] = middle[~goes_before] + 1
+        active = active[low[active] < high[active]]
+    return low
+
+
+def _is_sorted_by(columns: List[Tuple[np.ndarray, bool]], length: int) -> bool:
+    indices = np.arange(length)
+    return not _sorts_before(columns, indices[1:], columns, indices[:-1]).any()
+
+
+def _merge_two_sorted_by(
+    left: Tuple[pa.Table, List[Tuple[np.ndarray, bool]]],
+    right: Tuple[pa.Table, List[Tuple[np.ndarray, bool]]],
+) -> Tuple[pa.Table, List[Tuple[np.ndarray, bool]]]:
+    left_table, left_columns = left
+    right_table, right_columns = right
+
+    # Right records are inserted after left records with equal sort keys, so
+    # records of equal sort keys keep the order of their tables.
+    insertion_indices = _insertion_indices(
+        left_columns, len(left_table), right_columns, len(right_table)
+    )
+    left_positions = np.arange(len(left_table)) + np.searchsorted(
+        insertion_indices, np.arange(len(left_table)), side="right"
+    )
+    right_positions = np.arange(len(right_table)) + insertion_indices
+    take_indices = np.empty(len(left_table) + len(right_table), dtype=np.int64)
+    take_indices[left_positions] = np.arange(len(left_table))
+    take_indices[right_positions] = np.arange(len(left_table), len(take_indices))
+
+    table = pa.concat_tables([left_table, right_table]).take(take_indices)
+    columns = [
+        (np.concatenate([left_values, right_values])[take_indices], descending)
+        for (left_values, descending), (right_values, _) in zip(
+            left_columns, right_columns
+        )
+    ]
+    return table, columns
+
+
+def merge_sorted_by(
+    tables: List[pa.Table], sort_keys: List[SortKey]
+) -> Optional[pa.Table]:
+    """
+    Merges tables sorted by the given sort keys into a single table sorted by
+    them. Records with equal sort keys keep the order of the tables they come
+    from. Tables that are not sorted are sorted before the merge, and None is
+    returned if any table has nulls or NaNs in its sort keys.
+
+    Runs are merged pairwise by binary searching the records of one run in the
+    other, so merging a large sorted table with a few small runs costs linear
+    time over the large table instead of sorting all records again.
+    """
+    runs = []
+    for table in tables:
+        columns = _sort_key_columns(table, sort_keys)
+        if columns is None:
+            return None
+        if not _is_sorted_by(columns, len(table)):
+            logger.info(
+                f"Table of {len(table)} records is not sorted by {sort_keys}. "
+                f"Sorting it before merge."
+            )
+            order = pc.sort_indices(table, sort_keys=sort_keys).to_numpy()
+            table = table.take(order)
+            columns = [(values[order], descending) for values, descending in columns]
+        runs.append((table, columns))
+
+    def merge_runs() -> pa.Table:
+        merged_runs = runs
+        while len(merged_runs) > 1:
+            merged_runs = [
+                _merge_two_sorted_by(*merged_runs[i : i + 2])
+                if i + 1 < len(merged_runs)
+                else merged_runs[i]
+                for i in range(0, len(merged_runs), 2)
+            ]
+        return merged_runs[0][0]
+
+    result, latency = timed_invocation(merge_runs)
+    logger.info(
+        f"Merged {len(runs)} runs of {len(result)} records sorted by "
+        f"{sort_keys} in {latency}s"
+    )
+    return result
@@ -0,0 +1,97 @@
+import logging
+import os
+from typing import List, Optional
+
+import numpy as np
+import pyarrow as pa
+
+from deltacat import logs
+from deltacat.compute.compactor_v2.constants import PK_HASHER_ID
+from deltacat.compute.compactor_v2.model.pk_bloom_filter import pk_bloom_filter_keys
+
+logger = logs.configure_deltacat_logger(logging.getLogger(__name__))
+
+
+def pk_hash_sub_range_indices(
+    table: pa.Table,
+    primary_keys: List[str],
+    sub_range_count: int,
+    pk_hasher_id: str = PK_HASHER_ID,
+) -> np.ndarray:
+    """
+    Returns the index of the primary key hash sub-range of each record of the
+    table. The 64-bit primary key digest space is divided into sub_range_count
+    equal ranges, so records of the same primary key always share a sub-range.
+    """
+    keys = pk_bloom_filter_keys(table, primary_keys, pk_hasher_id)
+    return ((keys >> np.uint64(32)) * np.uint64(sub_range_count)) >> np.uint64(32)
+
+
+def split_by_pk_hash_sub_range(
+    table: pa.Table,
+    primary_keys: List[str],
+    sub_range_count: int,
+    pk_hasher_id: str = PK_HASHER_ID,
+) -> List[pa.Table]:
+    """
+    Splits the table into one table per primary key hash sub-range. Records
+    keep their relative order within each sub-range.
+    """
+    sub_ranges = pk_hash_sub_range_indices(
+        table, primary_keys, sub_range_count, pk_hasher_id
+    )
+    order = np.argsort(sub_ranges, kind="stable")
+    table = table.take(order)
+    offsets = np.searchsorted(sub_ranges[order], np.arange(sub_range_count + 1))
+    return [
+        table.slice(offsets[i], offsets[i + 1] - offsets[i])
+        for i in range(sub_range_count)
+    ]
+
+
+def write_spill_file(table: pa.Table, path: str) -> None:
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_spill_files(paths: List[str]) -> Optional[pa.Table]:
+    """
+    Reads the given spill files into a single table. Files are memory mapped,
+    so their records are paged in from local disk as they are accessed.
+    """
+    if not paths:
+        return None
+    return pa.concat_tables(
+        [pa.ipc.open_file(pa.memory_map(path)).read_all() for path in paths]
+    )
+
+
+def spill_by_pk_hash_sub_range(
+    table: pa.Table,
+    primary_keys: List[str],
+    sub_range_count: int,
+    spill_directory: str,
+    name: str,
+    pk_hasher_id: str = PK_HASHER_ID,
+) -> List[Optional[str]]:
+    """
+    Splits the table by primary key hash sub-range and writes each non-empty
+    sub-range to an Arrow IPC file in the spill directory. Returns the path of
+    the spill file of each sub-range, or None for empty sub-ranges.
+    """
+    paths = []
+    for sub_range, sub_range_table in enumerate(
+        split_by_pk_hash_sub_range(table, primary_keys, sub_range_count, pk_hasher_id)
+    ):
+        if not len(sub_range_table):
+            paths.append(None)
+            continue
+        path = os.path.join(spill_directory, f"{sub_range}_{name}.arrow")
+        write_spill_file(sub_range_table, path)
+        paths.append(path)
+    logger.debug(
+        f"Spilled {len(table)} records of {name} into "
+        f"{sum(path is not None for path in paths)} sub-range files"
+    )
+    return paths
@@ -207,6 +207,64 @@ def hash_bucket_resource_options_provider(
     return get_task_options(0.01, total_memory, ray_custom_resources)
 
 
+def coalesce_resource_options_provider(
+    index: int,
+    item: List[DeltaAnnotated],
+    previous_inflation: float,
+    average_record_size_bytes: float,
+    total_memory_buffer_percentage: int,
+    records_per_compacted_file: int,
+    ray_custom_resources: Optional[Dict] = None,
+    memory_logs_enabled: Optional[bool] = None,
+    **kwargs,
+) -> Dict:
+    debug_memory_params = {"coalesce_task_index": index}
+    max_entry_size_bytes = 0.0
+    size_bytes = 0.0
+    num_rows = 0
+
+    for annotated_delta in item:
+        for entry in annotated_delta.manifest.entries:
+            entry_size = estimate_manifest_entry_size_bytes(
+                entry=entry, previous_inflation=previous_inflation
+            )
+            num_rows += estimate_manifest_entry_num_rows(
+                entry=entry,
+                previous_inflation=previous_inflation,
+                average_record_size_bytes=average_record_size_bytes,
+            )
+            size_bytes += entry_size
+            max_entry_size_bytes = max(max_entry_size_bytes, entry_size)
+
+    if not num_rows:
+        logger.debug(
+            f"[Coalesce task {index}]: No records, skipping memory allocation calculation"
+        )
+        return {"CPU": 0.01}
+
+    # A coalesce task holds at most one input file and one output file worth of
+    # records, both of which may be copied once when concatenated and sliced.
+    output_file_size_bytes = min(
+        size_bytes, records_per_compacted_file * size_bytes / num_rows
+    )
+    total_memory = 2 * (max_entry_size_bytes + output_file_size_bytes)
+    debug_memory_params["size_bytes"] = size_bytes
+    debug_memory_params["num_rows"] = num_rows
+    debug_memory_params["max_entry_size_bytes"] = max_entry_size_bytes
+    debug_memory_params["output_file_size_bytes"] = output_file_size_bytes
+    debug_memory_params["total_memory"] = total_memory
+
+    # Consider buffer
+    total_memory = total_memory * (1 + total_memory_buffer_percentage / 100.0)
+    debug_memory_params["total_memory_with_buffer"] = total_memory
+    logger.debug_conditional(
+        f"[Coalesce task {index}]: Params used for calculating coalesce memory: {debug_memory_params}",
+        memory_logs_enabled,
+    )
+
+    return get_task_options(0.01, total_memory, ray_custom_resources)
+
+
 def merge_resource_options_provider(
     index: int,
     item: Tuple[int, List],
@@ -221,6 +279,7 @@ def merge_resource_options_provider(
     deltacat_storage=unimplemented_deltacat_storage,
     deltacat_storage_kwargs: Optional[Dict] = {},
     memory_logs_enabled: Optional[bool] = None,
+    hb_index_to_hash_group_index: Optional[List[int]] = None,
     **kwargs,
 ) -> Dict:
     debug_memory_params = {"merge_task_index": index}
@@ -252,6 +311,7 @@ def merge_resource_options_provider(
         deltacat_storage=deltacat_storage,
         deltacat_storage_kwargs=deltacat_storage_kwargs,
         memory_logs_enabled=memory_logs_enabled,
+        hb_index_to_hash_group_index=hb_index_to_hash_group_index,
     )
 
 
@@ -312,6 +372,7 @@ def get_merge_task_options(
     deltacat_storage=unimplemented_deltacat_storage,
     deltacat_storage_kwargs: Optional[Dict] = {},
     memory_logs_enabled: Optional[bool] = None,
+    hb_index_to_hash_group_index: Optional[List[int]] = None,
 ) -> Dict[str, Any]:
     if (
         round_completion_info
@@ -332,7 +393,10 @@ def get_merge_task_options(
         debug_memory_params["average_record_size"] = average_record_size
 
         iterable = hash_group_index_to_hash_bucket_indices(
-            hb_group_idx, round_completion_info.hash_bucket_count, num_hash_groups
+            hb_group_idx,
+            round_completion_info.hash_bucket_count,
+            num_hash_groups,
+            hb_index_to_hash_group_index,
         )
 
         for hb_idx in iterable:
@@ -616,8 +616,8 @@ REBASE_THEN_INCREMENTAL_TEST_CASES = {
         expected_terminal_compact_partition_result=pa.Table.from_arrays(
             [
                 pa.array([0, 0, 1, 1, 1, 2, 2, 3, 3]),
-                pa.array([0, 0, 1, 0, 1, 0, 0, 1, 1]),
-                pa.array([1.4, 2, 1.5, 2.4, 2.1, 1.6, 2.2, 1.7, 2.3]),
+                pa.array([0, 0, 0, 1, 1, 0, 0, 1, 1]),
+                pa.array([1.4, 2, 2.4, 1.5, 2.1, 1.6, 2.2, 1.7, 2.3]),
             ],
             names=["pk_col_1", "sk_col_1", "col_1"],
         ),
@@ -0,0 +1,136 @@
+import pyarrow as pa
+
+from deltacat.compute.compactor_v2.deletes.delete_key_set import (
+    CompiledDeleteKeySet,
+    EqualityDeleteKeySet,
+)
+from deltacat.compute.compactor_v2.utils.pk_hasher import Xxh3128PkHasher
+
+
+class TestEqualityDeleteKeySet:
+    def test_contains_single_column(self):
+        delete_key_set = EqualityDeleteKeySet(
+            pa.table({"col_1": ["a", "c", "a", None]}), ["col_1"]
+        )
+
+        assert len(delete_key_set) == 3
+        assert delete_key_set.contains(
+            pa.table({"col_1": ["a", "b", None, "c"]})
+        ).tolist() == [True, False, True, True]
+
+    def test_contains_composite_keys(self):
+        delete_key_set = EqualityDeleteKeySet(
+            pa.table(
+                {
+                    "col_1": ["a", "b", "a", "c"],
+                    "col_2": [1, 2, 1, None],
+                    "col_3": [True, False, True, True],
+                }
+            ),
+            ["col_1", "col_2", "col_3"],
+        )
+        table = pa.table(
+            {
+                "col_1": ["a", "a", "b", "b", "c", "c", "d"],
+                "col_2": [1, 2, 1, 2, None, 1, 1],
+                "col_3": [True, True, False, False, True, True, True],
+            }
+        )
+
+        assert len(delete_key_set) == 3
+        # each column value is a delete value, but only full tuples match
+        assert delete_key_set.contains(table).tolist() == [
+            True,
+            False,
+            False,
+            True,
+            True,
+            False,
+            False,
+        ]
+
+    def test_contains_empty_table(self):
+        delete_key_set = EqualityDeleteKeySet(
+            pa.table({"col_1": [1], "col_2": [2]}), ["col_1", "col_2"]
+        )
+        table = pa.table({"col_1": [1], "col_2": [2]}).slice(0, 0)
+
+        assert delete_key_set.contains(table).tolist() == []
+
+
+class TestCompiledDeleteKeySet:
+    def test_contains(self):
+        delete_key_set = CompiledDeleteKeySet.compile(
+            pa.table({"col_2": [1, 2, 1], "col_1": ["a", "b", "a"]}),
+            ["col_2", "col_1"],
+        )
+        table = pa.table(
+            {
+                "col_1": ["a", "a", "b", None],
+                "col_2": pa.array([1, 2, 2, 1], pa.int32()),
+            }
+        )
+
+        assert len(delete_key_set) == 2
+        assert delete_key_set.delete_columns == ["col_1", "col_2"]
+        # record values are cast to the delete column types before hashing
+        assert delete_key_set.contains(table).tolist() == [True, False, True, False]
+
+    def test_contains_values_that_cannot_be_cast(self):
+        delete_key_set = CompiledDeleteKeySet.compile(
+            pa.table(
+                {
+                    "col_1": pa.array([1, 2], pa.int32()),
+                    "col_2": pa.array([0, 1000], pa.timestamp("s")),
+                }
+            ),
+            ["col_1", "col_2"],
+        )
+        table = pa.table(
+            {
+                "col_1": [1, 2**40, 2, 2],
+                "col_2": pa.array([0, 0, 1000000, 1000001], pa.timestamp("ms")),
+            }
+        )
+
+        # out of range and truncated values never match instead of failing
+        assert delete_key_set.contains(table).tolist() == [True, False, True, False]
+
+    def test_contains_canonical_fixed_width_keys(self):
+        delete_key_set = CompiledDeleteKeySet.compile(
+            pa.table({"pk": pa.array([1, 2], pa.int32())}),
+            ["pk"],
+            pk_hasher_id=Xxh3128PkHasher.ID,
+        )
+
+        # keys are digested from their canonical int64 values without a cast
+        assert delete_key_set.contains(pa.table({"pk": [1, 2**40, 2]})).tolist() == [
+            True,
+            False,
+            True,
+        ]
+
+    def test_round_trip_through_table(self):
+        delete_key_set = CompiledDeleteKeySet.compile(
+            pa.table({"pk": [str(i) for i in range(10)]}), ["pk"]
+        )
+        table = delete_key_set.to_table()
+
+        assert CompiledDeleteKeySet.is_compiled(table)
+        assert not CompiledDeleteKeySet.is_compiled(pa.table({"pk": ["1"]}))
+        loaded_delete_key_set = CompiledDeleteKeySet.from_table(table)
+        assert loaded_delete_key_set.delete_columns == ["pk"]
+        assert loaded_delete_key_set.pk_hasher_id == delete_key_set.pk_hasher_id
+        # keys are stored sorted
+        assert loaded_delete_key_set.key_hashes.to_pylist() == sorted(
+            delete_key_set.key_hashes.to_pylist()
+        )
+        assert loaded_delete_key_set.contains(
+            pa.table({"pk": ["3", "30"]})
+        ).tolist() == [True, False]
+
+    def test_compile_null_delete_keys(self):
+        assert (
+            CompiledDeleteKeySet.compile(pa.table({"col_1": ["a", None]}), ["col_1"])
+            is None
+        )
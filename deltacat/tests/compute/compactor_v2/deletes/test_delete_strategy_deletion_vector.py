@@ -0,0 +1,60 @@
+import pyarrow as pa
+import ray
+
+from deltacat.storage import (
+    DeltaType,
+)
+from deltacat.compute.compactor_v2.deletes.delete_file_envelope import (
+    DeleteFileEnvelope,
+)
+from deltacat.compute.compactor_v2.deletes.delete_strategy_deletion_vector import (
+    DeletionVectorDeleteStrategy,
+)
+
+
+class TestDeletionVectorDeleteStrategy:
+    def test_match_deletes(self):
+        delete_strategy = DeletionVectorDeleteStrategy()
+        ray.shutdown()
+        ray.init(local_mode=True, ignore_reinit_error=True)
+        delete_file_envelopes = [
+            DeleteFileEnvelope.of(
+                stream_position=1,
+                delta_type=DeltaType.DELETE,
+                table=pa.table({"col_1": ["a"], "col_2": [2]}),
+                delete_columns=["col_1", "col_2"],
+            ),
+            DeleteFileEnvelope.of(
+                stream_position=2,
+                delta_type=DeltaType.DELETE,
+                table=pa.table({"pk_col_1": [3]}),
+                delete_columns=["pk_col_1"],
+            ),
+        ]
+        table = pa.table(
+            {
+                "pk_col_1": [0, 1, 2, 3],
+                "col_1": ["a", "a", "b", "b"],
+                "col_2": [1, 2, 1, 2],
+            }
+        )
+
+        assert DeletionVectorDeleteStrategy.delete_columns(delete_file_envelopes) == [
+            "col_1",
+            "col_2",
+            "pk_col_1",
+        ]
+        # records are matched against every envelope but not dropped
+        assert delete_strategy.match_deletes(table, delete_file_envelopes).tolist() == [
+            False,
+            True,
+            False,
+            True,
+        ]
+        assert delete_strategy.match_deletes(None, delete_file_envelopes).tolist() == []
+        # deletes are still applied by rewriting when a table is rewritten anyway
+        actual_table, actual_dropped_rows = delete_strategy.apply_many_deletes(
+            table, delete_file_envelopes
+        )
+        assert actual_table["pk_col_1"].to_pylist() == [0, 2]
+        assert actual_dropped_rows == 2
@@ -1,3 +1,5 @@
+import pickle
+
 import pytest
 
 from deltacat.storage import (
@@ -229,8 +231,43 @@ TEST_CASES_APPLY_MANY_DELETES = {
 
 class TestEqualityDeleteStrategy:
     def test_apply_deletes(self):
-        # TODO:
-        pass
+        from deltacat.compute.compactor_v2.deletes.delete_strategy_equality_delete import (
+            EqualityDeleteStrategy,
+        )
+
+        delete_strategy = EqualityDeleteStrategy()
+        delete_file_envelope = DeleteFileEnvelope.of(
+            stream_position=1,
+            delta_type=DeltaType.DELETE,
+            table=pa.table({"col_1": ["a", "b"], "col_2": [1, 2]}),
+            delete_columns=["col_1", "col_2"],
+            table_storage_strategy=None,
+        )
+        table = pa.table(
+            {
+                "pk_col_1": [0, 1, 2, 3],
+                "col_1": ["a", "a", "b", "b"],
+                "col_2": [1, 2, 1, 2],
+            }
+        )
+
+        actual_table, actual_dropped_rows = delete_strategy.apply_deletes(
+            table, delete_file_envelope
+        )
+        # only rows matching a delete key on all delete columns are dropped
+        assert actual_table["pk_col_1"].to_pylist() == [1, 2]
+        assert actual_dropped_rows == 2
+
+        # the delete key set is built once and reused for subsequent tables
+        actual_table, actual_dropped_rows = delete_strategy.apply_deletes(
+            table.slice(2), delete_file_envelope
+        )
+        assert actual_table["pk_col_1"].to_pylist() == [2]
+        assert actual_dropped_rows == 1
+        assert len(delete_strategy._delete_key_sets) == 1
+
+        # built delete key sets are not serialized with the strategy
+        assert not pickle.loads(pickle.dumps(delete_strategy))._delete_key_sets
 
     @pytest.mark.parametrize(
         [
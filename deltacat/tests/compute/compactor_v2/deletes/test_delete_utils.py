@@ -18,8 +18,10 @@ from deltacat.tests.compute.test_util_common import (
 )
 
 from dataclasses import dataclass, fields
+import io
 import ray
 import os
+from unittest.mock import patch
 from typing import Any, Dict, List, Optional, Tuple
 import deltacat.tests.local_deltacat_storage as ds
 from deltacat.compute.compactor.model.compact_partition_params import (
@@ -609,3 +611,203 @@ class TestPrepareDeletes:
                 expected_delete_table = expected_delete_tables.combine_chunks()
                 assert actual_table.equals(expected_delete_table)
         return
+
+    def test_prepare_deletes_with_compiled_delete_key_sets(
+        self, local_deltacat_storage_kwargs: Dict[str, Any]
+    ):
+        from deltacat.compute.compactor_v2.deletes.delete_key_set import (
+            CompiledDeleteKeySet,
+        )
+        from deltacat.compute.compactor_v2.deletes.utils import (
+            prepare_deletes,
+        )
+
+        ray.shutdown()
+        ray.init(local_mode=True, ignore_reinit_error=True)
+        source_namespace, source_table_name, source_table_version = create_src_table(
+            set(self.TEST_PRIMARY_KEYS),
+            None,
+            None,
+            local_deltacat_storage_kwargs,
+        )
+        source_table_stream: Stream = ds.get_stream(
+            namespace=source_namespace,
+            table_name=source_table_name,
+            table_version=source_table_version,
+            **local_deltacat_storage_kwargs,
+        )
+        staged_partition: Partition = ds.stage_partition(
+            source_table_stream, None, **local_deltacat_storage_kwargs
+        )
+        input_deltas: List[Delta] = [
+            ds.commit_delta(
+                ds.stage_delta(
+                    pa.table({"pk_col_1": pks}),
+                    staged_partition,
+                    DeltaType.DELETE,
+                    delete_parameters=DeleteParameters.of(["pk_col_1"]),
+                    **local_deltacat_storage_kwargs,
+                ),
+                **local_deltacat_storage_kwargs,
+            )
+            for pks in [["0", "1", "1"], ["2"]]
+        ]
+        partition = ds.commit_partition(
+            staged_partition, **local_deltacat_storage_kwargs
+        )
+        params = CompactPartitionParams.of(
+            {
+                "compaction_artifact_s3_bucket": TEST_S3_RCF_BUCKET_NAME,
+                "compiled_delete_key_sets_enabled": True,
+                "deltacat_storage": ds,
+                "deltacat_storage_kwargs": local_deltacat_storage_kwargs,
+                "destination_partition_locator": partition.locator,
+                "last_stream_position_to_compact": partition.stream_position,
+                "list_deltas_kwargs": local_deltacat_storage_kwargs,
+                "read_kwargs_provider": None,
+                "source_partition_locator": partition.locator,
+            }
+        )
+        s3_objects = {}
+        with patch(
+            "deltacat.compute.compactor_v2.deletes.delete_key_set_file.s3_utils"
+        ) as s3_utils:
+            s3_utils.upload.side_effect = lambda url, body, **kwargs: s3_objects.update(
+                {url: body}
+            )
+            s3_utils.download.side_effect = lambda url, *args, **kwargs: (
+                {"Body": io.BytesIO(s3_objects[url])} if url in s3_objects else None
+            )
+
+            # action
+            (delete_file_envelope,) = prepare_deletes(
+                params, input_deltas
+            ).delete_file_envelopes
+            # a retried compaction loads the persisted key set without
+            # downloading the delete deltas again
+            with patch.object(ds, "download_delta", side_effect=AssertionError):
+                (retried_delete_file_envelope,) = prepare_deletes(
+                    params, input_deltas
+                ).delete_file_envelopes
+
+        # verify
+        assert len(s3_objects) == 1
+        for envelope in [delete_file_envelope, retried_delete_file_envelope]:
+            assert CompiledDeleteKeySet.is_compiled(envelope.table)
+            assert envelope.delete_columns == ["pk_col_1"]
+            assert envelope.stream_position == input_deltas[0].stream_position
+            delete_key_set = CompiledDeleteKeySet.from_table(envelope.table)
+            assert len(delete_key_set) == 3
+            assert delete_key_set.contains(
+                pa.table({"pk_col_1": ["0", "1", "2", "3"]})
+            ).tolist() == [True, True, True, False]
+
+
+class TestRouteDeleteFileEnvelopes:
+    def test_route_delete_file_envelopes(self):
+        from deltacat.compute.compactor_v2.deletes.delete_file_envelope import (
+            DeleteFileEnvelope,
+        )
+        from deltacat.compute.compactor_v2.deletes.utils import (
+            route_delete_file_envelopes,
+        )
+        from deltacat.compute.compactor_v2.utils.primary_key_index import (
+            group_by_pk_hash_bucket,
+        )
+
+        ray.shutdown()
+        ray.init(local_mode=True, ignore_reinit_error=True)
+        delete_table = pa.table({"pk_col_1": [str(i) for i in range(20)] + [None]})
+        delete_file_envelope = DeleteFileEnvelope.of(
+            1, DeltaType.DELETE, delete_table, ["pk_col_1"]
+        )
+
+        actual = route_delete_file_envelopes(
+            [delete_file_envelope], ["pk_col_1"], 8, lambda hb_index: hb_index % 3
+        )
+
+        expected = {}
+        for hb_index, hb_table in enumerate(
+            group_by_pk_hash_bucket(delete_table.slice(0, 20), 8, ["pk_col_1"])
+        ):
+            if hb_table is not None:
+                expected.setdefault(hb_index % 3, set()).update(
+                    hb_table["pk_col_1"].to_pylist()
+                )
+        assert {
+            merge_task_index: set(
+                pk
+                for envelope in envelopes
+                for pk in envelope.table["pk_col_1"].to_pylist()
+            )
+            for merge_task_index, envelopes in actual.items()
+        } == expected
+        for envelopes in actual.values():
+            assert [envelope.stream_position for envelope in envelopes] == [1]
+            assert [envelope.delete_columns for envelope in envelopes] == [["pk_col_1"]]
+
+    def test_route_compiled_delete_file_envelopes(self):
+        from deltacat.compute.compactor_v2.deletes.delete_file_envelope import (
+            DeleteFileEnvelope,
+        )
+        from deltacat.compute.compactor_v2.deletes.delete_key_set import (
+            CompiledDeleteKeySet,
+        )
+        from deltacat.compute.compactor_v2.deletes.utils import (
+            route_delete_file_envelopes,
+        )
+
+        ray.shutdown()
+        ray.init(local_mode=True, ignore_reinit_error=True)
+        delete_table = pa.table({"pk_col_1": [str(i) for i in range(20)]})
+        compiled_delete_table = CompiledDeleteKeySet.compile(
+            delete_table, ["pk_col_1"]
+        ).to_table()
+
+        expected = route_delete_file_envelopes(
+            [DeleteFileEnvelope.of(1, DeltaType.DELETE, delete_table, ["pk_col_1"])],
+            ["pk_col_1"],
+            8,
+            lambda hb_index: hb_index % 3,
+        )
+        actual = route_delete_file_envelopes(
+            [
+                DeleteFileEnvelope.of(
+                    1, DeltaType.DELETE, compiled_delete_table, ["pk_col_1"]
+                )
+            ],
+            ["pk_col_1"],
+            8,
+            lambda hb_index: hb_index % 3,
+        )
+
+        # compiled delete keys reach the same merge tasks as their delete records
+        assert actual.keys() == expected.keys()
+        for merge_task_index, (envelope,) in actual.items():
+            (expected_envelope,) = expected[merge_task_index]
+            delete_key_set = CompiledDeleteKeySet.from_table(envelope.table)
+            assert delete_key_set.contains(expected_envelope.table).all()
+            assert len(delete_key_set) == len(expected_envelope.table)
+
+    def test_route_delete_file_envelopes_not_keyed_by_primary_keys(self):
+        from deltacat.compute.compactor_v2.deletes.delete_file_envelope import (
+            DeleteFileEnvelope,
+        )
+        from deltacat.compute.compactor_v2.deletes.utils import (
+            route_delete_file_envelopes,
+        )
+
+        delete_file_envelope = DeleteFileEnvelope.of(
+            1,
+            DeltaType.DELETE,
+            pa.table({"col_1": ["a"]}),
+            ["col_1"],
+            table_storage_strategy=None,
+        )
+
+        assert (
+            route_delete_file_envelopes(
+                [delete_file_envelope], ["pk_col_1"], 8, lambda hb_index: hb_index
+            )
+            is None
+        )
@@ -0,0 +1,113 @@
+import io
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pyarrow as pa
+
+from deltacat.compute.compactor_v2.model.deletion_vector import (
+    DeletionVector,
+    get_deleted_record_count,
+)
+from deltacat.compute.compactor_v2.utils.deletion_vector_file import (
+    apply_deletion_vector,
+    read_deleted_records,
+    store_deletion_vector,
+)
+from deltacat.storage import ManifestEntry, ManifestMeta, PartitionLocator
+from deltacat.types.media import ContentType
+
+
+class TestDeletionVector(unittest.TestCase):
+    def test_round_trip_by_encoding(self):
+        for deleted_positions, encoding in [
+            ([3, 700, 999], "positions"),
+            (list(range(0, 1000, 2)), "bitmap"),
+            ([], "positions"),
+        ]:
+            is_deleted = np.zeros(1000, dtype=bool)
+            is_deleted[deleted_positions] = True
+
+            deletion_vector = DeletionVector(dict(DeletionVector.of(is_deleted)))
+
+            self.assertEqual(deletion_vector.encoding, encoding)
+            self.assertEqual(deletion_vector.record_count, 1000)
+            self.assertEqual(
+                deletion_vector.deleted_record_count, len(deleted_positions)
+            )
+            np.testing.assert_array_equal(deletion_vector.is_deleted(), is_deleted)
+
+    def test_apply_deletion_vector(self):
+        table = pa.table({"pk": [str(i) for i in range(5)]})
+        meta = ManifestMeta.of(5, 100, ContentType.PARQUET.value, None)
+        manifest_entry = ManifestEntry.of("s3://bucket/file", meta)
+
+        self.assertEqual(apply_deletion_vector(table, manifest_entry), table)
+
+        meta.deletion_vector = DeletionVector.of(
+            np.array([True, False, False, True, False])
+        )
+
+        self.assertEqual(
+            apply_deletion_vector(table, manifest_entry)["pk"].to_pylist(),
+            ["1", "2", "4"],
+        )
+        with self.assertRaises(AssertionError):
+            apply_deletion_vector(table.slice(1), manifest_entry)
+
+    def test_with_file(self):
+        is_deleted = np.zeros(1000, dtype=bool)
+        is_deleted[::2] = True
+        deletion_vector = DeletionVector.of(is_deleted)
+
+        file_deletion_vector = deletion_vector.with_file("s3://bucket/dv.bin")
+
+        self.assertIsNone(file_deletion_vector.data)
+        self.assertEqual(file_deletion_vector.url, "s3://bucket/dv.bin")
+        self.assertEqual(file_deletion_vector.size_bytes, len(deletion_vector.data))
+        np.testing.assert_array_equal(
+            file_deletion_vector.is_deleted(deletion_vector.data), is_deleted
+        )
+        with self.assertRaises(AssertionError):
+            file_deletion_vector.is_deleted()
+
+    @patch("deltacat.compute.compactor_v2.utils.deletion_vector_file.s3_utils")
+    def test_store_deletion_vector(self, s3_utils):
+        s3_objects = {}
+        s3_utils.upload.side_effect = lambda url, body, **kwargs: s3_objects.update(
+            {url: body}
+        )
+        s3_utils.download.side_effect = lambda url, *args, **kwargs: {
+            "Body": io.BytesIO(s3_objects[url])
+        }
+        partition_locator = PartitionLocator.at(
+            "namespace", "table", "1", "stream_id", None, None, "partition_id"
+        )
+        few_deleted = np.zeros(10_000, dtype=bool)
+        few_deleted[[1, 500]] = True
+        many_deleted = np.zeros(10_000, dtype=bool)
+        many_deleted[::3] = True
+
+        small = store_deletion_vector(few_deleted, "bucket", partition_locator)
+        large = store_deletion_vector(many_deleted, "bucket", partition_locator)
+        no_bucket = store_deletion_vector(many_deleted, None, partition_locator)
+
+        # small deletion vectors and those without a bucket are embedded
+        self.assertIsNone(small.url)
+        self.assertIsNone(no_bucket.url)
+        self.assertEqual(list(s3_objects.keys()), [large.url])
+        self.assertTrue(large.url.startswith("s3://bucket/"))
+        self.assertIsNone(large.data)
+        self.assertEqual(len(s3_objects[large.url]), large.size_bytes)
+
+        entries = []
+        for deletion_vector, is_deleted in [
+            (small, few_deleted),
+            (large, many_deleted),
+        ]:
+            meta = ManifestMeta.of(10_000, 100, ContentType.PARQUET.value, None)
+            meta.deletion_vector = deletion_vector
+            entry = ManifestEntry.of("s3://bucket/file", meta)
+            np.testing.assert_array_equal(read_deleted_records(entry), is_deleted)
+            entries.append(entry)
+        self.assertEqual(get_deleted_record_count(entries), 2 + 3334)
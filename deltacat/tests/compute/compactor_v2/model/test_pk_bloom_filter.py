@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+import pyarrow as pa
+
+from deltacat.compute.compactor_v2.model.pk_bloom_filter import (
+    PkBloomFilter,
+    PkBloomFilterFile,
+    pk_bloom_filter_keys,
+)
+from deltacat.compute.compactor_v2.utils.pk_hasher import Sha1PkHasher
+
+
+class TestPkBloomFilter(unittest.TestCase):
+    def test_pk_bloom_filter_keys_are_stable(self):
+        table = pa.table({"pk": [str(i) for i in range(10)], "value": range(10)})
+
+        keys = pk_bloom_filter_keys(table, ["pk"])
+
+        self.assertEqual(keys.dtype, np.uint64)
+        self.assertEqual(len(keys), 10)
+        self.assertEqual(len(set(keys.tolist())), 10)
+        np.testing.assert_array_equal(
+            pk_bloom_filter_keys(table.slice(3, 4), ["pk"]), keys[3:7]
+        )
+        np.testing.assert_array_equal(
+            pk_bloom_filter_keys(table.select(["pk"]), ["pk"]), keys
+        )
+
+    def test_might_contain_any(self):
+        keys = pk_bloom_filter_keys(
+            pa.table({"pk": [str(i) for i in range(1000)]}), ["pk"]
+        )
+        other_keys = pk_bloom_filter_keys(
+            pa.table({"pk": [str(i) for i in range(1000, 2000)]}), ["pk"]
+        )
+
+        bloom_filter = PkBloomFilter.of(keys)
+
+        for key in keys:
+            self.assertTrue(bloom_filter.might_contain_any(np.array([key])))
+        false_positives = sum(
+            bloom_filter.might_contain_any(np.array([key])) for key in other_keys
+        )
+        self.assertLess(false_positives, 50)
+        self.assertTrue(
+            bloom_filter.might_contain_any(np.concatenate([other_keys, keys[:1]]))
+        )
+        self.assertFalse(bloom_filter.might_contain_any(np.empty(0, dtype=np.uint64)))
+
+    def test_is_compatible(self):
+        bloom_filter_file = PkBloomFilterFile.of(
+            "s3://bucket/filter.bin", 10, ["a", "b"], Sha1PkHasher.ID, 1
+        )
+
+        self.assertTrue(bloom_filter_file.is_compatible(["a", "b"], Sha1PkHasher.ID, 1))
+        self.assertFalse(bloom_filter_file.is_compatible(["a"], Sha1PkHasher.ID, 1))
+        self.assertFalse(bloom_filter_file.is_compatible(["a", "b"], "xxh3_128", 1))
+        self.assertFalse(
+            bloom_filter_file.is_compatible(["a", "b"], Sha1PkHasher.ID, 2)
+        )
+        self.assertFalse(
+            PkBloomFilterFile({"primary_keys": ["a", "b"]}).is_compatible(
+                ["a", "b"], Sha1PkHasher.ID, 1
+            )
+        )
+
+    def test_round_trip_through_bytes(self):
+        keys = np.arange(100, dtype=np.uint64)
+        bloom_filter = PkBloomFilter.of(keys)
+
+        result = PkBloomFilter.from_bytes(bloom_filter.to_bytes())
+
+        self.assertEqual(result.num_bits, bloom_filter.num_bits)
+        self.assertEqual(result.num_hashes, bloom_filter.num_hashes)
+        self.assertTrue(result.might_contain_any(keys[:1]))
+        self.assertEqual(
+            [result.might_contain_any(keys[i : i + 1]) for i in range(100)],
+            [True] * 100,
+        )
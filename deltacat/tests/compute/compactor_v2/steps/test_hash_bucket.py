@@ -3,6 +3,8 @@ import sqlite3
 import ray
 import os
 from collections import defaultdict
+from typing import Dict, List
+from unittest import mock
 from deltacat.compute.compactor import DeltaAnnotated
 import deltacat.tests.local_deltacat_storage as ds
 from deltacat.io.ray_plasma_object_store import RayPlasmaObjectStore
@@ -167,6 +169,83 @@ class TestHashBucket(unittest.TestCase):
             object_store=object_store,
         )
 
+    def test_single_string_pk_with_multiple_threads_correctly_hashes(self):
+        # setup
+        delta = create_delta_from_csv_file(
+            self.HASH_BUCKET_NAMESPACE,
+            [self.STRING_PK_FILE_PATH],
+            table_name="string_pk_table_multiple_threads",
+            **self.kwargs,
+        )
+
+        annotated_delta = DeltaAnnotated.of(delta)
+
+        # action
+        expected = self._hash_bucket_pks(annotated_delta, record_count=6)
+        with mock.patch(
+            "deltacat.compute.compactor_v2.steps.hash_bucket."
+            "_MIN_RECORDS_PER_HASH_BUCKET_THREAD",
+            1,
+        ):
+            actual = self._hash_bucket_pks(
+                annotated_delta, record_count=6, hash_bucket_thread_count=4
+            )
+
+        # assert
+        self.assertEqual(actual, expected)
+
+    def test_multiple_files_with_streaming_correctly_hashes(self):
+        # setup
+        delta = create_delta_from_csv_file(
+            self.HASH_BUCKET_NAMESPACE,
+            [self.STRING_PK_FILE_PATH, self.STRING_PK_FILE_PATH],
+            table_name="string_pk_table_streaming",
+            **self.kwargs,
+        )
+
+        annotated_delta = DeltaAnnotated.of(delta)
+
+        # action
+        expected = self._hash_bucket_pks(annotated_delta, record_count=12)
+        actual = self._hash_bucket_pks(
+            annotated_delta, record_count=12, streaming_hash_bucket_enabled=True
+        )
+
+        # assert
+        self.assertEqual(actual, expected)
+
+    def _hash_bucket_pks(
+        self, annotated_delta: DeltaAnnotated, record_count: int, **kwargs
+    ) -> Dict[int, List[str]]:
+        object_store = RayPlasmaObjectStore()
+        hb_input = HashBucketInput.of(
+            annotated_delta=annotated_delta,
+            primary_keys=["pk"],
+            num_hash_buckets=3,
+            num_hash_groups=2,
+            deltacat_storage=ds,
+            deltacat_storage_kwargs=self.deltacat_storage_kwargs,
+            object_store=object_store,
+            **kwargs,
+        )
+        hb_result: HashBucketResult = ray.get(hash_bucket.remote(hb_input))
+        self._validate_hash_bucket_result(
+            hb_result,
+            record_count=record_count,
+            num_hash_buckets=3,
+            num_columns=2,
+            object_store=object_store,
+        )
+
+        hb_index_to_pks = defaultdict(list)
+        for object_id in hb_result.hash_bucket_group_to_obj_id_tuple:
+            if object_id:
+                obj = object_store.get(object_id[0])
+                for hb_idx, dfes in enumerate(obj):
+                    for dfe in dfes or []:
+                        hb_index_to_pks[hb_idx].extend(dfe.table["pk"].to_pylist())
+        return hb_index_to_pks
+
     def _validate_hash_bucket_result(
         self,
         hb_result: HashBucketResult,
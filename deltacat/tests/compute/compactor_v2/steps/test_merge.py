@@ -2,6 +2,8 @@ import unittest
 import sqlite3
 import ray
 import os
+import pyarrow as pa
+from unittest import mock
 from typing import List
 from collections import defaultdict
 
@@ -18,7 +20,15 @@ from deltacat.compute.compactor_v2.model.hash_bucket_input import HashBucketInpu
 from deltacat.compute.compactor_v2.model.merge_input import MergeInput
 from deltacat.compute.compactor_v2.model.hash_bucket_result import HashBucketResult
 from deltacat.compute.compactor_v2.steps.hash_bucket import hash_bucket
-from deltacat.compute.compactor_v2.steps.merge import merge
+from deltacat.compute.compactor_v2.steps.merge import (
+    merge,
+    _spill_sub_range_count,
+)
+from deltacat.compute.compactor_v2.utils import merge as merge_utils
+from deltacat.compute.compactor_v2.utils.spill import (
+    pk_hash_sub_range_indices,
+    spill_by_pk_hash_sub_range,
+)
 from deltacat.utils.common import current_time_ms
 from deltacat.types.media import ContentType
 from deltacat.tests.test_utils.pyarrow import (
@@ -32,6 +42,8 @@ from deltacat.compute.compactor_v2.deletes.delete_file_envelope import (
 )
 from deltacat.storage.model.delete_parameters import DeleteParameters
 
+MERGE_MODULE = "deltacat.compute.compactor_v2.steps.merge"
+
 
 class TestMerge(unittest.TestCase):
     MERGE_NAMESPACE = "test_merge"
@@ -108,6 +120,48 @@ class TestMerge(unittest.TestCase):
         # 8 unique pk, no duplication
         self._validate_merge_output(merge_res_list, 8)
 
+    def test_merge_hash_buckets_concurrently(self):
+        number_of_hash_group = 1
+        number_of_hash_bucket = 4
+        partition = stage_partition_from_file_paths(
+            self.MERGE_NAMESPACE,
+            [self.DEDUPE_BASE_COMPACTED_TABLE_STRING_PK],
+            **self.kwargs,
+        )
+        old_delta = commit_delta_to_staged_partition(
+            partition, [self.DEDUPE_BASE_COMPACTED_TABLE_STRING_PK], **self.kwargs
+        )
+        object_store = RayPlasmaObjectStore()
+        all_hash_group_idx_to_obj_id = self._prepare_merge_inputs(
+            old_delta, object_store, number_of_hash_bucket, number_of_hash_group, ["pk"]
+        )
+
+        # a task memory of one byte merges one hash bucket at a time
+        for merge_task_memory_bytes in [1, None]:
+            merge_input = MergeInput.of(
+                compacted_file_content_type=ContentType.PARQUET,
+                merge_file_groups_provider=RemoteMergeFileGroupsProvider(
+                    hash_group_index=0,
+                    dfe_groups_refs=all_hash_group_idx_to_obj_id[0],
+                    hash_bucket_count=number_of_hash_bucket,
+                    num_hash_groups=number_of_hash_group,
+                    object_store=object_store,
+                ),
+                write_to_partition=partition,
+                primary_keys=["pk"],
+                deltacat_storage=ds,
+                deltacat_storage_kwargs=self.deltacat_storage_kwargs,
+                object_store=object_store,
+                merge_thread_count=4,
+                merge_task_memory_bytes=merge_task_memory_bytes,
+            )
+            merge_result = ray.get(merge.remote(merge_input))
+            hb_indices = [mr.task_index for mr in merge_result.materialize_results]
+            self.assertEqual(hb_indices, sorted(set(hb_indices)))
+            self.assertEqual(merge_result.input_record_count, 8)
+            # 8 unique pk, no duplication
+            self._validate_merge_output([merge_result], 8)
+
     def test_merge_multiple_hash_group_multiple_pk(self):
         number_of_hash_group = 2
         number_of_hash_bucket = 2
@@ -410,8 +464,9 @@ class TestMerge(unittest.TestCase):
         merge_result = ray.get(merge_result_promise)
         merge_res_list.append(merge_result)
 
-        # Drop 5 records - 6 -> 1
-        self._validate_merge_output(merge_res_list, 1)
+        # Drop 4 records - 6 -> 2, as the remaining (pk1, 2) record matches
+        # none of the (pk1, pk2) delete key tuples
+        self._validate_merge_output(merge_res_list, 2)
 
     def test_merge_incrementa_copy_by_reference_date_pk(self):
         number_of_hash_group = 2
@@ -489,6 +544,137 @@ class TestMerge(unittest.TestCase):
         # result: 1 + 9 - 2 = 8
         self._validate_merge_output(merge_res_list, 8)
 
+    def test_merge_when_hash_bucket_is_spilled(self):
+        number_of_hash_group = 1
+        number_of_hash_bucket = 1
+        partition = stage_partition_from_file_paths(
+            self.MERGE_NAMESPACE,
+            [self.DEDUPE_BASE_COMPACTED_TABLE_STRING_PK],
+            **self.kwargs,
+        )
+        old_delta = commit_delta_to_staged_partition(
+            partition, [self.DEDUPE_BASE_COMPACTED_TABLE_STRING_PK], **self.kwargs
+        )
+        new_delta = create_delta_from_csv_file(
+            self.MERGE_NAMESPACE,
+            [self.DEDUPE_WITH_DUPLICATION_STRING_PK],
+            **self.kwargs,
+        )
+        rcf = RoundCompletionInfo.of(
+            compacted_delta_locator=old_delta.locator,
+            high_watermark=old_delta.stream_position,
+            compacted_pyarrow_write_result=None,
+            sort_keys_bit_width=0,
+            hb_index_to_entry_range={"0": (0, 1)},
+        )
+        object_store = RayPlasmaObjectStore()
+        all_hash_group_idx_to_obj_id = self._prepare_merge_inputs(
+            new_delta, object_store, number_of_hash_bucket, number_of_hash_group, ["pk"]
+        )
+
+        pk_values = set(
+            download_delta(old_delta, **self.deltacat_storage_kwargs)["pk"].to_pylist()
+            + download_delta(new_delta, **self.deltacat_storage_kwargs)[
+                "pk"
+            ].to_pylist()
+        )
+
+        merge_results = []
+        sub_range_counts = []
+        spilled_sub_ranges = []
+        materialize_call_counts = []
+
+        def spill_sub_range_count(*args):
+            sub_range_count = _spill_sub_range_count(*args)
+            sub_range_counts.append(sub_range_count)
+            return sub_range_count
+
+        def spill(*args, **kwargs):
+            paths = spill_by_pk_hash_sub_range(*args, **kwargs)
+            spilled_sub_ranges[-1].update(
+                sub_range for sub_range, path in enumerate(paths) if path
+            )
+            return paths
+
+        # a task memory of one byte spills the hash bucket
+        for merge_spill_enabled, streaming_materialize_enabled in [
+            (False, False),
+            (True, False),
+            (True, True),
+        ]:
+            merge_input = MergeInput.of(
+                round_completion_info=rcf,
+                compacted_file_content_type=ContentType.PARQUET,
+                merge_file_groups_provider=RemoteMergeFileGroupsProvider(
+                    hash_group_index=0,
+                    dfe_groups_refs=all_hash_group_idx_to_obj_id[0],
+                    hash_bucket_count=number_of_hash_bucket,
+                    num_hash_groups=number_of_hash_group,
+                    object_store=object_store,
+                ),
+                write_to_partition=partition,
+                primary_keys=["pk"],
+                deltacat_storage=ds,
+                deltacat_storage_kwargs=self.deltacat_storage_kwargs,
+                object_store=object_store,
+                merge_task_memory_bytes=1,
+                merge_spill_enabled=merge_spill_enabled,
+                streaming_materialize_enabled=streaming_materialize_enabled,
+            )
+            spilled_sub_ranges.append(set())
+            with mock.patch(
+                f"{MERGE_MODULE}._spill_sub_range_count",
+                side_effect=spill_sub_range_count,
+            ), mock.patch(
+                f"{MERGE_MODULE}.spill_by_pk_hash_sub_range", side_effect=spill
+            ), mock.patch(
+                f"{MERGE_MODULE}.merge_utils.materialize",
+                wraps=merge_utils.materialize,
+            ) as materialize:
+                merge_results.append(ray.get(merge.remote(merge_input)))
+            materialize_call_counts.append(materialize.call_count)
+
+        in_memory_result, spilled_result, streamed_result = merge_results
+        # the in-memory merge does not spill
+        self.assertEqual(len(sub_range_counts), 2)
+        self.assertEqual(spilled_sub_ranges[0], set())
+        self.assertEqual(materialize_call_counts[0], 1)
+        # records of each primary key are spilled to the sub-range of its hash
+        sub_range_count, streamed_sub_range_count = sub_range_counts
+        self.assertGreater(sub_range_count, 1)
+        self.assertEqual(streamed_sub_range_count, sub_range_count)
+        expected_sub_ranges = set(
+            pk_hash_sub_range_indices(
+                pa.table({"pk": sorted(pk_values)}), ["pk"], sub_range_count
+            ).tolist()
+        )
+        self.assertEqual(spilled_sub_ranges[1], expected_sub_ranges)
+        self.assertEqual(spilled_sub_ranges[2], expected_sub_ranges)
+        # each spilled sub-range is materialized on its own unless streamed
+        self.assertEqual(materialize_call_counts[1], len(expected_sub_ranges))
+        self.assertEqual(materialize_call_counts[2], 1)
+
+        def merged_records(merge_result):
+            self.assertEqual(len(merge_result.materialize_results), 1)
+            delta = ds.commit_delta(
+                merge_result.materialize_results[0].delta,
+                **self.deltacat_storage_kwargs,
+            )
+            table = download_delta(delta, **self.deltacat_storage_kwargs)
+            return sorted(zip(table["pk"].to_pylist(), table["value"].to_pylist()))
+
+        expected_records = merged_records(in_memory_result)
+        self.assertEqual(len(expected_records), len(pk_values))
+        for merge_result in [spilled_result, streamed_result]:
+            self.assertEqual(merged_records(merge_result), expected_records)
+            self.assertEqual(
+                merge_result.input_record_count, in_memory_result.input_record_count
+            )
+            self.assertEqual(
+                merge_result.deduped_record_count,
+                in_memory_result.deduped_record_count,
+            )
+
     def test_merge_single_hash_bucket_string_pk(self):
         partition = stage_partition_from_file_paths(
             self.MERGE_NAMESPACE,
@@ -1,16 +1,31 @@
+import io
 import unittest
 import sqlite3
 import ray
 import os
+import pyarrow as pa
 from unittest.mock import patch
 import deltacat.tests.local_deltacat_storage as ds
+from deltacat.storage import DeleteParameters, Delta, DeltaType, Manifest, SortKey
 from deltacat.types.media import ContentType
 from deltacat.compute.compactor_v2.compaction_session import compact_partition
+from deltacat.compute.compactor_v2.utils.deletion_vector_file import (
+    apply_deletion_vector,
+)
 from deltacat.compute.compactor.model.compact_partition_params import (
     CompactPartitionParams,
 )
+from deltacat.compute.compactor_v2.utils.hash_group import (
+    assign_hash_buckets_to_hash_groups,
+)
+from deltacat.compute.compactor_v2.utils.pre_bucketed import (
+    stage_pre_bucketed_delta,
+)
 from deltacat.utils.common import current_time_ms
-from deltacat.tests.test_utils.pyarrow import stage_partition_from_file_paths
+from deltacat.tests.test_utils.pyarrow import (
+    download_delta,
+    stage_partition_from_file_paths,
+)
 
 
 class TestCompactionSession(unittest.TestCase):
@@ -36,6 +51,38 @@ class TestCompactionSession(unittest.TestCase):
     def doClassCleanups(cls) -> None:
         os.remove(cls.DB_FILE_PATH)
 
+    def _compaction_params(
+        self, source_partition, dest_partition, **overrides
+    ) -> CompactPartitionParams:
+        """
+        Returns the parameters to compact the source partition into the
+        destination partition, with the given parameters overridden.
+        """
+        return CompactPartitionParams.of(
+            {
+                "compaction_artifact_s3_bucket": "test_bucket",
+                "compacted_file_content_type": ContentType.PARQUET,
+                "dd_max_parallelism_ratio": 1.0,
+                "deltacat_storage": ds,
+                "deltacat_storage_kwargs": self.deltacat_storage_kwargs,
+                "destination_partition_locator": dest_partition.locator,
+                "drop_duplicates": True,
+                "hash_bucket_count": 1,
+                "last_stream_position_to_compact": source_partition.stream_position,
+                "list_deltas_kwargs": {
+                    **self.deltacat_storage_kwargs,
+                    **{"equivalent_table_types": []},
+                },
+                "primary_keys": ["pk"],
+                "rebase_source_partition_locator": None,
+                "rebase_source_partition_high_watermark": None,
+                "records_per_compacted_file": 4000,
+                "s3_client_kwargs": {},
+                "source_partition_locator": source_partition.locator,
+                **overrides,
+            }
+        )
+
     @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
     @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
     def test_compact_partition_when_no_input_deltas_to_compact(self, s3_utils, rcf_url):
@@ -84,3 +131,995 @@ class TestCompactionSession(unittest.TestCase):
 
         # verify that no RCF is written
         self.assertIsNone(rcf_url)
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.hb")
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_input_deltas_are_pre_bucketed(
+        self, s3_utils, rcf_url, hb
+    ):
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        staged_source = stage_partition_from_file_paths(
+            self.NAMESPACE, ["pre_bucketed_source"], **self.deltacat_storage_kwargs
+        )
+        for table in [
+            pa.table({"pk": [str(i) for i in range(100)], "value": [0] * 100}),
+            pa.table({"pk": [str(i) for i in range(50, 150)], "value": [1] * 100}),
+        ]:
+            ds.commit_delta(
+                stage_pre_bucketed_delta(
+                    table,
+                    staged_source,
+                    ["pk"],
+                    3,
+                    deltacat_storage=ds,
+                    deltacat_storage_kwargs=self.deltacat_storage_kwargs,
+                ),
+                **self.deltacat_storage_kwargs,
+            )
+        source_partition = ds.commit_partition(
+            staged_source, **self.deltacat_storage_kwargs
+        )
+
+        staged_dest = stage_partition_from_file_paths(
+            self.NAMESPACE, ["pre_bucketed_destination"], **self.deltacat_storage_kwargs
+        )
+        dest_partition = ds.commit_partition(
+            staged_dest, **self.deltacat_storage_kwargs
+        )
+
+        # action
+        compact_partition(
+            self._compaction_params(
+                source_partition, dest_partition, hash_bucket_count=3
+            )
+        )
+
+        # verify that hash bucketing is skipped and the latest records are kept
+        hb.hash_bucket.assert_not_called()
+        compacted_partition = ds.get_partition(
+            dest_partition.stream_locator, [], **self.deltacat_storage_kwargs
+        )
+        compacted_deltas = ds.list_partition_deltas(
+            compacted_partition, include_manifest=True, **self.deltacat_storage_kwargs
+        ).all_items()
+        compacted_table = download_delta(
+            compacted_deltas[0], **self.deltacat_storage_kwargs
+        )
+        self.assertEqual(
+            sorted(zip(*compacted_table.select(["pk", "value"]).to_pydict().values())),
+            sorted(
+                [(str(i), 0) for i in range(50)] + [(str(i), 1) for i in range(50, 150)]
+            ),
+        )
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.hb")
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_pre_bucketed_delta_has_files_of_same_hash_bucket(
+        self, s3_utils, rcf_url, hb
+    ):
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        staged_source = stage_partition_from_file_paths(
+            self.NAMESPACE,
+            ["pre_bucketed_same_hash_bucket_source"],
+            **self.deltacat_storage_kwargs,
+        )
+        # a single delta with two files per hash bucket, the latter of which
+        # holds the latest records
+        ds.commit_delta(
+            Delta.merge_deltas(
+                [
+                    stage_pre_bucketed_delta(
+                        pa.table(
+                            {"pk": [str(i) for i in range(100)], "value": [i] * 100}
+                        ),
+                        staged_source,
+                        ["pk"],
+                        3,
+                        deltacat_storage=ds,
+                        deltacat_storage_kwargs=self.deltacat_storage_kwargs,
+                    )
+                    for i in range(2)
+                ]
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        # deletes are applied in stream order along with the files
+        ds.commit_delta(
+            stage_pre_bucketed_delta(
+                pa.table({"pk": ["0"]}),
+                staged_source,
+                ["pk"],
+                3,
+                delta_type=DeltaType.DELETE,
+                deltacat_storage=ds,
+                deltacat_storage_kwargs=self.deltacat_storage_kwargs,
+                delete_parameters=DeleteParameters.of(["pk"]),
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        source_partition = ds.commit_partition(
+            staged_source, **self.deltacat_storage_kwargs
+        )
+        staged_dest = stage_partition_from_file_paths(
+            self.NAMESPACE,
+            ["pre_bucketed_same_hash_bucket_destination"],
+            **self.deltacat_storage_kwargs,
+        )
+        dest_partition = ds.commit_partition(
+            staged_dest, **self.deltacat_storage_kwargs
+        )
+
+        # action
+        compact_partition(
+            self._compaction_params(
+                source_partition, dest_partition, hash_bucket_count=3
+            )
+        )
+
+        # verify that records are deduplicated in the order of the files
+        hb.hash_bucket.assert_not_called()
+        rci = rcf_url.write_round_completion_file.call_args[0][2]
+        compacted_table = download_delta(
+            rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+        )
+        self.assertEqual(
+            sorted(zip(*compacted_table.select(["pk", "value"]).to_pydict().values())),
+            sorted((str(i), 1) for i in range(1, 100)),
+        )
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.mg")
+    @patch("deltacat.compute.compactor_v2.compaction_session.hb")
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_append_only(self, s3_utils, rcf_url, hb, mg):
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        staged_source = stage_partition_from_file_paths(
+            self.NAMESPACE, ["append_only_source"], **self.deltacat_storage_kwargs
+        )
+        for i in range(3):
+            ds.commit_delta(
+                ds.stage_delta(
+                    pa.table({"value": range(i * 10, (i + 1) * 10)}),
+                    staged_source,
+                    **self.deltacat_storage_kwargs,
+                ),
+                **self.deltacat_storage_kwargs,
+            )
+        source_partition = ds.commit_partition(
+            staged_source, **self.deltacat_storage_kwargs
+        )
+        staged_dest = stage_partition_from_file_paths(
+            self.NAMESPACE, ["append_only_destination"], **self.deltacat_storage_kwargs
+        )
+        dest_partition = ds.commit_partition(
+            staged_dest, **self.deltacat_storage_kwargs
+        )
+
+        # action
+        compact_partition(
+            self._compaction_params(
+                source_partition,
+                dest_partition,
+                hash_bucket_count=2,
+                primary_keys=[],
+                records_per_compacted_file=12,
+                append_only_compaction_enabled=True,
+                last_stream_position_to_compact=source_partition.stream_position,
+            )
+        )
+
+        # verify that files are coalesced without hash bucketing or merging
+        hb.hash_bucket.assert_not_called()
+        mg.merge.assert_not_called()
+        first_rci = rcf_url.write_round_completion_file.call_args[0][2]
+        first_manifest = ds.get_delta_manifest(
+            first_rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+        )
+        self.assertEqual(
+            sorted([entry.meta.record_count for entry in first_manifest.entries]),
+            [6, 12, 12],
+        )
+        self.assertEqual(
+            sorted(
+                download_delta(
+                    first_rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+                )["value"].to_pylist()
+            ),
+            list(range(30)),
+        )
+
+        # setup the next round
+        new_delta = ds.commit_delta(
+            ds.stage_delta(
+                pa.table({"value": range(30, 35)}),
+                source_partition,
+                **self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        rcf_url.read_round_completion_file.return_value = first_rci
+
+        # action
+        compact_partition(
+            self._compaction_params(
+                source_partition,
+                dest_partition,
+                hash_bucket_count=2,
+                primary_keys=[],
+                records_per_compacted_file=12,
+                append_only_compaction_enabled=True,
+                last_stream_position_to_compact=new_delta.stream_position,
+            )
+        )
+
+        # verify that previously compacted files are copied by reference
+        second_rci = rcf_url.write_round_completion_file.call_args[0][2]
+        second_manifest = ds.get_delta_manifest(
+            second_rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+        )
+        self.assertEqual(len(second_manifest.entries), 4)
+        self.assertTrue(
+            {entry.uri for entry in first_manifest.entries}
+            < {entry.uri for entry in second_manifest.entries}
+        )
+        self.assertEqual(
+            sorted(second_rci.hb_index_to_entry_range.values()),
+            [(0, 2), (2, 4)],
+        )
+        self.assertEqual(second_rci.compacted_pyarrow_write_result.records, 35)
+        self.assertEqual(
+            sorted(
+                download_delta(
+                    second_rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+                )["value"].to_pylist()
+            ),
+            list(range(35)),
+        )
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_sort_merge_enabled(self, s3_utils, rcf_url):
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        staged_source = stage_partition_from_file_paths(
+            self.NAMESPACE, ["sort_merge_source"], **self.deltacat_storage_kwargs
+        )
+        ds.commit_delta(
+            ds.stage_delta(
+                pa.table({"pk": [str(i) for i in range(100)], "value": [0] * 100}),
+                staged_source,
+                **self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        source_partition = ds.commit_partition(
+            staged_source, **self.deltacat_storage_kwargs
+        )
+        staged_dest = stage_partition_from_file_paths(
+            self.NAMESPACE, ["sort_merge_destination"], **self.deltacat_storage_kwargs
+        )
+        dest_partition = ds.commit_partition(
+            staged_dest, **self.deltacat_storage_kwargs
+        )
+
+        def sort_merge_params(last_stream_position_to_compact):
+            return self._compaction_params(
+                source_partition,
+                dest_partition,
+                hash_bucket_count=2,
+                last_stream_position_to_compact=last_stream_position_to_compact,
+                sort_merge_enabled=True,
+            )
+
+        # action
+        compact_partition(sort_merge_params(source_partition.stream_position))
+
+        # setup the next round
+        first_rci = rcf_url.write_round_completion_file.call_args[0][2]
+        new_delta = ds.commit_delta(
+            ds.stage_delta(
+                pa.table({"pk": [str(i) for i in range(90, 110)], "value": [1] * 20}),
+                source_partition,
+                **self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        rcf_url.read_round_completion_file.return_value = first_rci
+
+        # action
+        compact_partition(sort_merge_params(new_delta.stream_position))
+
+        # verify that compacted records are replaced by the latest records
+        second_rci = rcf_url.write_round_completion_file.call_args[0][2]
+        compacted_table = download_delta(
+            second_rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+        )
+        self.assertEqual(
+            sorted(zip(*compacted_table.select(["pk", "value"]).to_pydict().values())),
+            sorted(
+                [(str(i), 0) for i in range(90)] + [(str(i), 1) for i in range(90, 110)]
+            ),
+        )
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_compacted_file_target_size_set(
+        self, s3_utils, rcf_url
+    ):
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        staged_source = stage_partition_from_file_paths(
+            self.NAMESPACE, ["target_size_source"], **self.deltacat_storage_kwargs
+        )
+        table = pa.table({"pk": [str(i) for i in range(100)], "value": [0] * 100})
+        ds.commit_delta(
+            ds.stage_delta(table, staged_source, **self.deltacat_storage_kwargs),
+            **self.deltacat_storage_kwargs,
+        )
+        source_partition = ds.commit_partition(
+            staged_source, **self.deltacat_storage_kwargs
+        )
+        staged_dest = stage_partition_from_file_paths(
+            self.NAMESPACE, ["target_size_destination"], **self.deltacat_storage_kwargs
+        )
+        dest_partition = ds.commit_partition(
+            staged_dest, **self.deltacat_storage_kwargs
+        )
+        # a target of ten and a half records per file
+        previous_inflation = 2.0
+        target_size_bytes = 10.5 * table.nbytes / len(table) / previous_inflation
+
+        # action
+        compact_partition(
+            self._compaction_params(
+                source_partition,
+                dest_partition,
+                streaming_materialize_enabled=True,
+                compacted_file_target_size_bytes=target_size_bytes,
+                previous_inflation=previous_inflation,
+            )
+        )
+
+        # verify
+        rci = rcf_url.write_round_completion_file.call_args[0][2]
+        compacted_delta = ds.get_delta_manifest(
+            rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+        )
+        self.assertEqual(
+            [entry.meta.record_count for entry in compacted_delta.entries], [10] * 10
+        )
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_sort_keys_set(self, s3_utils, rcf_url):
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        staged_source = stage_partition_from_file_paths(
+            self.NAMESPACE, ["sort_keys_source"], **self.deltacat_storage_kwargs
+        )
+        ds.commit_delta(
+            ds.stage_delta(
+                pa.table(
+                    {"pk": [str(i) for i in range(100)], "value": range(100, 0, -1)}
+                ),
+                staged_source,
+                **self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        source_partition = ds.commit_partition(
+            staged_source, **self.deltacat_storage_kwargs
+        )
+        staged_dest = stage_partition_from_file_paths(
+            self.NAMESPACE, ["sort_keys_destination"], **self.deltacat_storage_kwargs
+        )
+        dest_partition = ds.commit_partition(
+            staged_dest, **self.deltacat_storage_kwargs
+        )
+
+        def compact(last_stream_position_to_compact):
+            compact_partition(
+                self._compaction_params(
+                    source_partition,
+                    dest_partition,
+                    last_stream_position_to_compact=last_stream_position_to_compact,
+                    sort_keys=[SortKey.of("value")],
+                )
+            )
+            rci = rcf_url.write_round_completion_file.call_args[0][2]
+            rcf_url.read_round_completion_file.return_value = rci
+            return download_delta(
+                rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+            )
+
+        # action
+        compact(source_partition.stream_position)
+        compacted_table = compact(
+            ds.commit_delta(
+                ds.stage_delta(
+                    pa.table({"pk": ["10", "100", "20"], "value": [50, 0, 60]}),
+                    source_partition,
+                    **self.deltacat_storage_kwargs,
+                ),
+                **self.deltacat_storage_kwargs,
+            ).stream_position
+        )
+
+        # verify that the merged compacted table is kept sorted by the sort keys
+        values = compacted_table["value"].to_pylist()
+        self.assertEqual(values, sorted(values))
+        expected = {str(i): 100 - i for i in range(100)}
+        expected.update({"10": 50, "100": 0, "20": 60})
+        self.assertEqual(
+            dict(zip(*compacted_table.select(["pk", "value"]).to_pydict().values())),
+            expected,
+        )
+
+    def _assert_deletes_are_applied_by_hash_bucket(self, rcf_url, table_name, **kwargs):
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        staged_source = stage_partition_from_file_paths(
+            self.NAMESPACE, [f"{table_name}_source"], **self.deltacat_storage_kwargs
+        )
+        ds.commit_delta(
+            ds.stage_delta(
+                pa.table({"pk": [str(i) for i in range(100)], "value": [0] * 100}),
+                staged_source,
+                **self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        source_partition = ds.commit_partition(
+            staged_source, **self.deltacat_storage_kwargs
+        )
+        staged_dest = stage_partition_from_file_paths(
+            self.NAMESPACE,
+            [f"{table_name}_destination"],
+            **self.deltacat_storage_kwargs,
+        )
+        dest_partition = ds.commit_partition(
+            staged_dest, **self.deltacat_storage_kwargs
+        )
+
+        def compact(last_stream_position_to_compact):
+            compact_partition(
+                self._compaction_params(
+                    source_partition,
+                    dest_partition,
+                    hash_bucket_count=4,
+                    hash_group_count=2,
+                    last_stream_position_to_compact=last_stream_position_to_compact,
+                    **kwargs,
+                )
+            )
+            rci = rcf_url.write_round_completion_file.call_args[0][2]
+            rcf_url.read_round_completion_file.return_value = rci
+            return download_delta(
+                rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+            )
+
+        def commit(table, **kwargs):
+            return ds.commit_delta(
+                ds.stage_delta(
+                    table, source_partition, **kwargs, **self.deltacat_storage_kwargs
+                ),
+                **self.deltacat_storage_kwargs,
+            ).stream_position
+
+        # action
+        compact(source_partition.stream_position)
+        commit(pa.table({"pk": [str(i) for i in range(10)], "value": [1] * 10}))
+        compacted_table = compact(
+            commit(
+                pa.table({"pk": [str(i) for i in range(5, 15)]}),
+                delta_type=DeltaType.DELETE,
+                delete_parameters=DeleteParameters.of(["pk"]),
+            )
+        )
+
+        # verify
+        self.assertEqual(
+            sorted(zip(*compacted_table.select(["pk", "value"]).to_pydict().values())),
+            sorted(
+                [(str(i), 1) for i in range(5)] + [(str(i), 0) for i in range(15, 100)]
+            ),
+        )
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_delete_routing_enabled(self, s3_utils, rcf_url):
+        self._assert_deletes_are_applied_by_hash_bucket(
+            rcf_url, "delete_routing", delete_routing_enabled=True
+        )
+
+    @patch("deltacat.compute.compactor_v2.deletes.delete_key_set_file.s3_utils")
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_compiled_delete_key_sets_enabled(
+        self, s3_utils, rcf_url, delete_key_set_s3_utils
+    ):
+        delete_key_set_s3_utils.download.return_value = None
+        self._assert_deletes_are_applied_by_hash_bucket(
+            rcf_url,
+            "compiled_delete_key_sets",
+            compiled_delete_key_sets_enabled=True,
+            delete_routing_enabled=True,
+        )
+        delete_key_set_s3_utils.upload.assert_called_once()
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_deletion_vectors_enabled(self, s3_utils, rcf_url):
+        manifest = self._assert_deletes_are_recorded_in_deletion_vectors(
+            rcf_url, "deletion_vector"
+        )
+
+        # small deletion vectors are embedded in the manifest entry meta
+        for entry in manifest.entries:
+            self.assertIn("data", entry.meta.deletion_vector)
+            self.assertNotIn("url", entry.meta.deletion_vector)
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_deletion_vector_aware_reads_disabled(
+        self, s3_utils, rcf_url
+    ):
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        source_partition = ds.commit_partition(
+            stage_partition_from_file_paths(
+                self.NAMESPACE,
+                ["deletion_vector_unaware_source"],
+                **self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        dest_partition = ds.commit_partition(
+            stage_partition_from_file_paths(
+                self.NAMESPACE,
+                ["deletion_vector_unaware_destination"],
+                **self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+
+        # action and verify
+        with self.assertRaisesRegex(
+            AssertionError, "requires deletion_vector_aware_reads_enabled"
+        ):
+            compact_partition(
+                self._compaction_params(
+                    source_partition,
+                    dest_partition,
+                    deletion_vectors_enabled=True,
+                )
+            )
+        rcf_url.write_round_completion_file.assert_not_called()
+
+    @patch(
+        "deltacat.compute.compactor_v2.utils.deletion_vector_file.DELETION_VECTOR_MAX_INLINE_BYTES",
+        0,
+    )
+    @patch("deltacat.compute.compactor_v2.utils.deletion_vector_file.s3_utils")
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_deletion_vectors_written_to_files(
+        self, s3_utils, rcf_url, deletion_vector_s3_utils
+    ):
+        s3_objects = self._store_s3_objects_in_memory(deletion_vector_s3_utils)
+
+        manifest = self._assert_deletes_are_recorded_in_deletion_vectors(
+            rcf_url, "deletion_vector_file"
+        )
+
+        # large deletion vectors are stored in files referenced by the entries
+        for entry in manifest.entries:
+            deletion_vector = entry.meta.deletion_vector
+            self.assertNotIn("data", deletion_vector)
+            self.assertEqual(
+                len(s3_objects[deletion_vector["url"]]), deletion_vector["size_bytes"]
+            )
+
+    def _assert_deletes_are_recorded_in_deletion_vectors(
+        self, rcf_url, table_name
+    ) -> Manifest:
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        staged_source = stage_partition_from_file_paths(
+            self.NAMESPACE, [f"{table_name}_source"], **self.deltacat_storage_kwargs
+        )
+        ds.commit_delta(
+            ds.stage_delta(
+                pa.table({"pk": [str(i) for i in range(100)], "value": [0] * 100}),
+                staged_source,
+                **self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        source_partition = ds.commit_partition(
+            staged_source, **self.deltacat_storage_kwargs
+        )
+        staged_dest = stage_partition_from_file_paths(
+            self.NAMESPACE,
+            [f"{table_name}_destination"],
+            **self.deltacat_storage_kwargs,
+        )
+        dest_partition = ds.commit_partition(
+            staged_dest, **self.deltacat_storage_kwargs
+        )
+
+        def compact(last_stream_position_to_compact, **kwargs):
+            compact_partition(
+                self._compaction_params(
+                    source_partition,
+                    dest_partition,
+                    hash_bucket_count=4,
+                    hash_group_count=2,
+                    last_stream_position_to_compact=last_stream_position_to_compact,
+                    **{
+                        "deletion_vectors_enabled": True,
+                        "deletion_vector_aware_reads_enabled": True,
+                        **kwargs,
+                    },
+                )
+            )
+            rci = rcf_url.write_round_completion_file.call_args[0][2]
+            rcf_url.read_round_completion_file.return_value = rci
+            manifest = ds.get_delta_manifest(
+                rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+            )
+            records = []
+            for entry_index, manifest_entry in enumerate(manifest.entries):
+                table = ds.download_delta_manifest_entry(
+                    rci.compacted_delta_locator,
+                    entry_index=entry_index,
+                    **self.deltacat_storage_kwargs,
+                )
+                table = apply_deletion_vector(table, manifest_entry)
+                records.extend(zip(*table.select(["pk", "value"]).to_pydict().values()))
+            return manifest, sorted(records)
+
+        def commit(table, **kwargs):
+            return ds.commit_delta(
+                ds.stage_delta(
+                    table, source_partition, **kwargs, **self.deltacat_storage_kwargs
+                ),
+                **self.deltacat_storage_kwargs,
+            ).stream_position
+
+        def delete(pks):
+            return commit(
+                pa.table({"pk": pks}),
+                delta_type=DeltaType.DELETE,
+                delete_parameters=DeleteParameters.of(["pk"]),
+            )
+
+        # action
+        manifest, _ = compact(source_partition.stream_position)
+        compacted_uris = [entry.uri for entry in manifest.entries]
+        compact(delete([str(i) for i in range(5, 15)]))
+        manifest_after_deletes, records_after_deletes = compact(
+            delete([str(i) for i in range(10)])
+        )
+        rci_after_deletes = rcf_url.read_round_completion_file.return_value
+        # compacted files with deletion vectors are copied by reference, so they
+        # are not committed for readers that are not deletion vector aware
+        rcf_write_count = rcf_url.write_round_completion_file.call_count
+        with self.assertRaisesRegex(ValueError, "not deletion vector aware"):
+            compact(
+                commit(pa.table({"pk": ["20"], "value": [1]})),
+                deletion_vectors_enabled=False,
+                deletion_vector_aware_reads_enabled=False,
+            )
+        self.assertEqual(
+            rcf_url.write_round_completion_file.call_count, rcf_write_count
+        )
+        manifest_after_upserts, records_after_upserts = compact(
+            commit(pa.table({"pk": [str(i) for i in range(20, 30)], "value": [1] * 10}))
+        )
+
+        # verify
+        # compacted files are referenced with deletion vectors instead of rewritten
+        self.assertEqual(
+            sorted(entry.uri for entry in manifest_after_deletes.entries),
+            sorted(compacted_uris),
+        )
+        self.assertTrue(
+            all(entry.meta.deletion_vector for entry in manifest_after_deletes.entries)
+        )
+        self.assertEqual(
+            records_after_deletes, sorted((str(i), 0) for i in range(15, 100))
+        )
+        # records deleted by deletion vectors are not counted
+        self.assertTrue(rci_after_deletes.deletion_vectors_present)
+        self.assertEqual(rci_after_deletes.compacted_pyarrow_write_result.records, 85)
+        self.assertEqual(manifest_after_deletes.meta.record_count, 85)
+        # deletion vectors are folded into the files rewritten by upserts
+        rewritten_entries = [
+            entry
+            for entry in manifest_after_upserts.entries
+            if entry.uri not in compacted_uris
+        ]
+        self.assertTrue(rewritten_entries)
+        self.assertFalse(any(entry.meta.deletion_vector for entry in rewritten_entries))
+        self.assertEqual(
+            records_after_upserts,
+            sorted(
+                [(str(i), 0) for i in range(15, 20)]
+                + [(str(i), 1) for i in range(20, 30)]
+                + [(str(i), 0) for i in range(30, 100)]
+            ),
+        )
+        return manifest_after_deletes
+
+    def _assert_compacted_files_without_incremental_keys_are_not_rewritten(
+        self, rcf_url, table_name, **kwargs
+    ):
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        staged_source = stage_partition_from_file_paths(
+            self.NAMESPACE, [f"{table_name}_source"], **self.deltacat_storage_kwargs
+        )
+        ds.commit_delta(
+            ds.stage_delta(
+                pa.table({"pk": [str(i) for i in range(100)], "value": [0] * 100}),
+                staged_source,
+                **self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        source_partition = ds.commit_partition(
+            staged_source, **self.deltacat_storage_kwargs
+        )
+        staged_dest = stage_partition_from_file_paths(
+            self.NAMESPACE,
+            [f"{table_name}_destination"],
+            **self.deltacat_storage_kwargs,
+        )
+        dest_partition = ds.commit_partition(
+            staged_dest, **self.deltacat_storage_kwargs
+        )
+
+        def compact(last_stream_position_to_compact):
+            compact_partition(
+                self._compaction_params(
+                    source_partition,
+                    dest_partition,
+                    last_stream_position_to_compact=last_stream_position_to_compact,
+                    **kwargs,
+                )
+            )
+            rci = rcf_url.write_round_completion_file.call_args[0][2]
+            rcf_url.read_round_completion_file.return_value = rci
+            return ds.get_delta_manifest(
+                rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+            )
+
+        def upsert(table):
+            return ds.commit_delta(
+                ds.stage_delta(table, source_partition, **self.deltacat_storage_kwargs),
+                **self.deltacat_storage_kwargs,
+            ).stream_position
+
+        # action
+        first_manifest = compact(source_partition.stream_position)
+        second_manifest = compact(
+            upsert(pa.table({"pk": ["100", "101"], "value": [1, 1]}))
+        )
+        third_manifest = compact(upsert(pa.table({"pk": ["101"], "value": [2]})))
+
+        # verify that only compacted files with incremental keys are rewritten
+        self.assertEqual(len(first_manifest.entries), 1)
+        self.assertEqual(len(second_manifest.entries), 2)
+        self.assertEqual(second_manifest.entries[0].uri, first_manifest.entries[0].uri)
+        self.assertEqual(len(third_manifest.entries), 2)
+        self.assertEqual(third_manifest.entries[0].uri, first_manifest.entries[0].uri)
+        self.assertNotEqual(
+            third_manifest.entries[1].uri, second_manifest.entries[1].uri
+        )
+        compacted_table = download_delta(
+            rcf_url.write_round_completion_file.call_args[0][2].compacted_delta_locator,
+            **self.deltacat_storage_kwargs,
+        )
+        self.assertEqual(
+            sorted(zip(*compacted_table.select(["pk", "value"]).to_pydict().values())),
+            sorted([(str(i), 0) for i in range(100)] + [("100", 1), ("101", 2)]),
+        )
+
+    @staticmethod
+    def _store_s3_objects_in_memory(s3_utils) -> dict:
+        s3_objects = {}
+        s3_utils.upload.side_effect = lambda url, body, **kwargs: s3_objects.update(
+            {url: body}
+        )
+        s3_utils.download.side_effect = lambda url, *args, **kwargs: (
+            {"Body": io.BytesIO(s3_objects[url])} if url in s3_objects else None
+        )
+        return s3_objects
+
+    @patch("deltacat.compute.compactor_v2.utils.pk_bloom_filter_file.s3_utils")
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_pk_bloom_filter_enabled(
+        self, s3_utils, rcf_url, pk_bloom_filter_s3_utils
+    ):
+        s3_objects = self._store_s3_objects_in_memory(pk_bloom_filter_s3_utils)
+
+        self._assert_compacted_files_without_incremental_keys_are_not_rewritten(
+            rcf_url, "pk_bloom_filter", pk_bloom_filter_enabled=True
+        )
+
+        # bloom filters are stored in files referenced by the manifest entries
+        manifest = ds.get_delta_manifest(
+            rcf_url.read_round_completion_file.return_value.compacted_delta_locator,
+            **self.deltacat_storage_kwargs,
+        )
+        for entry in manifest.entries:
+            pk_bloom_filter_file = entry.meta.pk_bloom_filter_file
+            self.assertEqual(
+                set(pk_bloom_filter_file.keys()),
+                {
+                    "url",
+                    "size_bytes",
+                    "primary_keys",
+                    "pk_hasher_id",
+                    "pk_hasher_version",
+                },
+            )
+            self.assertEqual(
+                len(s3_objects[pk_bloom_filter_file["url"]]),
+                pk_bloom_filter_file["size_bytes"],
+            )
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_two_phase_merge_enabled(self, s3_utils, rcf_url):
+        self._assert_compacted_files_without_incremental_keys_are_not_rewritten(
+            rcf_url, "two_phase_merge", two_phase_merge_enabled=True
+        )
+
+    def _assert_upserts_across_hash_buckets_are_merged(
+        self, rcf_url, table_name, first_kwargs, second_kwargs
+    ):
+        # setup
+        rcf_url.read_round_completion_file.return_value = None
+        staged_source = stage_partition_from_file_paths(
+            self.NAMESPACE, [f"{table_name}_source"], **self.deltacat_storage_kwargs
+        )
+        ds.commit_delta(
+            ds.stage_delta(
+                pa.table({"pk": [str(i) for i in range(100)], "value": [0] * 100}),
+                staged_source,
+                **self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        source_partition = ds.commit_partition(
+            staged_source, **self.deltacat_storage_kwargs
+        )
+        staged_dest = stage_partition_from_file_paths(
+            self.NAMESPACE,
+            [f"{table_name}_destination"],
+            **self.deltacat_storage_kwargs,
+        )
+        dest_partition = ds.commit_partition(
+            staged_dest, **self.deltacat_storage_kwargs
+        )
+
+        def compact(last_stream_position_to_compact, kwargs):
+            compact_partition(
+                self._compaction_params(
+                    source_partition,
+                    dest_partition,
+                    last_stream_position_to_compact=last_stream_position_to_compact,
+                    **{"hash_bucket_count": 4, "hash_group_count": 1, **kwargs},
+                )
+            )
+            rci = rcf_url.write_round_completion_file.call_args[0][2]
+            rcf_url.read_round_completion_file.return_value = rci
+            return download_delta(
+                rci.compacted_delta_locator, **self.deltacat_storage_kwargs
+            )
+
+        def upsert(table):
+            return ds.commit_delta(
+                ds.stage_delta(table, source_partition, **self.deltacat_storage_kwargs),
+                **self.deltacat_storage_kwargs,
+            ).stream_position
+
+        # action
+        compact(source_partition.stream_position, first_kwargs)
+        second_table = compact(
+            upsert(
+                pa.table({"pk": [str(i) for i in range(0, 100, 2)], "value": [1] * 50})
+            ),
+            first_kwargs,
+        )
+        third_table = compact(
+            upsert(
+                pa.table({"pk": [str(i) for i in range(0, 100, 3)], "value": [2] * 34})
+            ),
+            second_kwargs,
+        )
+
+        # verify
+        self.assertEqual(
+            sorted(zip(*second_table.select(["pk", "value"]).to_pydict().values())),
+            sorted((str(i), int(i % 2 == 0)) for i in range(100)),
+        )
+        self.assertEqual(
+            sorted(zip(*third_table.select(["pk", "value"]).to_pydict().values())),
+            sorted((str(i), 2 if i % 3 == 0 else int(i % 2 == 0)) for i in range(100)),
+        )
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_merge_prefetch_enabled(self, s3_utils, rcf_url):
+        # a budget of one byte prefetches one hash bucket at a time
+        self._assert_upserts_across_hash_buckets_are_merged(
+            rcf_url,
+            "merge_prefetch",
+            {"merge_prefetch_memory_budget_bytes": 1},
+            {"merge_prefetch_memory_budget_bytes": 1 << 30},
+        )
+
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_merge_thread_count_set(self, s3_utils, rcf_url):
+        self._assert_upserts_across_hash_buckets_are_merged(
+            rcf_url,
+            "merge_thread_count",
+            {"merge_thread_count": 4},
+            {"merge_thread_count": 4, "two_phase_merge_enabled": True},
+        )
+
+    @patch("deltacat.compute.compactor_v2.utils.pk_bloom_filter_file.s3_utils")
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_streaming_materialize_enabled(
+        self, s3_utils, rcf_url, pk_bloom_filter_s3_utils
+    ):
+        self._store_s3_objects_in_memory(pk_bloom_filter_s3_utils)
+        self._assert_upserts_across_hash_buckets_are_merged(
+            rcf_url,
+            "streaming_materialize",
+            {"streaming_materialize_enabled": True},
+            {"streaming_materialize_enabled": True, "pk_bloom_filter_enabled": True},
+        )
+
+    @patch(
+        "deltacat.compute.compactor_v2.compaction_session.assign_hash_buckets_to_hash_groups",
+        wraps=assign_hash_buckets_to_hash_groups,
+    )
+    @patch("deltacat.compute.compactor_v2.compaction_session.rcf")
+    @patch("deltacat.compute.compactor_v2.compaction_session.s3_utils")
+    def test_compact_partition_when_size_aware_hash_groups_enabled(
+        self, s3_utils, rcf_url, assign
+    ):
+        self._assert_upserts_across_hash_buckets_are_merged(
+            rcf_url,
+            "size_aware_hash_groups",
+            {"size_aware_hash_groups_enabled": True, "hash_group_count": 3},
+            {
+                "size_aware_hash_groups_enabled": True,
+                "hash_group_count": 3,
+                "delete_routing_enabled": True,
+            },
+        )
+
+        # the assignment and the sizes of the hash buckets are persisted
+        rci = rcf_url.read_round_completion_file.return_value
+        self.assertEqual(len(rci.hb_index_to_hash_group_index), 4)
+        self.assertEqual(set(rci.hb_index_to_hash_group_index), {0, 1, 2})
+        self.assertEqual(sum(rci.hb_index_to_input_num_rows), 34)
+        self.assertEqual(len(rci.hb_index_to_input_size_bytes), 4)
+        # each round starts from the assignment of the previous round
+        previous_assignments = [call.args[3] for call in assign.call_args_list]
+        self.assertEqual(len(previous_assignments), 3)
+        self.assertIsNone(previous_assignments[0])
+        self.assertEqual(len(previous_assignments[2]), 4)
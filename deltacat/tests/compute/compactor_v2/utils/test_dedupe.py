@@ -0,0 +1,60 @@
+import unittest
+
+import pyarrow as pa
+
+from deltacat.compute.compactor_v2.utils.dedupe import (
+    drop_duplicates,
+    drop_duplicates_presorted,
+)
+
+
+class TestDropDuplicates(unittest.TestCase):
+    def test_drop_duplicates_keeps_last_record_in_order(self):
+        table = pa.concat_tables(
+            [
+                pa.table({"pk": ["b", "a", "c"], "value": [1, 2, 3]}),
+                pa.table({"pk": ["a", "d", "b"], "value": [4, 5, 6]}),
+            ]
+        )
+
+        result = drop_duplicates(table, "pk")
+
+        self.assertEqual(
+            result.to_pydict(), {"pk": ["c", "a", "d", "b"], "value": [3, 4, 5, 6]}
+        )
+
+    def test_drop_duplicates_treats_nulls_as_one_value(self):
+        table = pa.table({"pk": [None, "a", None], "value": [1, 2, 3]})
+
+        result = drop_duplicates(table, "pk")
+
+        self.assertEqual(result.to_pydict(), {"pk": ["a", None], "value": [2, 3]})
+
+    def test_drop_duplicates_when_no_duplicates(self):
+        table = pa.table({"pk": [3, 1, 2], "value": [1, 2, 3]})
+
+        self.assertIs(drop_duplicates(table, "pk"), table)
+        self.assertIs(drop_duplicates(table, "missing"), table)
+
+    def test_drop_duplicates_presorted(self):
+        schema = pa.schema([("pk", pa.string()), ("value", pa.int64())])
+        table = pa.concat_tables(
+            [
+                pa.table({"pk": ["a", "a", "b"], "value": [1, 2, 3]}, schema=schema),
+                pa.table({"pk": ["b", "c", None], "value": [4, 5, 6]}, schema=schema),
+                pa.table({"pk": [None], "value": [7]}, schema=schema),
+            ]
+        )
+
+        result = drop_duplicates_presorted(table, "pk")
+
+        self.assertEqual(
+            result.to_pydict(), {"pk": ["a", "b", "c", None], "value": [2, 4, 5, 7]}
+        )
+        self.assertEqual(result, drop_duplicates(table, "pk"))
+
+    def test_drop_duplicates_presorted_when_no_duplicates(self):
+        table = pa.table({"pk": [1, 2, 3]})
+
+        self.assertIs(drop_duplicates_presorted(table, "pk"), table)
+        self.assertIs(drop_duplicates_presorted(table, "missing"), table)
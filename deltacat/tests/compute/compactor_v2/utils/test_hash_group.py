@@ -0,0 +1,157 @@
+import unittest
+
+import numpy as np
+
+from deltacat.compute.compactor.model.pyarrow_write_result import PyArrowWriteResult
+from deltacat.compute.compactor.model.round_completion_info import RoundCompletionInfo
+from deltacat.compute.compactor_v2.utils.hash_group import (
+    assign_hash_buckets_to_hash_groups,
+    estimate_hash_bucket_sizes,
+)
+from deltacat.storage import Manifest, ManifestEntry, ManifestMeta
+from deltacat.types.media import ContentEncoding, ContentType
+
+
+class TestAssignHashBucketsToHashGroups(unittest.TestCase):
+    def test_hash_buckets_of_equal_size_are_assigned_round_robin(self):
+        result = assign_hash_buckets_to_hash_groups(
+            np.zeros([5]), np.zeros([5], dtype="int64"), 2
+        )
+
+        self.assertEqual(result, [0, 1, 0, 1, 0])
+
+    def test_skewed_hash_buckets_are_packed_by_size(self):
+        hash_bucket_size_bytes = np.array([100, 10, 10, 10, 10, 10, 10, 10, 10, 10])
+        hash_bucket_num_rows = np.array([10, 1, 1, 1, 1, 1, 1, 1, 1, 1])
+
+        result = assign_hash_buckets_to_hash_groups(
+            hash_bucket_size_bytes, hash_bucket_num_rows, 2
+        )
+
+        # the hot hash bucket gets a hash group of its own
+        self.assertEqual(result[0], 0)
+        self.assertEqual(result[1:], [1] * 9)
+
+    def test_hash_groups_are_balanced(self):
+        rng = np.random.default_rng(7)
+        hash_bucket_size_bytes = rng.pareto(1.5, 200) * 1000
+        hash_bucket_num_rows = (hash_bucket_size_bytes / 10).astype("int64")
+
+        result = np.array(
+            assign_hash_buckets_to_hash_groups(
+                hash_bucket_size_bytes, hash_bucket_num_rows, 8
+            )
+        )
+
+        group_size_bytes = np.bincount(
+            result, weights=hash_bucket_size_bytes, minlength=8
+        )
+        round_robin_size_bytes = np.bincount(
+            np.arange(200) % 8, weights=hash_bucket_size_bytes, minlength=8
+        )
+        self.assertLessEqual(group_size_bytes.max(), round_robin_size_bytes.max())
+        # no hash group exceeds its fair share by more than one hash bucket
+        self.assertLessEqual(
+            group_size_bytes.max(),
+            hash_bucket_size_bytes.sum() / 8 + hash_bucket_size_bytes.max() + 1,
+        )
+
+    def test_previous_assignment_is_kept_while_balanced(self):
+        hash_bucket_size_bytes = np.array([100, 90, 10, 10])
+        hash_bucket_num_rows = np.array([10, 9, 1, 1])
+
+        result = assign_hash_buckets_to_hash_groups(
+            hash_bucket_size_bytes, hash_bucket_num_rows, 2, [1, 0, 0, 1]
+        )
+
+        # the new assignment [0, 1, 1, 0] is equally balanced
+        self.assertEqual(result, [1, 0, 0, 1])
+
+    def test_previous_assignment_is_replaced_when_unbalanced(self):
+        hash_bucket_size_bytes = np.array([100, 90, 10, 10])
+        hash_bucket_num_rows = np.array([10, 9, 1, 1])
+
+        result = assign_hash_buckets_to_hash_groups(
+            hash_bucket_size_bytes, hash_bucket_num_rows, 2, [0, 0, 1, 1]
+        )
+
+        self.assertEqual(result, [0, 1, 1, 0])
+
+    def test_previous_assignment_of_other_hash_groups_is_ignored(self):
+        for previous_hb_index_to_hash_group_index in [[0, 1, 0], [0, 1, 2, 0]]:
+            result = assign_hash_buckets_to_hash_groups(
+                np.zeros([4]),
+                np.zeros([4], dtype="int64"),
+                2,
+                previous_hb_index_to_hash_group_index,
+            )
+
+            self.assertEqual(result, [0, 1, 0, 1])
+
+
+class TestEstimateHashBucketSizes(unittest.TestCase):
+    @staticmethod
+    def _round_completion_info(**kwargs) -> RoundCompletionInfo:
+        return RoundCompletionInfo.of(
+            high_watermark=None,
+            compacted_delta_locator=None,
+            compacted_pyarrow_write_result=PyArrowWriteResult.of(3, 600, 300, 30),
+            sort_keys_bit_width=0,
+            hash_bucket_count=3,
+            **kwargs,
+        )
+
+    def test_sizes_of_compacted_and_incremental_records(self):
+        manifest = Manifest.of(
+            [
+                ManifestEntry.of(
+                    f"s3://bucket/file_{i}",
+                    ManifestMeta.of(
+                        10,
+                        100,
+                        ContentType.PARQUET.value,
+                        ContentEncoding.IDENTITY.value,
+                    ),
+                )
+                for i in range(3)
+            ]
+        )
+        round_completion_info = self._round_completion_info(
+            hb_index_to_entry_range={"0": (0, 2), "2": (2, 3)},
+            hb_index_to_input_size_bytes=[0, 50, 0],
+            hb_index_to_input_num_rows=[0, 5, 0],
+        )
+
+        size_bytes, num_rows = estimate_hash_bucket_sizes(
+            3, round_completion_info, manifest, 1.0
+        )
+
+        # compacted files are inflated by the previous round's inflation
+        self.assertEqual(size_bytes.tolist(), [400, 50, 200])
+        self.assertEqual(num_rows.tolist(), [20, 5, 10])
+
+    def test_no_sizes_without_previous_round(self):
+        size_bytes, num_rows = estimate_hash_bucket_sizes(3, None, None, 1.0)
+
+        self.assertEqual(size_bytes.tolist(), [0, 0, 0])
+        self.assertEqual(num_rows.tolist(), [0, 0, 0])
+
+    def test_sizes_without_previous_write_result(self):
+        round_completion_info = RoundCompletionInfo.of(
+            high_watermark=None,
+            compacted_delta_locator=None,
+            compacted_pyarrow_write_result=None,
+            sort_keys_bit_width=0,
+            hash_bucket_count=3,
+            hb_index_to_entry_range={"0": (0, 1)},
+            hb_index_to_input_size_bytes=[0, 50, 0],
+            hb_index_to_input_num_rows=[0, 5, 0],
+        )
+
+        size_bytes, num_rows = estimate_hash_bucket_sizes(
+            3, round_completion_info, Manifest.of([]), 1.0
+        )
+
+        # only the measured incremental records are known
+        self.assertEqual(size_bytes.tolist(), [0, 50, 0])
+        self.assertEqual(num_rows.tolist(), [0, 5, 0])
@@ -0,0 +1,64 @@
+import unittest
+
+from deltacat.compute.compactor.model.pyarrow_write_result import PyArrowWriteResult
+from deltacat.compute.compactor.model.round_completion_info import (
+    RoundCompletionInfo,
+)
+from deltacat.compute.compactor_v2.model.merge_input import MergeInput
+from deltacat.compute.compactor_v2.utils.merge import (
+    _compacted_file_sizing,
+    estimate_compacted_file_inflation,
+)
+from deltacat.types.media import ContentType
+
+
+class TestCompactedFileSizing(unittest.TestCase):
+    def _merge_input(self, **kwargs) -> MergeInput:
+        return MergeInput.of(
+            merge_file_groups_provider=None,
+            write_to_partition=None,
+            compacted_file_content_type=ContentType.PARQUET,
+            primary_keys=["pk"],
+            max_records_per_output_file=1_000_000,
+            **kwargs,
+        )
+
+    def test_estimate_compacted_file_inflation(self):
+        rci = RoundCompletionInfo.of(
+            high_watermark=1,
+            compacted_delta_locator=None,
+            compacted_pyarrow_write_result=PyArrowWriteResult.of(2, 600, 200, 10),
+            sort_keys_bit_width=0,
+        )
+
+        self.assertEqual(estimate_compacted_file_inflation(rci, 4.0), 3.0)
+        self.assertEqual(estimate_compacted_file_inflation(None, 4.0), 4.0)
+
+    def test_sizing_by_records_when_no_target_size(self):
+        input = self._merge_input(s3_table_writer_kwargs={"version": "2.6"})
+
+        self.assertEqual(
+            _compacted_file_sizing(input, 100.0), (1_000_000, {"version": "2.6"})
+        )
+
+    def test_sizing_by_target_size(self):
+        input = self._merge_input(
+            compacted_file_target_size_bytes=1000 * 1000,
+            compacted_file_row_group_target_size_bytes=100 * 1000,
+            compacted_file_inflation=4.0,
+        )
+
+        # 400 in-memory bytes per record are written as 100 file bytes
+        self.assertEqual(
+            _compacted_file_sizing(input, 400.0), (10_000, {"row_group_size": 1000})
+        )
+        # narrow records are still capped by max records per output file
+        self.assertEqual(_compacted_file_sizing(input, 0.004)[0], 1_000_000)
+
+    def test_sizing_keeps_configured_row_group_size(self):
+        input = self._merge_input(
+            compacted_file_target_size_bytes=1000,
+            s3_table_writer_kwargs={"row_group_size": 7},
+        )
+
+        self.assertEqual(_compacted_file_sizing(input, 400.0)[1], {"row_group_size": 7})
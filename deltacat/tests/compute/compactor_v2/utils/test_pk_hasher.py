@@ -0,0 +1,161 @@
+import unittest
+import hashlib
+import importlib
+import pyarrow as pa
+from deltacat.compute.compactor.utils import system_columns as sc
+from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    generate_pk_hash_column,
+    group_by_pk_hash_bucket,
+)
+from deltacat.compute.compactor_v2.utils.pk_hasher import (
+    Sha1PkHasher,
+    Xxh3128PkHasher,
+    get_pk_hasher,
+    list_pk_hasher_ids,
+    register_pk_hasher,
+)
+
+
+class TestPkHasher(unittest.TestCase):
+    def test_sha1_hash_array_sanity(self):
+        array = pa.array(["a", "bc", ""])
+
+        result = get_pk_hasher(Sha1PkHasher.ID).hash_array(array)
+
+        self.assertEqual(result.type, pa.binary(20))
+        self.assertEqual(
+            result.to_pylist(),
+            [hashlib.sha1(pk.encode("utf-8")).digest() for pk in ["a", "bc", ""]],
+        )
+
+    def test_hash_array_of_large_string(self):
+        array = pa.array(["a", "bc"], pa.large_string())
+
+        result = get_pk_hasher(Sha1PkHasher.ID).hash_array(array)
+
+        self.assertEqual(
+            result.to_pylist(),
+            [hashlib.sha1(pk.encode("utf-8")).digest() for pk in ["a", "bc"]],
+        )
+
+    def test_hash_array_with_nulls_raises(self):
+        array = pa.array(["a", None])
+
+        self.assertRaises(
+            AssertionError, lambda: get_pk_hasher(Sha1PkHasher.ID).hash_array(array)
+        )
+
+    @unittest.skipUnless(importlib.util.find_spec("xxhash"), "xxhash not installed")
+    def test_xxh3_128_hash_array_sanity(self):
+        import xxhash
+
+        array = pa.array(["a", "bc", ""])
+
+        result = get_pk_hasher(Xxh3128PkHasher.ID).hash_array(array)
+
+        self.assertEqual(result.type, pa.binary(16))
+        self.assertEqual(
+            result.to_pylist(),
+            [xxhash.xxh3_128_digest(pk.encode("utf-8")) for pk in ["a", "bc", ""]],
+        )
+
+    @unittest.skipUnless(importlib.util.find_spec("xxhash"), "xxhash not installed")
+    def test_generate_pk_hash_column_with_xxh3_128(self):
+        table = pa.table({"pk": ["a", "b", "c"]})
+
+        result = generate_pk_hash_column(
+            [table], ["pk"], requires_hash=True, pk_hasher_id=Xxh3128PkHasher.ID
+        )[0]
+
+        self.assertEqual(sc.pk_hash_column(result).type, pa.binary(16))
+        self.assertEqual(len(set(sc.pk_hash_column(result).to_pylist())), 3)
+
+    def test_get_unknown_pk_hasher_raises(self):
+        self.assertRaises(ValueError, lambda: get_pk_hasher("unknown"))
+
+    def test_register_pk_hasher(self):
+        class TruncatedSha1PkHasher(Sha1PkHasher):
+            @property
+            def id(self) -> str:
+                return "test_truncated_sha1"
+
+            @property
+            def digest_byte_width(self) -> int:
+                return 8
+
+            def digest(self, value: bytes) -> bytes:
+                return super().digest(value)[:8]
+
+        register_pk_hasher(TruncatedSha1PkHasher)
+
+        self.assertIn("test_truncated_sha1", list_pk_hasher_ids())
+        result = get_pk_hasher("test_truncated_sha1").hash_array(pa.array(["a"]))
+        self.assertEqual(result.type, pa.binary(8))
+        self.assertEqual(result[0].as_py(), hashlib.sha1(b"a").digest()[:8])
+
+    def test_register_pk_hasher_with_existing_id_raises(self):
+        class OtherSha1PkHasher(Sha1PkHasher):
+            pass
+
+        self.assertRaises(ValueError, lambda: register_pk_hasher(OtherSha1PkHasher))
+
+    def test_hash_array_of_fixed_width_values(self):
+        array = pa.array([1, -1, 2**40], pa.int64()).slice(1)
+
+        result = get_pk_hasher(Sha1PkHasher.ID).hash_array(array)
+
+        self.assertEqual(
+            result.to_pylist(),
+            [
+                hashlib.sha1(pk.to_bytes(8, "little", signed=True)).digest()
+                for pk in [-1, 2**40]
+            ],
+        )
+
+    def test_hash_array_of_fixed_width_values_of_different_widths(self):
+        pk_hasher = get_pk_hasher(Sha1PkHasher.ID)
+
+        int32_result = pk_hasher.hash_array(pa.array([12345, -1], pa.int32()))
+        int64_result = pk_hasher.hash_array(pa.array([12345, -1], pa.int64()))
+
+        self.assertEqual(int32_result.to_pylist(), int64_result.to_pylist())
+
+    def test_hash_array_of_timestamps_of_different_units(self):
+        pk_hasher = get_pk_hasher(Sha1PkHasher.ID)
+
+        seconds_result = pk_hasher.hash_array(pa.array([1, 2], pa.timestamp("s")))
+        nanos_result = pk_hasher.hash_array(
+            pa.array([1_000_000_000, 2_000_000_000], pa.timestamp("ns"))
+        )
+
+        self.assertEqual(seconds_result.to_pylist(), nanos_result.to_pylist())
+
+    def test_hash_array_of_dates_of_different_types(self):
+        pk_hasher = get_pk_hasher(Sha1PkHasher.ID)
+
+        date32_result = pk_hasher.hash_array(pa.array([3, 4], pa.date32()))
+        date64_result = pk_hasher.hash_array(
+            pa.array([3 * 86_400_000, 4 * 86_400_000], pa.date64())
+        )
+
+        self.assertEqual(date32_result.to_pylist(), date64_result.to_pylist())
+
+    @unittest.skipUnless(importlib.util.find_spec("xxhash"), "xxhash not installed")
+    def test_xxh3_128_hash_buckets_of_int32_and_int64_keys_match(self):
+        int32_result = group_by_pk_hash_bucket(
+            pa.table({"pk": pa.array([12345], pa.int32())}),
+            16,
+            ["pk"],
+            pk_hasher_id=Xxh3128PkHasher.ID,
+        )
+        int64_result = group_by_pk_hash_bucket(
+            pa.table({"pk": pa.array([12345], pa.int64())}),
+            16,
+            ["pk"],
+            pk_hasher_id=Xxh3128PkHasher.ID,
+        )
+
+        self.assertEqual(
+            [table is not None for table in int32_result],
+            [table is not None for table in int64_result],
+        )
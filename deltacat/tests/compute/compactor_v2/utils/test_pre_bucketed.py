@@ -0,0 +1,168 @@
+import unittest
+import sqlite3
+import os
+import pyarrow as pa
+import deltacat.tests.local_deltacat_storage as ds
+from deltacat.compute.compactor_v2.model.merge_file_group import (
+    PreBucketedMergeFileGroupsProvider,
+)
+from deltacat.compute.compactor_v2.utils.pk_hasher import Sha1PkHasher, get_pk_hasher
+from deltacat.compute.compactor_v2.utils.pre_bucketed import (
+    group_pre_bucketed_entries_by_hash_group,
+    is_pre_bucketed,
+    stage_pre_bucketed_delta,
+)
+from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    group_by_pk_hash_bucket,
+)
+from deltacat.utils.common import current_time_ms
+from deltacat.storage import Delta
+from deltacat.tests.test_utils.pyarrow import stage_partition_from_file_paths
+
+
+class TestPreBucketedDeltas(unittest.TestCase):
+    DB_FILE_PATH = f"{current_time_ms()}.db"
+    NAMESPACE = "test_pre_bucketed"
+
+    @classmethod
+    def setUpClass(cls):
+        con = sqlite3.connect(cls.DB_FILE_PATH)
+        cur = con.cursor()
+        cls.kwargs = {ds.SQLITE_CON_ARG: con, ds.SQLITE_CUR_ARG: cur}
+        cls.deltacat_storage_kwargs = {ds.DB_FILE_PATH_ARG: cls.DB_FILE_PATH}
+
+        super().setUpClass()
+
+    @classmethod
+    def doClassCleanups(cls) -> None:
+        os.remove(cls.DB_FILE_PATH)
+
+    def _commit_pre_bucketed_delta(self, table_name, table, hash_bucket_count):
+        partition = stage_partition_from_file_paths(
+            self.NAMESPACE, [table_name], **self.deltacat_storage_kwargs
+        )
+        delta = ds.commit_delta(
+            stage_pre_bucketed_delta(
+                table,
+                partition,
+                ["pk"],
+                hash_bucket_count,
+                deltacat_storage=ds,
+                deltacat_storage_kwargs=self.deltacat_storage_kwargs,
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        ds.commit_partition(partition, **self.deltacat_storage_kwargs)
+        return delta
+
+    def test_stage_pre_bucketed_delta_sanity(self):
+        table = pa.table({"pk": [str(i) for i in range(100)], "value": range(100)})
+
+        delta = self._commit_pre_bucketed_delta("sanity", table, 5)
+
+        expected = group_by_pk_hash_bucket(table, 5, ["pk"])
+        entries = delta.manifest.entries
+        self.assertEqual(len(entries), len([t for t in expected if t is not None]))
+        self.assertEqual(delta.meta.record_count, 100)
+        for entry_index, entry in enumerate(entries):
+            self.assertEqual(entry.meta.hash_bucket_count, 5)
+            self.assertEqual(entry.meta.primary_keys, ["pk"])
+            self.assertEqual(entry.meta.pk_hasher_id, Sha1PkHasher.ID)
+            self.assertEqual(entry.meta.pk_hasher_version, 1)
+            hb_table = ds.download_delta_manifest_entry(
+                delta, entry_index, **self.deltacat_storage_kwargs
+            )
+            self.assertEqual(hb_table, expected[entry.meta.hash_bucket_index])
+
+    def test_is_pre_bucketed(self):
+        table = pa.table({"pk": [str(i) for i in range(10)]})
+        delta = self._commit_pre_bucketed_delta("is_pre_bucketed", table, 3)
+        sha1 = get_pk_hasher(Sha1PkHasher.ID)
+
+        self.assertTrue(is_pre_bucketed([delta], ["pk"], 3, sha1))
+        self.assertFalse(is_pre_bucketed([delta], ["pk"], 4, sha1))
+        self.assertFalse(is_pre_bucketed([], ["pk"], 3, sha1))
+
+        partition = stage_partition_from_file_paths(
+            self.NAMESPACE, ["not_pre_bucketed"], **self.deltacat_storage_kwargs
+        )
+        plain_delta = ds.stage_delta(table, partition, **self.deltacat_storage_kwargs)
+        self.assertFalse(is_pre_bucketed([delta, plain_delta], ["pk"], 3, sha1))
+
+    def test_is_pre_bucketed_on_other_primary_keys(self):
+        table = pa.table({"pk": [str(i) for i in range(10)], "other": range(10)})
+        delta = self._commit_pre_bucketed_delta("other_primary_keys", table, 3)
+        sha1 = get_pk_hasher(Sha1PkHasher.ID)
+
+        self.assertFalse(is_pre_bucketed([delta], ["other"], 3, sha1))
+        self.assertFalse(is_pre_bucketed([delta], ["other", "pk"], 3, sha1))
+        self.assertFalse(is_pre_bucketed([delta], [], 3, sha1))
+
+    def test_group_pre_bucketed_entries_by_hash_group(self):
+        table = pa.table({"pk": [str(i) for i in range(100)]})
+        delta = self._commit_pre_bucketed_delta("group", table, 4)
+
+        (
+            hash_group_to_entries,
+            hash_group_to_size_bytes,
+            hash_group_to_num_rows,
+        ) = group_pre_bucketed_entries_by_hash_group([delta], 2, 1.0)
+
+        self.assertEqual(set(hash_group_to_entries.keys()), {0, 1})
+        self.assertEqual(sum(hash_group_to_num_rows.values()), 100)
+        for hash_group_index, entries in hash_group_to_entries.items():
+            for delta_locator, delta_type, entry_index, hb_index in entries:
+                self.assertEqual(hb_index % 2, hash_group_index)
+                self.assertEqual(delta_locator, delta.locator)
+                self.assertEqual(
+                    delta.manifest.entries[entry_index].meta.hash_bucket_index,
+                    hb_index,
+                )
+            if entries:
+                self.assertGreater(hash_group_to_size_bytes[hash_group_index], 0)
+
+    def test_pre_bucketed_merge_file_groups_keep_file_order(self):
+        partition = stage_partition_from_file_paths(
+            self.NAMESPACE, ["file_order"], **self.deltacat_storage_kwargs
+        )
+        # a single delta with two files of the only hash bucket
+        delta = ds.commit_delta(
+            Delta.merge_deltas(
+                [
+                    stage_pre_bucketed_delta(
+                        pa.table({"pk": ["a", "b"], "value": [i, i]}),
+                        partition,
+                        ["pk"],
+                        1,
+                        deltacat_storage=ds,
+                        deltacat_storage_kwargs=self.deltacat_storage_kwargs,
+                    )
+                    for i in range(2)
+                ]
+            ),
+            **self.deltacat_storage_kwargs,
+        )
+        ds.commit_partition(partition, **self.deltacat_storage_kwargs)
+        hash_group_to_entries, _, _ = group_pre_bucketed_entries_by_hash_group(
+            [delta], 1, 1.0
+        )
+
+        merge_file_groups = PreBucketedMergeFileGroupsProvider(
+            0,
+            hash_group_to_entries[0],
+            1,
+            1,
+            None,
+            deltacat_storage=ds,
+            deltacat_storage_kwargs=self.deltacat_storage_kwargs,
+        ).create()
+
+        self.assertEqual(len(merge_file_groups), 1)
+        dfes = merge_file_groups[0].dfe_groups[0]
+        self.assertEqual(
+            [dfe.stream_position for dfe in dfes], [delta.stream_position] * 2
+        )
+        self.assertEqual([dfe.file_index for dfe in dfes], [0, 1])
+        self.assertEqual(
+            [dfe.table["value"].to_pylist() for dfe in dfes], [[0, 0], [1, 1]]
+        )
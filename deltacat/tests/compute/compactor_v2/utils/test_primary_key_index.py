@@ -0,0 +1,354 @@
+import unittest
+import hashlib
+import importlib
+import uuid
+from decimal import Decimal
+import numpy as np
+import pyarrow as pa
+from deltacat.compute.compactor.model.delta_file_envelope import DeltaFileEnvelope
+from deltacat.compute.compactor.utils import system_columns as sc
+from deltacat.compute.compactor_v2.constants import PK_DELIMITER
+from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    generate_pk_hash_column,
+    group_by_pk_hash_bucket,
+    group_hash_bucket_indices,
+    hash_group_index_to_hash_bucket_indices,
+    pk_digest_array_to_hash_bucket_indices,
+    pk_digest_to_hash_bucket_index,
+)
+from deltacat.compute.compactor_v2.utils.pk_hasher import Xxh3128PkHasher
+from deltacat.io.object_store import IObjectStore
+from deltacat.storage import DeltaType
+
+
+class TestPkDigestArrayToHashBucketIndices(unittest.TestCase):
+    SHA1_DIGESTS = [
+        hashlib.sha1(str(i).encode("utf-8")).hexdigest() for i in range(1000)
+    ]
+
+    def _assert_matches_row_wise(self, digests, num_buckets):
+        expected = [
+            pk_digest_to_hash_bucket_index(digest, num_buckets)
+            for digest in digests.to_pylist()
+        ]
+
+        result = pk_digest_array_to_hash_bucket_indices(digests, num_buckets)
+
+        self.assertEqual(result.dtype, "int32")
+        self.assertEqual(result.tolist(), expected)
+
+    def test_sha1_hex_digests_sanity(self):
+        digests = pa.array(self.SHA1_DIGESTS, pa.string())
+
+        for num_buckets in [1, 2, 3, 7, 100, 9973, 2**31 - 1]:
+            self._assert_matches_row_wise(digests, num_buckets)
+
+    def test_uuid_hex_digests(self):
+        digests = pa.array([uuid.uuid4().hex for _ in range(100)], pa.string())
+
+        self._assert_matches_row_wise(digests, 37)
+
+    def test_uppercase_hex_digests(self):
+        digests = pa.array([d.upper() for d in self.SHA1_DIGESTS], pa.string())
+
+        self._assert_matches_row_wise(digests, 37)
+
+    def test_chunked_and_sliced_digests(self):
+        digests = pa.chunked_array(
+            [
+                pa.array(self.SHA1_DIGESTS[:300]).slice(10, 200),
+                pa.array(self.SHA1_DIGESTS[300:]),
+                pa.array([], pa.string()),
+            ]
+        )
+
+        self._assert_matches_row_wise(digests, 11)
+
+    def test_empty_digests(self):
+        digests = pa.chunked_array([], pa.string())
+
+        result = pk_digest_array_to_hash_bucket_indices(digests, 3)
+
+        self.assertEqual(len(result), 0)
+
+    def test_variable_width_digests_falls_back(self):
+        digests = pa.array(["abc", "1234", "ffffffffffffffffffffffffffff", "0"])
+
+        self._assert_matches_row_wise(digests, 5)
+
+    def test_binary_digests_match_hex_digests(self):
+        hex_digests = pa.array(self.SHA1_DIGESTS, pa.string())
+        binary_digests = pa.array(
+            [bytes.fromhex(d) for d in self.SHA1_DIGESTS], pa.binary(20)
+        )
+
+        self._assert_matches_row_wise(binary_digests, 37)
+        self.assertEqual(
+            pk_digest_array_to_hash_bucket_indices(binary_digests, 37).tolist(),
+            pk_digest_array_to_hash_bucket_indices(hex_digests, 37).tolist(),
+        )
+
+    def test_invalid_hex_digests_raises(self):
+        digests = pa.array(["zz", "11"])
+
+        self.assertRaises(
+            ValueError, lambda: pk_digest_array_to_hash_bucket_indices(digests, 5)
+        )
+
+
+class TestGeneratePkHashColumn(unittest.TestCase):
+    def test_sha1_digest_column_sanity(self):
+        table = pa.table({"pk": ["a", "b", "c"], "pk2": [1, 2, 3]})
+
+        result = generate_pk_hash_column([table], ["pk", "pk2"], requires_hash=True)
+
+        self.assertEqual(len(result), 1)
+        hash_column = sc.pk_hash_column(result[0])
+        self.assertEqual(hash_column.type, pa.binary(20))
+        self.assertEqual(
+            hash_column.to_pylist(),
+            [
+                hashlib.sha1(f"{pk}{PK_DELIMITER}{pk2}".encode("utf-8")).digest()
+                for pk, pk2 in zip(["a", "b", "c"], [1, 2, 3])
+            ],
+        )
+
+    def test_sha1_digest_column_of_chunked_table(self):
+        table = pa.concat_tables(
+            [pa.table({"pk": ["a", "b"]}), pa.table({"pk": ["c"]}).slice(0, 1)]
+        )
+
+        result = generate_pk_hash_column([table], ["pk"], requires_hash=True)[0]
+
+        self.assertEqual(
+            sc.pk_hash_column(result).to_pylist(),
+            [hashlib.sha1(pk.encode("utf-8")).digest() for pk in ["a", "b", "c"]],
+        )
+
+    def test_short_primary_keys_are_not_hashed(self):
+        table = pa.table({"pk": ["a", "b", "c"]})
+
+        result = generate_pk_hash_column([table], ["pk"])[0]
+
+        self.assertEqual(sc.pk_hash_column(result).to_pylist(), ["a", "b", "c"])
+
+    def test_no_primary_keys_generates_unique_hashes(self):
+        table = pa.table({"col": [1, 1, 1]})
+
+        result = generate_pk_hash_column([table], [])[0]
+
+        hash_column = sc.pk_hash_column(result)
+        self.assertEqual(hash_column.type, pa.binary(16))
+        self.assertEqual(len(set(hash_column.to_pylist())), 3)
+
+    def test_fixed_width_primary_key_is_used_as_is(self):
+        table = pa.table({"pk": pa.array([3, 1, 2], pa.int64())})
+
+        result = generate_pk_hash_column([table], ["pk"])[0]
+
+        hash_column = sc.pk_hash_column(result)
+        self.assertEqual(hash_column.type, pa.int64())
+        self.assertEqual(hash_column.to_pylist(), [3, 1, 2])
+
+    def test_fixed_width_primary_key_sha1_digests_string(self):
+        table = pa.table({"pk": pa.array([3, 1, 2], pa.int32())})
+
+        result = generate_pk_hash_column([table], ["pk"], requires_hash=True)[0]
+
+        self.assertEqual(
+            sc.pk_hash_column(result).to_pylist(),
+            [hashlib.sha1(str(pk).encode("utf-8")).digest() for pk in [3, 1, 2]],
+        )
+
+    @unittest.skipUnless(importlib.util.find_spec("xxhash"), "xxhash not installed")
+    def test_fixed_width_primary_key_xxh3_128_digests_raw_values(self):
+        import xxhash
+
+        table = pa.concat_tables(
+            [
+                pa.table({"pk": pa.array([3, 1], pa.int64())}),
+                pa.table({"pk": pa.array([5, 4, 2], pa.int64())}).slice(1, 2),
+            ]
+        )
+
+        result = generate_pk_hash_column(
+            [table], ["pk"], requires_hash=True, pk_hasher_id=Xxh3128PkHasher.ID
+        )[0]
+
+        self.assertEqual(
+            sc.pk_hash_column(result).to_pylist(),
+            [
+                xxhash.xxh3_128_digest(pk.to_bytes(8, "little", signed=True))
+                for pk in [3, 1, 4, 2]
+            ],
+        )
+
+    def test_fixed_width_primary_key_with_nulls_uses_string(self):
+        table = pa.table({"pk": pa.array([3, None, 2], pa.int64())})
+
+        result = generate_pk_hash_column([table], ["pk"])[0]
+
+        self.assertEqual(sc.pk_hash_column(result).to_pylist(), ["3", None, "2"])
+
+    def test_fixed_width_primary_keys_of_different_types_use_int64(self):
+        tables = [
+            pa.table({"pk": pa.array([1], pa.int64())}),
+            pa.table({"pk": pa.array([1], pa.int32())}),
+        ]
+
+        result = generate_pk_hash_column(tables, ["pk"])
+
+        self.assertEqual(
+            [sc.pk_hash_column(table).type for table in result],
+            [pa.int64(), pa.int64()],
+        )
+        self.assertEqual(
+            [sc.pk_hash_column(table).to_pylist() for table in result],
+            [[1], [1]],
+        )
+
+    def test_decimal_primary_key_uses_string(self):
+        table = pa.table({"pk": pa.array([Decimal("1.50")], pa.decimal128(10, 2))})
+
+        result = generate_pk_hash_column([table], ["pk"])[0]
+
+        self.assertEqual(sc.pk_hash_column(result).to_pylist(), ["1.50"])
+
+
+class TestGroupByPkHashBucket(unittest.TestCase):
+    def _assert_grouped_by_hash_bucket(self, table, num_buckets):
+        result = group_by_pk_hash_bucket(table, num_buckets, ["pk"])
+
+        self.assertEqual(len(result), num_buckets)
+        expected = {}
+        for pk in table["pk"].to_pylist():
+            hb_idx = pk_digest_to_hash_bucket_index(
+                hashlib.sha1(pk.encode("utf-8")).digest(), num_buckets
+            )
+            expected.setdefault(hb_idx, []).append(pk)
+        for hb_idx, hb_table in enumerate(result):
+            if hb_idx not in expected:
+                self.assertIsNone(hb_table)
+                continue
+            self.assertEqual(hb_table.column_names, table.column_names)
+            # rows of a hash bucket retain their relative order
+            self.assertEqual(hb_table["pk"].to_pylist(), expected[hb_idx])
+
+    def test_group_by_pk_hash_bucket_sanity(self):
+        table = pa.table({"pk": [str(i) for i in range(1000)], "value": range(1000)})
+
+        self._assert_grouped_by_hash_bucket(table, 7)
+
+    def test_group_by_pk_hash_bucket_of_chunked_table(self):
+        table = pa.concat_tables(
+            [
+                pa.table({"pk": [str(i) for i in range(500)]}),
+                pa.table({"pk": pa.array([], pa.string())}),
+                pa.table({"pk": [str(i) for i in range(500, 1000)]}).slice(10),
+            ]
+        )
+
+        self._assert_grouped_by_hash_bucket(table, 13)
+
+    def test_group_by_pk_hash_bucket_with_many_buckets(self):
+        table = pa.table({"pk": [str(i) for i in range(1000)]})
+
+        self._assert_grouped_by_hash_bucket(table, 2**17 + 3)
+
+
+class _InMemoryObjectStore(IObjectStore):
+    def __init__(self):
+        self.objects = {}
+
+    def put_many(self, objects, *args, **kwargs):
+        refs = []
+        for obj in objects:
+            ref = len(self.objects)
+            self.objects[ref] = obj
+            refs.append(ref)
+        return refs
+
+    def get_many(self, refs, *args, **kwargs):
+        return [self.objects[ref] for ref in refs]
+
+
+class TestGroupHashBucketIndices(unittest.TestCase):
+    @staticmethod
+    def _dfe(stream_position, file_index, values, delta_type=DeltaType.UPSERT):
+        return DeltaFileEnvelope.of(
+            stream_position=stream_position,
+            file_index=file_index,
+            delta_type=delta_type,
+            table=pa.table({"pk": values}),
+        )
+
+    def test_fragments_of_hash_bucket_are_coalesced(self):
+        object_store = _InMemoryObjectStore()
+        hash_bucket_object_groups = np.empty([2], dtype="object")
+        hash_bucket_object_groups[0] = [
+            self._dfe(1, 0, ["a", "b"]),
+            self._dfe(1, 1, ["c"]),
+            self._dfe(2, 0, ["d"]),
+            self._dfe(2, 1, ["e"], DeltaType.DELETE),
+        ]
+        hash_bucket_object_groups[1] = [self._dfe(1, 0, ["f"])]
+
+        result = group_hash_bucket_indices(
+            hash_bucket_object_groups, 2, 1, object_store
+        )
+
+        object_ref, size_bytes, num_rows = result[0]
+        self.assertEqual(num_rows, 6)
+        hb_to_dfes = object_store.get_many([object_ref])[0]
+        self.assertEqual(
+            [
+                (dfe.stream_position, dfe.file_index, dfe.delta_type)
+                for dfe in hb_to_dfes[0]
+            ],
+            [
+                (1, 0, DeltaType.UPSERT),
+                (2, 0, DeltaType.UPSERT),
+                (2, 1, DeltaType.DELETE),
+            ],
+        )
+        self.assertEqual(
+            [dfe.table["pk"].to_pylist() for dfe in hb_to_dfes[0]],
+            [["a", "b", "c"], ["d"], ["e"]],
+        )
+        self.assertTrue(
+            all(
+                column.num_chunks == 1
+                for dfe in hb_to_dfes[0]
+                for column in dfe.table.columns
+            )
+        )
+        self.assertEqual(len(hb_to_dfes[1]), 1)
+
+    def test_hash_buckets_are_grouped_by_assignment(self):
+        object_store = _InMemoryObjectStore()
+        hash_bucket_object_groups = np.empty([3], dtype="object")
+        for hb_index, pks in enumerate([["a", "b"], ["c"], ["d"]]):
+            hash_bucket_object_groups[hb_index] = [self._dfe(1, 0, pks)]
+
+        result = group_hash_bucket_indices(
+            hash_bucket_object_groups, 3, 2, object_store, [1, 0, 0]
+        )
+
+        self.assertEqual(result[0][2], 2)
+        self.assertEqual(result[1][2], 2)
+        hb_to_dfes = object_store.get_many([result[0][0]])[0]
+        self.assertIsNone(hb_to_dfes[0])
+        self.assertEqual(hb_to_dfes[2][0].table["pk"].to_pylist(), ["d"])
+        self.assertEqual(
+            list(hash_group_index_to_hash_bucket_indices(0, 3, 2, [1, 0, 0])),
+            [1, 2],
+        )
+        self.assertEqual(
+            list(hash_group_index_to_hash_bucket_indices(0, 3, 2)),
+            [0, 2],
+        )
+
+    def test_no_hash_bucket_objects(self):
+        result = group_hash_bucket_indices(None, 2, 2, _InMemoryObjectStore())
+
+        self.assertEqual(result.tolist(), [None, None])
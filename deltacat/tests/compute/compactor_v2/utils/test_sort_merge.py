@@ -0,0 +1,185 @@
+import unittest
+
+import pyarrow as pa
+
+from deltacat.compute.compactor.utils import system_columns as sc
+from deltacat.compute.compactor_v2.utils.dedupe import drop_duplicates
+from deltacat.compute.compactor_v2.utils.primary_key_index import (
+    generate_pk_hash_column,
+)
+from deltacat.compute.compactor_v2.utils.sort_merge import (
+    can_sort_merge,
+    drop_duplicates_sorted,
+    merge_sorted,
+    merge_sorted_by,
+    sort_merge_tables,
+)
+from deltacat.storage import DeltaType, SortKey, SortOrder
+
+
+def _with_pk_hash(table: pa.Table) -> pa.Table:
+    return generate_pk_hash_column([table], primary_keys=["pk"])[0]
+
+
+def _with_delta_type(table: pa.Table, delta_type: DeltaType) -> pa.Table:
+    return sc.append_delta_type_col(
+        table, [sc.delta_type_to_field(delta_type)] * len(table)
+    )
+
+
+def _is_sorted_by_pk_hash(table: pa.Table) -> bool:
+    keys = table[sc._PK_HASH_COLUMN_NAME].to_pylist()
+    return keys == sorted(keys)
+
+
+class TestSortMerge(unittest.TestCase):
+    def test_can_sort_merge(self):
+        table = pa.table({"pk": ["a", None]})
+
+        self.assertTrue(can_sort_merge(table.slice(0, 1), "pk"))
+        self.assertFalse(can_sort_merge(table, "pk"))
+        self.assertFalse(can_sort_merge(table, "missing"))
+
+    def test_drop_duplicates_sorted_keeps_last_record(self):
+        table = _with_pk_hash(
+            pa.table({"pk": ["b", "a", "b", "c", "a"], "value": [1, 2, 3, 4, 5]})
+        )
+
+        result = drop_duplicates_sorted(table, sc._PK_HASH_COLUMN_NAME)
+
+        self.assertTrue(_is_sorted_by_pk_hash(result))
+        self.assertEqual(
+            dict(zip(result["pk"].to_pylist(), result["value"].to_pylist())),
+            {"a": 5, "b": 3, "c": 4},
+        )
+
+    def test_drop_duplicates_sorted_matches_hash_dedupe(self):
+        pks = [str(i % 37) for i in range(200)]
+        table = _with_pk_hash(pa.table({"pk": pks, "value": range(200)}))
+
+        expected = drop_duplicates(table, sc._PK_HASH_COLUMN_NAME)
+        result = drop_duplicates_sorted(table, sc._PK_HASH_COLUMN_NAME)
+
+        self.assertEqual(
+            sorted(zip(result["pk"].to_pylist(), result["value"].to_pylist())),
+            sorted(zip(expected["pk"].to_pylist(), expected["value"].to_pylist())),
+        )
+
+    def test_merge_sorted_replaces_compacted_records(self):
+        compacted = drop_duplicates_sorted(
+            _with_pk_hash(
+                pa.table({"pk": [str(i) for i in range(50)], "value": [0] * 50})
+            ),
+            sc._PK_HASH_COLUMN_NAME,
+        )
+        incremental = drop_duplicates_sorted(
+            _with_pk_hash(
+                pa.table({"pk": [str(i) for i in range(40, 60)], "value": [1] * 20})
+            ),
+            sc._PK_HASH_COLUMN_NAME,
+        )
+
+        result = merge_sorted(compacted, incremental, sc._PK_HASH_COLUMN_NAME)
+
+        self.assertEqual(len(result), 60)
+        self.assertTrue(_is_sorted_by_pk_hash(result))
+        values = dict(zip(result["pk"].to_pylist(), result["value"].to_pylist()))
+        self.assertEqual(values, {str(i): int(i >= 40) for i in range(60)})
+
+    def test_merge_sorted_sorts_unsorted_compacted_table(self):
+        compacted = _with_pk_hash(
+            pa.table({"pk": [str(i) for i in range(30)], "value": [0] * 30})
+        )
+        incremental = drop_duplicates_sorted(
+            _with_pk_hash(pa.table({"pk": ["5", "100"], "value": [1, 1]})),
+            sc._PK_HASH_COLUMN_NAME,
+        )
+
+        result = merge_sorted(compacted, incremental, sc._PK_HASH_COLUMN_NAME)
+
+        self.assertEqual(len(result), 31)
+        self.assertTrue(_is_sorted_by_pk_hash(result))
+        values = dict(zip(result["pk"].to_pylist(), result["value"].to_pylist()))
+        self.assertEqual(values["5"], 1)
+        self.assertEqual(values["100"], 1)
+
+    def test_sort_merge_tables_drops_deleted_records(self):
+        compacted = _with_pk_hash(pa.table({"pk": ["a", "b", "c"], "value": [1, 2, 3]}))
+        incremental = pa.concat_tables(
+            [
+                _with_delta_type(
+                    _with_pk_hash(pa.table({"pk": ["b", "d"], "value": [20, 40]})),
+                    DeltaType.UPSERT,
+                ),
+                _with_delta_type(
+                    _with_pk_hash(pa.table({"pk": ["c", "d"], "value": [0, 0]})),
+                    DeltaType.DELETE,
+                ),
+            ]
+        )
+
+        result = sort_merge_tables(compacted, incremental)
+
+        self.assertNotIn(sc._DELTA_TYPE_COLUMN_NAME, result.column_names)
+        self.assertTrue(_is_sorted_by_pk_hash(result))
+        self.assertEqual(
+            dict(zip(result["pk"].to_pylist(), result["value"].to_pylist())),
+            {"a": 1, "b": 20},
+        )
+
+    def test_sort_merge_tables_without_compacted_table(self):
+        incremental = _with_pk_hash(
+            pa.table({"pk": ["b", "a", "b"], "value": [1, 2, 3]})
+        )
+
+        result = sort_merge_tables(None, incremental)
+
+        self.assertTrue(_is_sorted_by_pk_hash(result))
+        self.assertEqual(
+            dict(zip(result["pk"].to_pylist(), result["value"].to_pylist())),
+            {"a": 2, "b": 3},
+        )
+
+
+class TestMergeSortedBy(unittest.TestCase):
+    SORT_KEYS = [
+        SortKey.of("group"),
+        SortKey.of("ts", SortOrder.DESCENDING),
+    ]
+
+    def _sorted_run(self, seed: int, length: int) -> pa.Table:
+        table = pa.table(
+            {
+                "group": [(seed * 7 + i * 13) % 5 for i in range(length)],
+                "ts": [(seed * 11 + i * 17) % 9 for i in range(length)],
+                "id": [f"{seed}-{i}" for i in range(length)],
+            }
+        )
+        return table.sort_by(self.SORT_KEYS)
+
+    def test_merge_sorted_by_matches_stable_sort(self):
+        runs = [
+            self._sorted_run(seed, length) for seed, length in enumerate([40, 3, 7])
+        ]
+        runs.append(self._sorted_run(3, 1).slice(0, 0))
+
+        result = merge_sorted_by(runs, self.SORT_KEYS)
+
+        # records of equal sort keys keep the order of their runs
+        self.assertEqual(result, pa.concat_tables(runs).sort_by(self.SORT_KEYS))
+
+    def test_merge_sorted_by_sorts_unsorted_tables(self):
+        compacted = pa.table(
+            {"group": [3, 1, 2], "ts": [0, 0, 0], "id": ["c", "a", "b"]}
+        )
+        incremental = pa.table({"group": [0, 2], "ts": [5, 1], "id": ["d", "e"]})
+
+        result = merge_sorted_by([compacted, incremental], self.SORT_KEYS)
+
+        self.assertEqual(result["id"].to_pylist(), ["d", "a", "e", "b", "c"])
+
+    def test_merge_sorted_by_with_null_sort_keys(self):
+        compacted = pa.table({"group": [1, None], "ts": [0, 0], "id": ["a", "b"]})
+        incremental = pa.table({"group": [2], "ts": [0], "id": ["c"]})
+
+        self.assertIsNone(merge_sorted_by([compacted, incremental], self.SORT_KEYS))
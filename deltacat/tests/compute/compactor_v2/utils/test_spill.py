@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+import pyarrow as pa
+
+from deltacat.compute.compactor_v2.utils.spill import (
+    pk_hash_sub_range_indices,
+    read_spill_files,
+    spill_by_pk_hash_sub_range,
+    split_by_pk_hash_sub_range,
+)
+
+
+class TestSpill(unittest.TestCase):
+    TABLE = pa.table(
+        {
+            "pk": [str(i % 50) for i in range(200)],
+            "value": list(range(200)),
+        }
+    )
+
+    def test_pk_hash_sub_range_indices(self):
+        sub_ranges = pk_hash_sub_range_indices(self.TABLE, ["pk"], 4)
+
+        self.assertEqual(len(sub_ranges), len(self.TABLE))
+        self.assertTrue(((sub_ranges >= 0) & (sub_ranges < 4)).all())
+        # records of the same primary key share a sub-range
+        for i in range(50):
+            self.assertEqual(len(set(sub_ranges[i::50])), 1)
+        self.assertGreater(len(set(sub_ranges)), 1)
+
+    def test_split_by_pk_hash_sub_range(self):
+        sub_range_tables = split_by_pk_hash_sub_range(self.TABLE, ["pk"], 4)
+
+        self.assertEqual(len(sub_range_tables), 4)
+        self.assertEqual(sum(len(table) for table in sub_range_tables), 200)
+        seen_pks = set()
+        for table in sub_range_tables:
+            pks = set(table["pk"].to_pylist())
+            self.assertFalse(pks & seen_pks)
+            seen_pks |= pks
+            # records keep their relative order
+            values = table["value"].to_pylist()
+            self.assertEqual(values, sorted(values))
+
+    def test_split_by_single_sub_range(self):
+        (table,) = split_by_pk_hash_sub_range(self.TABLE, ["pk"], 1)
+
+        self.assertEqual(table, self.TABLE)
+
+    def test_spill_by_pk_hash_sub_range(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            paths = spill_by_pk_hash_sub_range(
+                self.TABLE, ["pk"], 64, spill_dir, "test"
+            )
+
+            self.assertEqual(len(paths), 64)
+            self.assertIn(None, paths)
+            spilled = [path for path in paths if path]
+            self.assertTrue(all(os.path.exists(path) for path in spilled))
+            result = read_spill_files(spilled)
+            self.assertEqual(
+                sorted(result["value"].to_pylist()), self.TABLE["value"].to_pylist()
+            )
+            self.assertIsNone(read_spill_files([]))
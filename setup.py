@@ -50,6 +50,10 @@ setuptools.setup(
         "getdaft == 0.2.23",
         "schedule == 1.2.0",
     ],
+    extras_require={
+        # enables the xxh3_128 compactor v2 primary key hasher
+        "xxhash": ["xxhash == 3.4.1"],
+    },
     setup_requires=["wheel"],
     package_data={
         "compute/metastats": ["*.yaml"],